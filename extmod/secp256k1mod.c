@@ -19,6 +19,31 @@
 #include <Python.h>
 #include <secp256k1.h>
 
+static secp256k1_context * get_context(void) {
+	static secp256k1_context *ctx = NULL;
+	if (ctx == NULL) {
+	/*	puts ("Initializing context"); */
+		ctx = secp256k1_context_create(SECP256K1_CONTEXT_SIGN | SECP256K1_CONTEXT_VERIFY);
+	}
+	return ctx;
+}
+
+/* Returns 0 on success, otherwise sets Python exception and returns -1 */
+static int do_priv2pub(secp256k1_context *ctx, const unsigned char *privkey,
+		unsigned char *pubkeyc, size_t pubkeyclen, const int compressed) {
+	secp256k1_pubkey pubkey;
+	if (secp256k1_ec_pubkey_create(ctx, &pubkey, privkey) != 1) {
+		PyErr_SetString(PyExc_RuntimeError, "Public key creation failed");
+		return -1;
+	}
+	if (secp256k1_ec_pubkey_serialize(ctx, pubkeyc, &pubkeyclen, &pubkey,
+			compressed == 1 ? SECP256K1_EC_COMPRESSED: SECP256K1_EC_UNCOMPRESSED) != 1) {
+		PyErr_SetString(PyExc_RuntimeError, "Public key serialization failed");
+		return -1;
+	}
+	return 0;
+}
+
 static PyObject * priv2pub(PyObject *self, PyObject *args) {
 	const unsigned char * privkey;
 	const int klen;
@@ -29,28 +54,140 @@ static PyObject * priv2pub(PyObject *self, PyObject *args) {
 		PyErr_SetString(PyExc_ValueError, "Private key length not 32 bytes");
 		return NULL;
 	}
-	secp256k1_pubkey pubkey;
 	size_t pubkeyclen = compressed == 1 ? 33: 65;
 	unsigned char pubkeyc[pubkeyclen];
-	static secp256k1_context *ctx = NULL;
-	if (ctx == NULL) {
-	/*	puts ("Initializing context"); */
-		ctx = secp256k1_context_create(SECP256K1_CONTEXT_SIGN | SECP256K1_CONTEXT_VERIFY);
+	if (do_priv2pub(get_context(), privkey, pubkeyc, pubkeyclen, compressed) != 0)
+		return NULL;
+	return Py_BuildValue("s#", pubkeyc,pubkeyclen);
+}
+
+/* Input: N concatenated 32-byte privkeys.  Output: N concatenated serialized pubkeys */
+static PyObject * priv2pub_batch(PyObject *self, PyObject *args) {
+	const unsigned char * privkeys;
+	const int klen;
+	const int compressed;
+	if (!PyArg_ParseTuple(args, "t#I", &privkeys, &klen, &compressed))
+		return NULL;
+	if (klen % 32 != 0) {
+		PyErr_SetString(PyExc_ValueError, "Private key data length not a multiple of 32 bytes");
+		return NULL;
 	}
-	if (secp256k1_ec_pubkey_create(ctx, &pubkey, privkey) != 1) {
-		PyErr_SetString(PyExc_RuntimeError, "Public key creation failed");
+	size_t nkeys = klen / 32;
+	size_t pubkeyclen = compressed == 1 ? 33: 65;
+	PyObject *ret = PyString_FromStringAndSize(NULL, nkeys * pubkeyclen);
+	if (ret == NULL) return NULL;
+	unsigned char *out = (unsigned char *) PyString_AS_STRING(ret);
+	secp256k1_context *ctx = get_context();
+	size_t i;
+	for (i = 0; i < nkeys; i++) {
+		if (do_priv2pub(ctx, privkeys + i*32, out + i*pubkeyclen, pubkeyclen, compressed) != 0) {
+			Py_DECREF(ret);
+			return NULL;
+		}
+	}
+	return ret;
+}
+
+/* Input: 32-byte message hash, 32-byte privkey.  Output: DER-encoded low-S signature */
+static PyObject * sign(PyObject *self, PyObject *args) {
+	const unsigned char * msghash;
+	const int mlen;
+	const unsigned char * privkey;
+	const int klen;
+	if (!PyArg_ParseTuple(args, "t#t#", &msghash, &mlen, &privkey, &klen))
+		return NULL;
+	if (mlen != 32) {
+		PyErr_SetString(PyExc_ValueError, "Message hash length not 32 bytes");
 		return NULL;
 	}
-	if (secp256k1_ec_pubkey_serialize(ctx, pubkeyc, &pubkeyclen, &pubkey,
-			compressed == 1 ? SECP256K1_EC_COMPRESSED: SECP256K1_EC_UNCOMPRESSED) != 1) {
-		PyErr_SetString(PyExc_RuntimeError, "Public key serialization failed");
+	if (klen != 32) {
+		PyErr_SetString(PyExc_ValueError, "Private key length not 32 bytes");
 		return NULL;
 	}
-	return Py_BuildValue("s#", pubkeyc,pubkeyclen);
+	secp256k1_context *ctx = get_context();
+	secp256k1_ecdsa_signature sig;
+	unsigned char der[72];
+	size_t derlen = sizeof(der);
+	/* default nonce function is RFC6979 */
+	if (secp256k1_ecdsa_sign(ctx, &sig, msghash, privkey, NULL, NULL) != 1) {
+		PyErr_SetString(PyExc_RuntimeError, "Signing failed");
+		return NULL;
+	}
+	if (secp256k1_ecdsa_signature_serialize_der(ctx, der, &derlen, &sig) != 1) {
+		PyErr_SetString(PyExc_RuntimeError, "Signature serialization failed");
+		return NULL;
+	}
+	return Py_BuildValue("s#", der, derlen);
+}
+
+/* Returns 1 if signature is valid, 0 if invalid or unparseable, -1 on argument error */
+static int do_verify(secp256k1_context *ctx, const unsigned char *msghash, const int mlen,
+		const unsigned char *sigder, const int slen, const unsigned char *pubkeyc, const int plen) {
+	secp256k1_ecdsa_signature sig;
+	secp256k1_pubkey pubkey;
+	if (mlen != 32) {
+		PyErr_SetString(PyExc_ValueError, "Message hash length not 32 bytes");
+		return -1;
+	}
+	if (secp256k1_ecdsa_signature_parse_der(ctx, &sig, sigder, slen) != 1)
+		return 0;
+	if (secp256k1_ec_pubkey_parse(ctx, &pubkey, pubkeyc, plen) != 1)
+		return 0;
+	/* high-S signatures are rejected, as in Bitcoin Core */
+	return secp256k1_ecdsa_verify(ctx, &sig, msghash, &pubkey);
+}
+
+/* Input: 32-byte message hash, DER-encoded signature, serialized pubkey.  Output: bool */
+static PyObject * verify(PyObject *self, PyObject *args) {
+	const unsigned char *msghash, *sigder, *pubkeyc;
+	const int mlen, slen, plen;
+	if (!PyArg_ParseTuple(args, "t#t#t#", &msghash, &mlen, &sigder, &slen, &pubkeyc, &plen))
+		return NULL;
+	int ret = do_verify(get_context(), msghash, mlen, sigder, slen, pubkeyc, plen);
+	if (ret == -1) return NULL;
+	return PyBool_FromLong(ret);
+}
+
+/* Input: sequence of (msghash,sig,pubkey) tuples.  Output: list of bools */
+static PyObject * verify_batch(PyObject *self, PyObject *args) {
+	PyObject *seq, *items, *ret;
+	if (!PyArg_ParseTuple(args, "O", &seq))
+		return NULL;
+	items = PySequence_Fast(seq, "Argument must be a sequence of (msghash,sig,pubkey) tuples");
+	if (items == NULL) return NULL;
+	Py_ssize_t i, n = PySequence_Fast_GET_SIZE(items);
+	ret = PyList_New(n);
+	if (ret == NULL) {
+		Py_DECREF(items);
+		return NULL;
+	}
+	secp256k1_context *ctx = get_context();
+	for (i = 0; i < n; i++) {
+		const unsigned char *msghash, *sigder, *pubkeyc;
+		const int mlen, slen, plen;
+		int res = -1;
+		PyObject *item = PySequence_Fast_GET_ITEM(items, i);
+		if (!PyTuple_Check(item))
+			PyErr_SetString(PyExc_TypeError, "Sequence items must be (msghash,sig,pubkey) tuples");
+		else if (PyArg_ParseTuple(item, "t#t#t#", &msghash, &mlen, &sigder, &slen, &pubkeyc, &plen))
+			res = do_verify(ctx, msghash, mlen, sigder, slen, pubkeyc, plen);
+		if (res == -1) {
+			Py_DECREF(ret);
+			Py_DECREF(items);
+			return NULL;
+		}
+		PyList_SET_ITEM(ret, i, PyBool_FromLong(res));
+	}
+	Py_DECREF(items);
+	return ret;
 }
 
 static PyMethodDef secp256k1Methods[] = {
 	{"priv2pub", priv2pub, METH_VARARGS, "Generate pubkey from privkey using libsecp256k1"},
+	{"priv2pub_batch", priv2pub_batch, METH_VARARGS, "Generate packed pubkeys from packed privkeys using libsecp256k1"},
+	{"sign", sign, METH_VARARGS, "Sign message hash with privkey using libsecp256k1"},
+	{"verify", verify, METH_VARARGS, "Verify signature of message hash using libsecp256k1"},
+	{"verify_batch", verify_batch, METH_VARARGS, "Verify list of (msghash,sig,pubkey) tuples using libsecp256k1"},
 	{NULL, NULL, 0, NULL} /* Sentinel */
 };
 
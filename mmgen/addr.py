@@ -27,6 +27,12 @@ from mmgen.obj import *
 
 pnm = g.proj_name
 
+# Address data generated here needs no checking, so bypass BTCAddr's verification
+def _btcaddr(addr,addr_fmt,hexaddr,testnet):
+	ret = str.__new__(BTCAddr,addr) # check has been done
+	ret.addr_fmt,ret.hex,ret.testnet = addr_fmt,hexaddr,testnet
+	return ret
+
 class AddrGenerator(MMGenObject):
 	def __new__(cls,atype):
 		d = {
@@ -40,8 +46,9 @@ class AddrGeneratorP2PKH(MMGenObject):
 	desc = 'p2pkh'
 	def to_addr(self,pubhex):
 		assert type(pubhex) == PubKey
-		from mmgen.bitcoin import hexaddr2addr,hash160
-		return BTCAddr(hexaddr2addr(hash160(pubhex)))
+		from mmgen.bitcoin import hash2addr,hash160_bin
+		h = hash160_bin(unhexlify(pubhex))
+		return _btcaddr(hash2addr(h),'p2pkh',hexlify(h),g.testnet)
 
 	def to_segwit_redeem_script(self,pubhex):
 		raise NotImplemented
@@ -50,8 +57,9 @@ class AddrGeneratorSegwit(MMGenObject):
 	desc = 'segwit'
 	def to_addr(self,pubhex):
 		assert pubhex.compressed
-		from mmgen.bitcoin import pubhex2segwitaddr
-		return BTCAddr(pubhex2segwitaddr(pubhex))
+		from mmgen.bitcoin import hash2addr,hash160_bin,pubkey2redeem_script
+		h = hash160_bin(pubkey2redeem_script(unhexlify(pubhex)))
+		return _btcaddr(hash2addr(h,p2sh=True),'p2sh',hexlify(h),g.testnet)
 
 	def to_segwit_redeem_script(self,pubhex):
 		assert pubhex.compressed
@@ -60,12 +68,16 @@ class AddrGeneratorSegwit(MMGenObject):
 
 class KeyGenerator(MMGenObject):
 	def __new__(cls,generator=None,silent=False):
-		if cls.test_for_secp256k1(silent=silent) and generator != 1:
-			if (not hasattr(opt,'key_generator')) or opt.key_generator == 2 or generator == 2:
-				return super(cls,cls).__new__(KeyGeneratorSecp256k1)
-		else:
+		gen = generator or getattr(opt,'key_generator',None) or g.key_generator
+		assert 1 <= gen <= len(g.key_generators)
+		if gen == 2 and not cls.test_for_secp256k1(silent=silent):
+			if not silent:
+				msg('secp256k1 library unavailable, using native Python ECC for address generation')
+			gen = 3
+		if gen == 1 and not silent:
 			msg('Using (slow) native Python ECDSA library for address generation')
-			return super(cls,cls).__new__(KeyGeneratorPython)
+		kg = (KeyGeneratorPython,KeyGeneratorSecp256k1,KeyGeneratorPythonFast)[gen-1]
+		return super(cls,cls).__new__(kg)
 
 	@classmethod
 	def test_for_secp256k1(self,silent=False):
@@ -76,6 +88,9 @@ class KeyGenerator(MMGenObject):
 		except:
 			return False
 
+	def to_pubhex_list(self,privs):
+		return [self.to_pubhex(k) for k in privs]
+
 class KeyGeneratorPython(KeyGenerator):
 	desc = 'python-ecdsa'
 	def to_pubhex(self,privhex):
@@ -83,6 +98,21 @@ class KeyGeneratorPython(KeyGenerator):
 		from mmgen.bitcoin import privnum2pubhex
 		return PubKey(privnum2pubhex(int(privhex,16),compressed=privhex.compressed),compressed=privhex.compressed)
 
+class KeyGeneratorPythonFast(KeyGenerator):
+	desc = 'python-ecc'
+	def to_pubhex(self,privhex):
+		assert type(privhex) == PrivKey
+		return self.to_pubhex_list([privhex])[0]
+
+	def to_pubhex_list(self,privs):
+		from mmgen.ecc import privnums2pubhexes
+		ret = [None] * len(privs)
+		for compressed in (True,False):
+			idxs = [i for i,k in enumerate(privs) if k.compressed == compressed]
+			for i,pubhex in zip(idxs,privnums2pubhexes([int(privs[i],16) for i in idxs],compressed)):
+				ret[i] = PubKey(pubhex,compressed=compressed)
+		return ret
+
 class KeyGeneratorSecp256k1(KeyGenerator):
 	desc = 'secp256k1'
 	def to_pubhex(self,privhex):
@@ -90,6 +120,34 @@ class KeyGeneratorSecp256k1(KeyGenerator):
 		from mmgen.secp256k1 import priv2pub
 		return PubKey(hexlify(priv2pub(unhexlify(privhex),int(privhex.compressed))),compressed=privhex.compressed)
 
+	# one call into the extension per compression type
+	def to_pubhex_list(self,privs):
+		try: from mmgen.secp256k1 import priv2pub_batch
+		except ImportError: # extension module built by older version
+			return super(KeyGeneratorSecp256k1,self).to_pubhex_list(privs)
+		ret = [None] * len(privs)
+		for compressed in (True,False):
+			idxs = [i for i,k in enumerate(privs) if k.compressed == compressed]
+			if not idxs: continue
+			plen = (65,33)[compressed]
+			d = priv2pub_batch(''.join([unhexlify(privs[i]) for i in idxs]),int(compressed))
+			for n,i in enumerate(idxs):
+				ret[i] = PubKey(hexlify(d[n*plen:(n+1)*plen]),compressed=compressed)
+		return ret
+
+# Subprocess for AddrList.gen_keys_parallel(): generates keys and addresses for its share of
+# the chunks and sends them back over 'conn', one chunk at a time.  Plain strings are sent,
+# as MMGen string types can't be pickled
+def _keygen_worker(conn,gen_method,compressed,chunks):
+	kg = KeyGenerator(silent=True)
+	ag = AddrGenerator(gen_method)
+	for chunk in chunks:
+		privs = [PrivKey(sec,compressed) for sec in chunk]
+		conn.send([(str.__str__(sec),str.__str__(sec.wif),
+					(str.__str__(addr),addr.addr_fmt,addr.hex,addr.testnet))
+						for sec,addr in zip(privs,map(ag.to_addr,kg.to_pubhex_list(privs)))])
+	conn.close()
+
 class AddrListEntry(MMGenListItem):
 	addr  = MMGenListItemAttr('addr','BTCAddr')
 	idx   = MMGenImmutableAttr('idx','AddrIdx')
@@ -139,6 +197,22 @@ class AddrListIDStr(unicode,Hilite):
 
 		return unicode.__new__(cls,ret)
 
+class AddrListIndex(MMGenObject):
+	"""
+	The entries of one or more address lists, indexed by MMGen ID (for lists
+	with an ID) and by coin address
+	"""
+	def __init__(self,*al_lists):
+		self.by_mmid,self.by_addr = {},{}
+		for al in al_lists: self.add(al)
+
+	def add(self,al):
+		if al.al_id:
+			pfx = al.al_id + ':'
+			for e in al.data: self.by_mmid[pfx+str(e.idx)] = e
+		for e in al.data:
+			if e.addr: self.by_addr[e.addr] = e
+
 class AddrList(MMGenObject): # Address info for a single seed ID
 	msgs = {
 	'file_header': """
@@ -171,6 +245,7 @@ Removed %s duplicate WIF key%s from keylist (also in {pnm} key-address file
 	ext      = 'addrs'
 	dfl_mmtype = MMGenAddrType('L')
 	cook_hash_rounds = 10  # not too many rounds, so hand decoding can still be feasible
+	key_chunksize = 64     # max keys per batch passed to key generator or subprocess
 	chksum_rec_f = lambda foo,e: (str(e.idx), e.addr)
 
 	def __init__(self,addrfile='',al_id='',adata=[],seed='',addr_idxs='',src='',
@@ -231,31 +306,18 @@ Removed %s duplicate WIF key%s from keylist (also in {pnm} key-address file
 		seed = seed.get_data()
 		seed = self.cook_seed(seed)
 
-		if self.gen_addrs:
-			kg = KeyGenerator()
-			ag = AddrGenerator(self.al_id.mmtype.gen_method)
-
-		t_addrs,num,pos,out = len(addrnums),0,0,AddrListList()
+		t_addrs,out = len(addrnums),AddrListList()
 		le = self.entry_type
+		jobs = self.get_num_jobs(t_addrs)
+		kaddrs = (self.gen_keys_serial,self.gen_keys_parallel)[jobs > 1](seed,addrnums,jobs)
 
-		while pos != t_addrs:
-			seed = sha512(seed).digest()
-			num += 1 # round
-
-			if num != addrnums[pos]: continue
-
-			pos += 1
+		for pos,(num,sec,addr) in enumerate(kaddrs,1):
 
 			if not g.debug:
 				qmsg_r('\rGenerating %s #%s (%s of %s)' % (self.gen_desc,num,pos,t_addrs))
 
-			e = le(idx=num)
-
-			# Secret key is double sha256 of seed hash round /num/
-			e.sec = PrivKey(sha256(sha256(seed).digest()).digest(),self.al_id.mmtype.compressed)
-
-			if self.gen_addrs:
-				e.addr = ag.to_addr(kg.to_pubhex(e.sec))
+			# checks have been done: idx is from an AddrIdxList, sec and addr were just generated
+			e = le.trusted(idx=int.__new__(AddrIdx,num),sec=sec,addr=addr)
 
 			if type(self) == PasswordList:
 				e.passwd = unicode(self.make_passwd(e.sec)) # TODO - own type
@@ -268,6 +330,91 @@ Removed %s duplicate WIF key%s from keylist (also in {pnm} key-address file
 				self.al_id.hl(),t_addrs,self.gen_desc,suf(t_addrs,self.gen_desc_pl),' '*15))
 		return out
 
+	# Walk the sha512 seed chain, yielding the raw secret for each requested index
+	def gen_secs(self,seed,addrnums):
+		k = g.seed_chain_checkpoints
+		if k > 0 and addrnums and addrnums[-1] > k:
+			from mmgen.seedchain import SeedChainCheckpoints
+			chain = SeedChainCheckpoints(self.al_id.sid,seed,k).walk(seed,addrnums)
+		else:
+			chain = self.walk_seed_chain(seed,addrnums)
+		for num,state in chain:
+			# Secret key is double sha256 of seed hash round /num/
+			yield num,sha256(sha256(state).digest()).digest()
+
+	@staticmethod
+	def walk_seed_chain(seed,addrnums):
+		t_addrs,num,pos = len(addrnums),0,0
+		while pos != t_addrs:
+			seed = sha512(seed).digest()
+			num += 1 # round
+
+			if num != addrnums[pos]: continue
+
+			pos += 1
+			yield num,seed
+
+	def get_num_jobs(self,t_addrs):
+		# multiprocessing on Windows re-imports the launching script, so don't use it there
+		if not self.gen_addrs or g.platform == 'win': return 1
+		return max(1,min(opt.jobs or 1,t_addrs))
+
+	# keys are passed to the key generator in chunks, allowing it to batch them
+	def gen_keys_serial(self,seed,addrnums,jobs=1):
+		from itertools import islice
+		compressed = self.al_id.mmtype.compressed
+		if self.gen_addrs:
+			kg = KeyGenerator()
+			ag = AddrGenerator(self.al_id.mmtype.gen_method)
+		secs = self.gen_secs(seed,addrnums)
+		while True:
+			chunk = [(num,PrivKey(sec,compressed)) for num,sec in islice(secs,self.key_chunksize)]
+			if not chunk: break
+			if self.gen_addrs:
+				addrs = map(ag.to_addr,kg.to_pubhex_list([sec for num,sec in chunk]))
+			else:
+				addrs = [None] * len(chunk)
+			for (num,sec),addr in zip(chunk,addrs):
+				yield num,sec,addr
+
+	# The sha512 chain is cheap, so compute it up front, then farm out the key -> pubkey
+	# -> address work to subprocesses.  Chunks are dealt out round-robin and read back in
+	# order, so output order is unchanged.  Pool isn't used, as its helper threads deadlock
+	# on the import lock (our main modules run at import time).
+	def gen_keys_parallel(self,seed,addrnums,jobs):
+		from multiprocessing import Process,Pipe
+		compressed = self.al_id.mmtype.compressed
+		secs = list(self.gen_secs(seed,addrnums))
+		n = max(1,min(self.key_chunksize,(len(secs)+jobs-1) / jobs))
+		chunks = [secs[i:i+n] for i in range(0,len(secs),n)]
+		jobs = min(jobs,len(chunks))
+		vmsg('Generating {} {}{} using {} processes'.format(
+				len(secs),self.gen_desc,suf(len(secs),self.gen_desc_pl),jobs))
+		procs = []
+		try:
+			for j in range(jobs):
+				conn_r,conn_w = Pipe(False)
+				p = Process(target=_keygen_worker,args=(conn_w,self.al_id.mmtype.gen_method,compressed,
+						[[sec for num,sec in c] for c in chunks[j::jobs]]))
+				p.daemon = True
+				p.start()
+				conn_w.close()
+				procs.append((p,conn_r))
+			for i,chunk in enumerate(chunks):
+				try: res = procs[i % jobs][1].recv()
+				except EOFError: die(2,'Key generation subprocess exited unexpectedly')
+				for (num,sec_bytes),(sec_hex,wif,a) in zip(chunk,res):
+					# data was generated and checked by the subprocess, so just rebuild the objects
+					sec = str.__new__(PrivKey,sec_hex)
+					sec.compressed = compressed
+					sec.wif = str.__new__(WifKey,wif)
+					yield num,sec,_btcaddr(*a)
+		finally:
+			for p,conn_r in procs:
+				conn_r.close()
+				if p.is_alive(): p.terminate()
+				p.join()
+
 	def is_mainnet(self):
 		return self.data[0].addr.is_mainnet()
 
@@ -330,30 +477,35 @@ Removed %s duplicate WIF key%s from keylist (also in {pnm} key-address file
 				e.label = comment
 
 	def make_reverse_dict(self,btcaddrs):
-		d,b = MMGenDict(),btcaddrs
+		d,b = MMGenDict(),dict((a,a) for a in btcaddrs) # keys are the caller's objects
 		for e in self.data:
-			try:
-				d[b[b.index(e.addr)]] = MMGenID('{}:{}'.format(self.al_id,e.idx)),e.label
-			except: pass
+			if e.addr in b:
+				d[b[e.addr]] = MMGenID('{}:{}'.format(self.al_id,e.idx)),e.label
 		return d
 
+	def get_index(self):
+		"Return an index of the list's entries, built on first use"
+		if not getattr(self,'_index',None):
+			self._index = AddrListIndex(self)
+		return self._index
+
 	def remove_dup_keys(self,cmplist):
 		assert self.has_keys
-		pop_list = []
-		for n,d in enumerate(self.data):
-			for e in cmplist.data:
-				if e.sec.wif == d.sec.wif:
-					pop_list.append(n)
-		for n in reversed(pop_list): self.data.pop(n)
-		if pop_list:
-			vmsg(self.msgs['removed_dup_keys'] % (len(pop_list),suf(removed,'s')))
+		wifs = set(e.sec.wif for e in cmplist.data)
+		n = len(self.data)
+		self.data[:] = [d for d in self.data if d.sec.wif not in wifs]
+		self._index = None
+		removed = n - len(self.data)
+		if removed:
+			vmsg(self.msgs['removed_dup_keys'] % (removed,suf(removed,'s')))
 
 	def add_wifs(self,key_list):
 		if not key_list: return
+		by_addr = key_list.get_index().by_addr
 		for d in self.data:
-			for e in key_list.data:
-				if e.addr and e.sec and e.addr == d.addr:
-					d.sec = e.sec
+			e = by_addr.get(d.addr)
+			if e and e.sec:
+				d.sec = e.sec
 
 	def list_missing(self,key):
 		return [d.addr for d in self.data if not getattr(d,key)]
@@ -361,11 +513,13 @@ Removed %s duplicate WIF key%s from keylist (also in {pnm} key-address file
 	def generate_addrs_from_keys(self):
 		kg = KeyGenerator()
 		ag = AddrGenerator('p2pkh')
-		d = self.data
-		for n,e in enumerate(d,1):
-			qmsg_r('\rGenerating addresses from keylist: %s/%s' % (n,len(d)))
-			e.addr = ag.to_addr(kg.to_pubhex(e.sec))
-		qmsg('\rGenerated addresses from keylist: %s/%s ' % (n,len(d)))
+		d,n = self.data,self.key_chunksize
+		for i in range(0,len(d),n):
+			chunk = d[i:i+n]
+			qmsg_r('\rGenerating addresses from keylist: %s/%s' % (i+len(chunk),len(d)))
+			for e,pubhex in zip(chunk,kg.to_pubhex_list([e.sec for e in chunk])):
+				e.addr = ag.to_addr(pubhex)
+		qmsg('\rGenerated addresses from keylist: %s/%s ' % (len(d),len(d)))
 
 	def format(self,enable_comments=False):
 
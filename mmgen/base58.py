@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+#
+# mmgen = Multi-Mode GENerator, command-line Bitcoin cold storage solution
+# Copyright (C)2013-2017 Philemon <mmgen-py@yandex.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+base58.py:  Base58 and Base58Check encoding/decoding for the MMGen suite
+"""
+
+# Conversions work on bytes and integers directly.  Digits are looked up in a
+# reverse table instead of with str.index(), and the big-number arithmetic is
+# done 10 base-58 digits at a time (58^10 < 2^63), leaving the per-digit work
+# to small-int operations.  The encoder emits digits in pairs from a table.
+
+from hashlib import sha256
+from binascii import hexlify,unhexlify
+
+b58a = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+b58rev = dict((c,n) for n,c in enumerate(b58a))
+b58pairs = [a+b for a in b58a for b in b58a]
+
+_chunk_len = 10
+_chunk_base = 58**_chunk_len
+_chunk_pows = [58**i for i in range(_chunk_len+1)]
+
+def encode_num(num,pad=None):
+	"Encode a non-negative integer as base 58, left-padded with zeroes ('1') to 'pad' digits"
+	ret = []
+	while num:
+		num,chunk = divmod(num,_chunk_base)
+		chunk = int(chunk)
+		for i in (0,1,2,3,4):
+			chunk,d = divmod(chunk,3364) # 58*58
+			ret.append(b58pairs[d])
+	ret = ''.join(reversed(ret)).lstrip('1') # leading zeroes of topmost chunk
+	return '1' * ((pad or 0) - len(ret)) + ret
+
+def decode_num(s):
+	"Decode a base 58 string to an integer, raising ValueError on invalid digits"
+	num = 0
+	try:
+		for i in range(0,len(s),_chunk_len):
+			chunk,n = s[i:i+_chunk_len],0
+			for c in chunk:
+				n = n*58 + b58rev[c]
+			num = num * _chunk_pows[len(chunk)] + n
+	except KeyError:
+		raise ValueError('{!r}: invalid base 58 string'.format(s))
+	return num
+
+def int2bytes(num,nbytes=0):
+	h = '{:0{w}x}'.format(num,w=nbytes*2)
+	return unhexlify(('','0')[len(h) % 2] + h)
+
+# Bitcoin-style: each leading zero byte is represented by a leading '1'
+def b58encode(data):
+	lzeroes = len(data) - len(data.lstrip('\0'))
+	return '1' * lzeroes + (encode_num(int(hexlify(data),16)) if data[lzeroes:] else '')
+
+def b58decode(s):
+	lzeroes = len(s) - len(s.lstrip('1'))
+	return '\0' * lzeroes + (int2bytes(decode_num(s[lzeroes:])) if s[lzeroes:] else '')
+
+def checksum(data):
+	return sha256(sha256(data).digest()).digest()[:4]
+
+def b58encode_check(data):
+	return b58encode(data + checksum(data))
+
+def b58decode_check(s):
+	"Return the payload of a Base58Check string, or None if it's invalid"
+	try: data = b58decode(s)
+	except ValueError: return None
+	if len(data) < 4 or checksum(data[:-4]) != data[-4:]:
+		return None
+	return data[:-4]
@@ -20,7 +20,6 @@
 bitcoin.py:  Bitcoin address/key conversion functions
 """
 
-import ecdsa
 from binascii import hexlify, unhexlify
 from hashlib import sha256
 from hashlib import new as hashlib_new
@@ -34,10 +33,19 @@ _b = 0x0000000000000000000000000000000000000000000000000000000000000007L
 _a = 0x0000000000000000000000000000000000000000000000000000000000000000L
 _Gx = 0x79BE667EF9DCBBAC55A06295CE870B07029BFCDB2DCE28D959F2815B16F81798L
 _Gy = 0x483ada7726a3c4655da4fbfc0e1108a8fd17b448a68554199c47d08ffb10d4b8L
-_curve_secp256k1 = ecdsa.ellipticcurve.CurveFp(_p,_a,_b)
-_generator_secp256k1 = ecdsa.ellipticcurve.Point(_curve_secp256k1,_Gx,_Gy,_r)
 _oid_secp256k1 = (1,3,132,0,10)
-_secp256k1 = ecdsa.curves.Curve('secp256k1',_curve_secp256k1,_generator_secp256k1,_oid_secp256k1)
+
+# The ecdsa library is slow to import and needed only by the (slow) native Python key
+# generator, so import it and build the curve on first use
+_secp256k1 = None
+def get_secp256k1():
+	global _secp256k1
+	if not _secp256k1:
+		import ecdsa
+		curve = ecdsa.ellipticcurve.CurveFp(_p,_a,_b)
+		generator = ecdsa.ellipticcurve.Point(curve,_Gx,_Gy,_r)
+		_secp256k1 = ecdsa.curves.Curve('secp256k1',curve,generator,_oid_secp256k1)
+	return _secp256k1
 
 # From en.bitcoin.it:
 #  The Base58 encoding used is home made, and has some differences.
@@ -45,26 +53,19 @@ _secp256k1 = ecdsa.curves.Curve('secp256k1',_curve_secp256k1,_generator_secp256k
 # Test: 5JbQQTs3cnoYN9vDYaGY6nhQ1DggVsY4FJNBUfEfpSQqrEp3srk
 # The 'zero address':
 # 1111111111111111111114oLvT2 (pubkeyhash = '\0'*20)
-_b58a='123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+from mmgen.base58 import b58encode,b58decode,b58encode_check,b58decode_check,checksum as b58_chksum
 
-def _numtob58(num):
-	ret = []
-	while num:
-		ret.append(_b58a[num % 58])
-		num /= 58
-	return ''.join(ret)[::-1]
+def hash160_bin(data): # OP_HASH160
+	return hashlib_new('ripemd160',sha256(data).digest()).digest()
 
-def _b58tonum(b58num):
-	b58num = b58num.strip()
-	for i in b58num:
-		if not i in _b58a: return False
-	return sum(_b58a.index(n) * (58**i) for i,n in enumerate(list(b58num[::-1])))
+def hash256_bin(data): # OP_HASH256
+	return sha256(sha256(data).digest()).digest()
 
-def hash160(hexnum): # take hex, return hex - OP_HASH160
-	return hashlib_new('ripemd160',sha256(unhexlify(hexnum)).digest()).hexdigest()
+def hash160(hexnum): # take hex, return hex
+	return hexlify(hash160_bin(unhexlify(hexnum)))
 
-def hash256(hexnum): # take hex, return hex - OP_HASH256
-	return sha256(sha256(unhexlify(hexnum)).digest()).hexdigest()
+def hash256(hexnum): # take hex, return hex
+	return hexlify(hash256_bin(unhexlify(hexnum)))
 
 # devdoc/ref_transactions.md:
 btc_addr_ver_nums = {
@@ -74,58 +75,60 @@ btc_addr_ver_nums = {
 btc_addr_pfxs             = { 'mainnet': '13', 'testnet': 'mn2', 'regtest': 'mn2' }
 btc_uncompressed_wif_pfxs = { 'mainnet':'5','testnet':'9' }
 btc_privkey_pfxs          = { 'mainnet':'80','testnet':'ef' }
+btc_addr_ver_bytes = dict(((fmt,net),unhexlify(v[0]))
+							for fmt in btc_addr_ver_nums for net,v in btc_addr_ver_nums[fmt].items())
 
 from mmgen.globalvars import g
+from mmgen.util import Msg
 
 def verify_addr(addr,verbose=False,return_dict=False,testnet=None):
 	testnet = testnet if testnet != None else g.testnet # allow override
-	for addr_fmt in ('p2pkh','p2sh'):
-		for net in ('mainnet','testnet'):
-			ver_num,ldigit = btc_addr_ver_nums[addr_fmt][net]
-			if addr[0] not in ldigit: continue
-			num = _b58tonum(addr)
-			if num == False: break
-			addr_hex = '{:050x}'.format(num)
-			if addr_hex[:2] != ver_num: continue
-			if hash256(addr_hex[:42])[:8] == addr_hex[42:]:
-				return {'hex':addr_hex[2:42],'format':addr_fmt,'net':net} if return_dict else True
-			else:
+	try: data = b58decode(addr.strip())
+	except ValueError: data = None
+	if data and len(data) == 25:
+		ver_num = hexlify(data[0])
+		for addr_fmt in ('p2pkh','p2sh'):
+			for net in ('mainnet','testnet'):
+				vn,ldigit = btc_addr_ver_nums[addr_fmt][net]
+				if addr[0] not in ldigit or ver_num != vn: continue
+				if b58_chksum(data[:21]) == data[21:]:
+					return {'hex':hexlify(data[1:21]),'format':addr_fmt,'net':net} if return_dict else True
 				if verbose: Msg("Invalid checksum in address '{}'".format(addr))
-				break
+				return False
 
 	if verbose: Msg("Invalid address '{}'".format(addr))
 	return False
 
-def hexaddr2addr(hexaddr,p2sh=False,testnet=None):
+def hash2addr(addr_hash,p2sh=False,testnet=None): # take binary hash160, return address
 	testnet = testnet if testnet != None else g.testnet # allow override
-	s = btc_addr_ver_nums[('p2pkh','p2sh')[p2sh]][('mainnet','testnet')[testnet]][0] + hexaddr
-	lzeroes = (len(s) - len(s.lstrip('0'))) / 2
-	return ('1' * lzeroes) + _numtob58(int(s+hash256(s)[:8],16))
+	return b58encode_check(btc_addr_ver_bytes[(('p2pkh','p2sh')[p2sh],('mainnet','testnet')[testnet])] + addr_hash)
+
+def hexaddr2addr(hexaddr,p2sh=False,testnet=None):
+	return hash2addr(unhexlify(hexaddr),p2sh=p2sh,testnet=testnet)
 
 def wif2hex(wif,testnet=None):
 	testnet = testnet if testnet != None else g.testnet # allow override
-	num = _b58tonum(wif)
-	if num == False: return False
-	key = '{:x}'.format(num)
-	compressed = wif[0] != btc_uncompressed_wif_pfxs[('mainnet','testnet')[testnet]]
-	klen = (66,68)[bool(compressed)]
-	if compressed and key[66:68] != '01': return False
-	if (key[:2] == btc_privkey_pfxs[('mainnet','testnet')[testnet]] and key[klen:] == hash256(key[:klen])[:8]):
-		return {'hex':key[2:66],'compressed':compressed,'testnet':testnet}
-	else:
-		return False
+	net = ('mainnet','testnet')[testnet]
+	data = b58decode_check(wif)
+	if not data: return False
+	compressed = wif[0] != btc_uncompressed_wif_pfxs[net]
+	if len(data) != (33,34)[compressed]: return False
+	if compressed and data[33] != '\x01': return False
+	if hexlify(data[0]) != btc_privkey_pfxs[net]: return False
+	return {'hex':hexlify(data[1:33]),'compressed':compressed,'testnet':testnet}
 
 def hex2wif(hexpriv,compressed=False,testnet=None):
 	testnet = testnet if testnet != None else g.testnet # allow override
 	s = btc_privkey_pfxs[('mainnet','testnet')[testnet]] + hexpriv + ('','01')[bool(compressed)]
-	return _numtob58(int(s+hash256(s)[:8],16))
+	return b58encode_check(unhexlify(s))
 
 # devdoc/guide_wallets.md:
 # Uncompressed public keys start with 0x04; compressed public keys begin with
 # 0x03 or 0x02 depending on whether they're greater or less than the midpoint
 # of the curve.
 def privnum2pubhex(numpriv,compressed=False):
-	pko = ecdsa.SigningKey.from_secret_exponent(numpriv,_secp256k1)
+	from ecdsa import SigningKey
+	pko = SigningKey.from_secret_exponent(numpriv,get_secp256k1())
 	# pubkey = 32-byte X coord + 32-byte Y coord (unsigned big-endian)
 	pubkey = hexlify(pko.get_verifying_key().to_string())
 	if compressed: # discard Y coord, replace with appropriate version byte
@@ -139,12 +142,22 @@ def privnum2addr(numpriv,compressed=False,segwit=False): # used only by tool and
 	pubhex = privnum2pubhex(numpriv,compressed)
 	return pubhex2segwitaddr(pubhex) if segwit else hexaddr2addr(hash160(pubhex))
 
+# Binary pubkey -> address path.  The hex-based functions are wrappers
+def pubkey2addr(pubkey,testnet=None):
+	return hash2addr(hash160_bin(pubkey),testnet=testnet)
+
 # Segwit:
-def pubhex2redeem_script(pubhex):
+def pubkey2redeem_script(pubkey):
 	# https://bitcoincore.org/en/segwit_wallet_dev/
 	# The P2SH redeemScript is always 22 bytes. It starts with a OP_0, followed
 	# by a canonical push of the keyhash (i.e. 0x0014{20-byte keyhash})
-	return '0014' + hash160(pubhex)
+	return '\x00\x14' + hash160_bin(pubkey)
+
+def pubkey2segwitaddr(pubkey,testnet=None):
+	return hash2addr(hash160_bin(pubkey2redeem_script(pubkey)),p2sh=True,testnet=testnet)
+
+def pubhex2redeem_script(pubhex):
+	return hexlify(pubkey2redeem_script(unhexlify(pubhex)))
 
 def pubhex2segwitaddr(pubhex):
-	return hexaddr2addr(hash160(pubhex2redeem_script(pubhex)),p2sh=True)
+	return pubkey2segwitaddr(unhexlify(pubhex))
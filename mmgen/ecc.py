@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+#
+# mmgen = Multi-Mode GENerator, command-line Bitcoin cold storage solution
+# Copyright (C)2013-2017 Philemon <mmgen-py@yandex.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+ecc.py:  Native Python secp256k1 public key generation for the MMGen suite
+"""
+
+# Points are kept in Jacobian coordinates (X,Y,Z), with x = X/Z^2, y = Y/Z^3, so
+# no field inversions are needed during scalar multiplication.  Multiplication
+# by the generator uses a fixed-base window table: the scalar is split into
+# 8-bit windows, and table[i][j-1] holds j*2^(8*i)*G in affine form, so k*G is
+# just a sum of at most 32 table entries.  The table is built once and cached
+# on disk.  Conversion back to affine coordinates is done for a whole batch of
+# points with a single inversion (Montgomery's trick).
+
+import os
+from hashlib import sha256
+from binascii import hexlify,unhexlify
+
+_p  = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEFFFFFC2FL
+_n  = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141L
+_Gx = 0x79BE667EF9DCBBAC55A06295CE870B07029BFCDB2DCE28D959F2815B16F81798L
+_Gy = 0x483ada7726a3c4655da4fbfc0e1108a8fd17b448a68554199c47d08ffb10d4b8L
+
+_w_bits = 8
+_w_size = 1 << _w_bits
+_w_num  = 256 / _w_bits
+_table_fn = 'secp256k1-gtable-w{}.bin'.format(_w_bits)
+_table = None
+
+_inf = (1,1,0) # point at infinity
+
+def _jdouble(P):
+	X,Y,Z = P
+	if not Y or not Z: return _inf
+	p = _p
+	A = X*X % p
+	B = Y*Y % p
+	C = B*B % p
+	D = 2 * ((X+B)*(X+B) - A - C) % p
+	E = 3 * A
+	F = E*E % p
+	X3 = (F - 2*D) % p
+	return (X3, (E*(D-X3) - 8*C) % p, 2*Y*Z % p)
+
+# Jacobian point P plus affine point (x2,y2)
+def _jadd_affine(P,x2,y2):
+	X1,Y1,Z1 = P
+	if not Z1: return (x2,y2,1)
+	p = _p
+	Z1Z1 = Z1*Z1 % p
+	H = (x2*Z1Z1 - X1) % p
+	r = (y2*Z1*Z1Z1 - Y1) % p
+	if not H:
+		return _jdouble(P) if not r else _inf
+	HH = H*H % p
+	HHH = H*HH % p
+	V = X1*HH % p
+	X3 = (r*r - HHH - 2*V) % p
+	return (X3, (r*(V-X3) - Y1*HHH) % p, Z1*H % p)
+
+def batch_inverse(nums):
+	"Invert a list of nonzero field elements using a single modular inversion"
+	p = _p
+	prods,acc = [],1
+	for a in nums:
+		prods.append(acc)
+		acc = acc * a % p
+	inv = pow(acc,p-2,p)
+	ret = [0] * len(nums)
+	for i in range(len(nums)-1,-1,-1):
+		ret[i] = prods[i] * inv % p
+		inv = inv * nums[i] % p
+	return ret
+
+def to_affine(points):
+	"Convert a list of Jacobian points (none at infinity) to affine (x,y) tuples"
+	p = _p
+	ret = []
+	for (X,Y,Z),zi in zip(points,batch_inverse([P[2] for P in points])):
+		zi2 = zi*zi % p
+		ret.append((X*zi2 % p, Y*zi2*zi % p))
+	return ret
+
+def build_table():
+	table,base = [],(_Gx,_Gy)
+	for i in range(_w_num):
+		row,P = [],_inf
+		for j in range(_w_size-1):
+			P = _jadd_affine(P,*base)
+			row.append(P)
+		table.append(to_affine(row))
+		base = to_affine([_jadd_affine(P,*base)])[0] # (2^w)*base
+	return table
+
+def _table_chksum(data): return sha256(data).digest()[:8]
+
+# The checksum only guards against corruption.  Since a bad table would silently
+# produce wrong keys, a loaded table is also checked against the curve: each
+# entry must lie on the curve, and must be the third point on the line through
+# (or, for j=2, tangent at) the two points it's the sum of, which is cheap to
+# verify without field inversions.
+def check_table(table):
+	p = _p
+
+	def on_curve(x,y):
+		return x < p and y < p and (y*y - x*x*x - 7) % p == 0
+
+	def is_sum(P1,P2,P3): # P3 == P1 + P2, with P1 != P2
+		(x1,y1),(x2,y2),(x3,y3) = P1,P2,P3
+		if x3 in (x1,x2) or x1 == x2: return False
+		return ((y1-y2)*(x3-x2) + (y3+y2)*(x1-x2)) % p == 0
+
+	def is_double(P1,P2): # P2 == 2*P1
+		(x1,y1),(x2,y2) = P1,P2
+		if x2 == x1 or not y1: return False
+		return (2*y1*(y2+y1) + 3*x1*x1*(x2-x1)) % p == 0
+
+	if len(table) != _w_num: return False
+	prev = None
+	for row in table:
+		if len(row) != _w_size-1 or not all(on_curve(x,y) for x,y in row):
+			return False
+		if prev: # row[0] == (2^w)*prev[0]
+			if not is_sum(prev[-1],prev[0],row[0]): return False
+		elif row[0] != (_Gx,_Gy):
+			return False
+		if not is_double(row[0],row[1]): return False
+		for j in range(2,len(row)):
+			if not is_sum(row[j-1],row[0],row[j]): return False
+		prev = row
+	return True
+
+def _load_table(fn):
+	try:
+		data = open(fn,'rb').read()
+	except:
+		return None
+	data,chk = data[:-8],data[-8:]
+	if len(data) != _w_num * (_w_size-1) * 64 or _table_chksum(data) != chk:
+		return None
+	h = hexlify(data)
+	pts = [(int(h[i:i+64],16),int(h[i+64:i+128],16)) for i in range(0,len(h),128)]
+	table = [pts[i:i+_w_size-1] for i in range(0,len(pts),_w_size-1)]
+	return table if check_table(table) else None
+
+def _save_table(fn,table):
+	data = unhexlify(''.join(['{:064x}{:064x}'.format(x,y) for row in table for x,y in row]))
+	try:
+		tmp_fn = fn + '.tmp'
+		open(tmp_fn,'wb').write(data + _table_chksum(data))
+		os.rename(tmp_fn,fn)
+	except:
+		return False
+	return True
+
+def get_table():
+	global _table
+	if _table is None:
+		from mmgen.globalvars import g
+		fn = os.path.join(g.data_dir_root,_table_fn) if g.data_dir_root else None
+		_table = fn and _load_table(fn)
+		if not _table:
+			_table = build_table()
+			if fn: _save_table(fn,_table)
+	return _table
+
+def _mul_g(k):
+	if not 0 < k < _n:
+		raise ValueError('Private key out of range')
+	table,P = get_table(),_inf
+	for row in table:
+		j = k & (_w_size-1)
+		if j: P = _jadd_affine(P,*row[j-1])
+		k >>= _w_bits
+	return P
+
+def _serialize(x,y,compressed):
+	return ('{:02x}{:064x}'.format(3 if y & 1 else 2,x) if compressed
+				else '04{:064x}{:064x}'.format(x,y))
+
+def privnums2pubhexes(privnums,compressed):
+	"Return hex pubkeys for a list of private keys, using one field inversion for the list"
+	if not privnums: return []
+	return [_serialize(x,y,compressed) for x,y in to_affine([_mul_g(k) for k in privnums])]
+
+def privnum2pubhex(privnum,compressed=False):
+	return privnums2pubhexes([privnum],compressed)[0]
@@ -65,6 +65,12 @@ class g(object):
 	seed_len     = 256
 
 	http_timeout = 60
+	rpc_keepalive = True # reuse RPC connections
+	rpc_pool_size = 4    # max idle RPC connections kept per host
+	rpc_batch_size = 500 # max requests per chunk of a batch RPC call
+	tw_cache     = True  # keep an on-disk snapshot of the tracking wallet's unspent outputs
+	jobs         = 1 # processes used for key/address generation
+	seed_chain_checkpoints = 0 # record seed chain state every 'n' address indexes (0: disabled)
 	max_int      = 0xffffffff
 
 	# Constants - some of these might be overriden, but they don't change thereafter
@@ -132,7 +138,8 @@ class g(object):
 	cfg_file_opts = (
 		'color','debug','hash_preset','http_timeout','no_license','rpc_host','rpc_port',
 		'quiet','tx_fee_adj','usr_randchars','testnet','rpc_user','rpc_password',
-		'bitcoin_data_dir','force_256_color','max_tx_fee','regtest'
+		'bitcoin_data_dir','force_256_color','max_tx_fee','regtest','rpc_keepalive',
+		'rpc_pool_size','rpc_batch_size','tw_cache','seed_chain_checkpoints'
 	)
 	env_opts = (
 		'MMGEN_BOGUS_WALLET_DATA',
@@ -153,7 +160,7 @@ class g(object):
 
 	# Global var sets user opt:
 	global_sets_opt = ['minconf','seed_len','hash_preset','usr_randchars','debug',
-						'quiet','tx_confs','tx_fee_adj','key_generator']
+						'quiet','tx_confs','tx_fee_adj','key_generator','jobs']
 
 	mins_per_block   = 9
 	passwd_max_tries = 5
@@ -168,7 +175,7 @@ class g(object):
 	aesctr_iv_len  = 16
 	hincog_chk_len = 8
 
-	key_generators = 'python-ecdsa','secp256k1' # '1','2'
+	key_generators = 'python-ecdsa','secp256k1','python-ecc' # '1','2','3'
 	key_generator  = 2 # secp256k1 is default
 
 	hash_presets = {
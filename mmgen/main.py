@@ -20,6 +20,56 @@
 main.py - Script launcher for the MMGen suite
 """
 
+class ImportProfiler(object):
+	"""
+	Replace __import__ with a wrapper that records the time taken by each import
+	that loads new modules, both including ('cumul') and excluding ('self') the
+	imports made by the module itself.  Imports in other threads aren't timed.
+	"""
+	def __init__(self):
+		import __builtin__,time,thread,sys
+		self.builtin,self.time,self.sys = __builtin__,time.time,sys
+		self.ident,self.get_ident = thread.get_ident(),thread.get_ident
+		self.orig_import = __builtin__.__import__
+		self.stack,self.data = [],[] # stack: time spent in child imports, per level
+		self.start = self.time()
+		__builtin__.__import__ = self.do_import
+
+	def do_import(self,name,globals=None,locals=None,fromlist=None,level=-1):
+		if self.get_ident() != self.ident:
+			return self.orig_import(name,globals,locals,fromlist,level)
+		n = len(self.sys.modules)
+		# an implicit relative import may add a None entry, e.g. 'mmgen.re' for 're'
+		stub = (globals or {}).get('__name__','').rpartition('.')[0] + '.' + name.split('.')[0]
+		if stub in self.sys.modules: stub = None
+		self.stack.append(0.0)
+		self.data.append(None) # placeholder, so that modules are listed in order of import
+		idx = len(self.data) - 1
+		t = self.time()
+		try:
+			return self.orig_import(name,globals,locals,fromlist,level)
+		finally:
+			cumul = self.time() - t
+			child = self.stack.pop()
+			n = len(self.sys.modules) - n
+			if n > 1 or (n == 1 and not (stub and self.sys.modules.get(stub,1) is None)):
+				if self.stack: self.stack[-1] += cumul
+				if not name: # 'from . import x'
+					name = '.' + ','.join(fromlist or ())
+				self.data[idx] = (len(self.stack),name,cumul,cumul-child)
+
+	def report(self):
+		self.builtin.__import__ = self.orig_import
+		total = self.time() - self.start
+		data = [d for d in self.data if d]
+		out = ['Module import times (ms):','  cumul    self  module']
+		for depth,name,cumul,self_t in data:
+			out.append('{:7.2f} {:7.2f}  {}{}'.format(cumul*1000,self_t*1000,'  '*depth,name))
+		out.append('Total: {:.2f} ms in {} imports, {:.2f} ms run time'.format(
+			sum(d[3] for d in data)*1000,len(data),total*1000))
+		out.append('NB: the time of the mmgen.main_* module includes the execution of the command')
+		self.sys.stderr.write('\n'.join(out) + '\n')
+
 def launch(what):
 
 	def my_dec(a):
@@ -32,6 +82,10 @@ def launch(what):
 	import sys
 	sys.argv = [my_dec(a) for a in sys.argv]
 
+	if '--profile-startup' in sys.argv:
+		import atexit
+		atexit.register(ImportProfiler().report)
+
 	if what in ('walletgen','walletchk','walletconv','passchg'):
 		what = 'wallet'
 	if what == 'keygen': what = 'addrgen'
@@ -104,6 +104,10 @@ and rerun it using the '--rescan' option.
 
 if not opt.quiet: confirm_or_exit(m, 'continue', expect='YES')
 
+if not opt.test:
+	from mmgen.twcache import TwUnspentCache
+	TwUnspentCache.invalidate()
+
 err_flag = False
 
 def import_address(addr,label,rescan):
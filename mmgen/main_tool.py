@@ -28,6 +28,7 @@ opts_data = lambda: {
 	'desc':    'Perform various {pnm}- and Bitcoin-related operations'.format(pnm=g.proj_name),
 	'usage':   '[opts] <command> <command args>',
 	'options': """
+-b, --batch           Execute commands read from STDIN (see BATCH MODE below)
 -d, --outdir=       d Specify an alternate directory 'd' for output
 -h, --help            Print this help message
 --, --longhelp        Print help message for long options (common options)
@@ -35,6 +36,8 @@ opts_data = lambda: {
 -q, --quiet           Produce quieter output
 -r, --usr-randchars=n Get 'n' characters of additional randomness from
                       user (min={g.min_urandchars}, max={g.max_urandchars})
+-s, --socket=       p Like --batch, but serve requests from clients of Unix
+                      socket 'p' until interrupted
 -v, --verbose         Produce more verbose output
 """.format(g=g),
 	'notes': """
@@ -42,11 +45,40 @@ opts_data = lambda: {
                                COMMANDS
 {}
 Type '{} help <command> for help on a particular command
-""".format(tool.cmd_help,g.prog_name)
+
+                              BATCH MODE
+
+Many commands may be executed in a single process, saving the startup time
+of each.  Requests are read one per line, and each command's output is written
+as soon as it completes.  A request is either a command line, e.g.
+
+    wif2addr 5HueCGU8rMjxEXxiPuD5BDku4MkFqeZyd4dZ1jvhTVqvbTLvyTJ segwit=0
+
+or a JSON object, e.g.
+
+    {{"id": 1, "cmd": "wif2addr", "args": ["5Hue..."], "kwargs": {{"segwit": 0}}}}
+
+For a command line, the command's output and error messages are written as is.
+A JSON request is answered by one line containing a JSON object with the
+request's 'id', plus either the command's output as 'result' or its error
+message as 'error'.  Blank lines and comments beginning with '#' are ignored.
+
+Reading arguments from STDIN is unavailable in batch mode, as are commands
+that may prompt the user: {}.
+With --batch, the exit status is 1 if any request failed.
+""".format(tool.cmd_help,g.prog_name,
+	', '.join(c.lower() for c in tool.batch_excluded_cmds))
 }
 
 cmd_args = opts.init(opts_data,add_opts=['hidden_incog_input_params','in_fmt'])
 
+if opt.batch or opt.socket:
+	if cmd_args: die(1,'No command arguments are allowed in batch mode')
+	if opt.socket:
+		tool.run_server(opt.socket)
+		sys.exit(0)
+	sys.exit(1 if tool.run_batch() else 0)
+
 if len(cmd_args) < 1: opts.usage()
 
 Command = cmd_args.pop(0).capitalize()
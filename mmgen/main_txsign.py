@@ -33,6 +33,7 @@ opts_data = lambda: {
 -A, --aug1hf          Sign transaction for the Aug. 1 2017 UAHF chain
 -b, --brain-params=l,p Use seed length 'l' and hash preset 'p' for
                       brainwallet input
+-B, --batch           Sign all transactions in one pass (see NOTES below)
 -d, --outdir=      d  Specify an alternate directory 'd' for output
 -D, --tx-id           Display transaction ID and exit
 -e, --echo-passphrase Print passphrase to screen when typing it
@@ -47,6 +48,7 @@ opts_data = lambda: {
                       for password hashing (default: '{g.hash_preset}')
 -z, --show-hash-presets Show information on available hash presets
 -k, --keys-from-file=f Provide additional keys for non-{pnm} addresses
+-j, --jobs=        n  Use 'n' processes for key generation (default: {g.jobs})
 -K, --key-generator=m Use method 'm' for public key generation
                       Options: {kgs} (default: {kg})
 -M, --mmgen-keys-from-file=f Provide keys for {pnm} addresses in a key-
@@ -54,6 +56,7 @@ opts_data = lambda: {
                       online signing without an {pnm} seed source. The
                       key-address file is also used to verify {pnm}-to-{cu}
                       mappings, so the user should record its checksum.
+-o, --offline         Sign without bitcoind, using the secp256k1 library
 -P, --passwd-file= f  Get {pnm} wallet or bitcoind passphrase from file 'f'
 -q, --quiet           Suppress warnings; overwrite files without prompting
 -I, --info            Display information about the transaction and exit
@@ -66,7 +69,7 @@ opts_data = lambda: {
 		kg=g.key_generator,
 		cu=g.coin
 		),
-	'notes': '\n' + txsign_notes
+	'notes': '\n' + txsign_notes + '\n' + txsign_batch_notes
 }
 
 infiles = opts.init(opts_data,add_opts=['b16'])
@@ -78,7 +81,7 @@ if opt.aug1hf: # TODO: remove in 0.9.4
 if not infiles: opts.usage()
 for i in infiles: check_infile(i)
 
-c = bitcoin_connection()
+c = None if opt.offline else bitcoin_connection()
 
 if not opt.info and not opt.terse_info:
 	do_license_msg(immed=True)
@@ -90,10 +93,11 @@ kal        = get_keyaddrlist(opt)
 kl         = get_keylist(opt)
 if kl and kal: kl.remove_dup_keys(kal)
 
-tx_num_str = ''
+tx_num_str,txs = '',[]
 for tx_num,tx_file in enumerate(tx_files,1):
 	if len(tx_files) > 1:
-		msg('\nTransaction #%s of %s:' % (tx_num,len(tx_files)))
+		if not (opt.batch and opt.yes):
+			msg('\nTransaction #%s of %s:' % (tx_num,len(tx_files)))
 		tx_num_str = ' #%s' % tx_num
 	tx = MMGenTX(tx_file)
 
@@ -110,9 +114,24 @@ for tx_num,tx_file in enumerate(tx_files,1):
 	if not opt.yes:
 		tx.view_with_prompt('View data for transaction%s?' % tx_num_str)
 
+	if opt.batch:
+		txs.append(tx); continue
+
 	txsign(opt,c,tx,seed_files,kl,kal,tx_num_str)
 
 	if not opt.yes:
 		tx.add_comment()   # edits an existing comment
 
 	tx.write_to_file(ask_write=not opt.yes,ask_write_default_yes=True,add_desc=tx_num_str)
+
+if txs:
+	msg('')
+	signed = txsign_batch(opt,c,txs,seed_files,kl,kal)
+	for tx_num,tx in enumerate(txs,1):
+		if tx not in signed: continue
+		tx_num_str = ' #%s' % tx_num
+		if not opt.yes:
+			tx.add_comment()
+		tx.write_to_file(ask_write=not opt.yes,ask_write_default_yes=True,add_desc=tx_num_str)
+	if len(signed) != len(txs):
+		sys.exit(3)
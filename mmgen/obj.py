@@ -35,6 +35,8 @@ def is_wif(s):           return WifKey(s,on_fail='silent')
 
 class MMGenObject(object):
 
+	__slots__ = () # allow subclasses without an instance dict
+
 	# Pretty-print any object subclassed from MMGenObject, recursing into sub-objects - WIP
 	def pmsg(self): print(self.pformat())
 	def pdie(self): print(self.pformat()); sys.exit(0)
@@ -83,7 +85,7 @@ class MMGenObject(object):
 
 #		print repr(self.__dict__.keys())
 
-		for k in self.__dict__:
+		for k in (self.attrs() if isinstance(self,MMGenListItem) else self.__dict__):
 			if k in ('_OrderedDict__root','_OrderedDict__map'): continue # exclude these because of recursion
 			e = getattr(self,k)
 			if isList(e) or isDict(e):
@@ -172,6 +174,24 @@ class MMGenImmutableAttr(object): # Descriptor
 		assert type(dtype) in (str,type)
 		self.name = name
 		self.dtype = dtype
+		self.conv = None # set by compile(), on first use if the type is given by name
+
+	def compile(self):
+		"Create the function that converts, or checks the type of, a value to be assigned"
+		dtype = globals()[self.dtype] if type(self.dtype) == str else self.dtype
+		if not self.typeconv:
+			def conv(instance,value):
+				if type(value) != dtype:
+					m = "Attribute '{}' of {} instance must of type {}"
+					raise TypeError(m.format(self.name,type(instance),self.dtype))
+				return value
+		elif type(self.dtype) == str: # an MMGen data type: values of the type have been checked
+			def conv(instance,value):
+				return value if type(value) is dtype else dtype(value,on_fail='raise')
+		else:
+			def conv(instance,value):
+				return value if type(value) is dtype else dtype(value)
+		self.conv = conv
 
 	def __get__(self,instance,owner):
 		return instance.__dict__[self.name]
@@ -180,30 +200,32 @@ class MMGenImmutableAttr(object): # Descriptor
 	def set_attr_ok(self,instance):
 		return not hasattr(instance,self.name)
 
-	def __set__(self,instance,value):
+	# return 'value' converted for assignment, raising an exception if assignment isn't allowed
+	def checked(self,instance,value):
 		if not self.set_attr_ok(instance):
 			m = "Attribute '{}' of {} instance cannot be reassigned"
 			raise AttributeError(m.format(self.name,type(instance)))
-		if self.typeconv:   # convert type
-			instance.__dict__[self.name] = \
-				globals()[self.dtype](value,on_fail='raise') if type(self.dtype) == str else self.dtype(value)
-		else:               # check type
-			if type(value) != self.dtype:
-				m = "Attribute '{}' of {} instance must of type {}"
-				raise TypeError(m.format(self.name,type(instance),self.dtype))
-			instance.__dict__[self.name] = value
+		if not self.conv: self.compile()
+		return self.conv(instance,value)
 
-	def __delete__(self,instance):
+	def __set__(self,instance,value):
+		instance.__dict__[self.name] = self.checked(instance,value)
+
+	# forbid all deletion
+	def check_delete(self,instance):
 		m = "Atribute '{}' of {} instance cannot be deleted"
 		raise AttributeError(m.format(self.name,type(instance)))
 
+	def __delete__(self,instance):
+		self.check_delete(instance)
+
 # For attrs that might not be present in the data instance
 # Reassignment or deletion allowed if specified
 class MMGenListItemAttr(MMGenImmutableAttr): # Descriptor
 
 	def __init__(self,name,dtype,typeconv=True,reassign_ok=False,delete_ok=False):
 		self.reassign_ok = reassign_ok
-		self.delete_ok = delete_ok
+		self.deletable = delete_ok
 		MMGenImmutableAttr.__init__(self,name,dtype,typeconv=typeconv)
 
 	# return None if attribute doesn't exist
@@ -214,28 +236,86 @@ class MMGenListItemAttr(MMGenImmutableAttr): # Descriptor
 	def set_attr_ok(self,instance):
 		return getattr(instance,self.name) == None or self.reassign_ok
 
+	def check_delete(self,instance):
+		if not self.deletable:
+			MMGenImmutableAttr.check_delete(self,instance)
+
 	def __delete__(self,instance):
-		if self.delete_ok:
-			if self.name in instance.__dict__:
-				del instance.__dict__[self.name]
-		else:
-			MMGenImmutableAttr.__delete__(self,instance)
+		self.check_delete(instance)
+		if self.name in instance.__dict__:
+			del instance.__dict__[self.name]
+
+# Store the attributes of MMGenListItem subclasses in slots, which take much less memory
+# than an instance dict.  The class's attribute descriptors are moved to '_attrs', where
+# MMGenListItem uses them to check assignments.
+class MMGenListItemMeta(type):
+
+	def __new__(mcs,name,bases,namespace):
+		attrs = {}
+		for b in bases: attrs.update(getattr(b,'_attrs',{}))
+		new = sorted(k for k,v in namespace.items() if isinstance(v,MMGenImmutableAttr))
+		namespace['__slots__'] = tuple(k for k in new if k not in attrs) # inherited ones have slots
+		for k in new:
+			assert namespace[k].name == k,"attribute '{}' has descriptor for '{}'".format(k,namespace[k].name)
+			attrs[k] = namespace.pop(k)
+			attrs[k].compile()
+		namespace['_attrs'] = attrs
+		return type.__new__(mcs,name,bases,namespace)
 
 class MMGenListItem(MMGenObject):
 
+	__metaclass__ = MMGenListItemMeta
+
 	def __init__(self,*args,**kwargs):
 		if args:
 			raise ValueError, 'Non-keyword args not allowed'
-		for k in kwargs:
-			if kwargs[k] != None:
-				setattr(self,k,kwargs[k])
+		attrs = self._attrs
+		for k,v in kwargs.items():
+			if v is not None:
+				if k in attrs: # a new instance: no need to check for reassignment
+					object.__setattr__(self,k,attrs[k].conv(self,v))
+				else:
+					setattr(self,k,v) # raises AttributeError
+
+	@classmethod
+	def trusted(cls,**kwargs):
+		"""
+		Fast path for data that needs no checking: create an instance from values that
+		are already of their attributes' types, without converting or checking them
+		"""
+		me = cls.__new__(cls)
+		for k,v in kwargs.items():
+			if v is not None:
+				object.__setattr__(me,k,v) # fails for non-attributes
+		return me
 
 	# prevent setting random attributes
 	def __setattr__(self,name,value):
-		if name not in type(self).__dict__:
+		if name not in self._attrs:
 			m = "'{}': no such attribute in class {}"
 			raise AttributeError(m.format(name,type(self)))
-		return object.__setattr__(self,name,value)
+		object.__setattr__(self,name,self._attrs[name].checked(self,value))
+
+	# called only for attributes that aren't set: return None if they may be absent
+	def __getattr__(self,name):
+		if isinstance(self._attrs.get(name),MMGenListItemAttr): return None
+		raise AttributeError("'{}' attribute of {} instance is not set".format(name,type(self)))
+
+	def __delattr__(self,name):
+		if name not in self._attrs:
+			raise AttributeError("'{}': no such attribute in class {}".format(name,type(self)))
+		self._attrs[name].check_delete(self)
+		if self.is_set(name):
+			object.__delattr__(self,name)
+
+	def is_set(self,name):
+		try: object.__getattribute__(self,name)
+		except AttributeError: return False
+		return True
+
+	def attrs(self):
+		"Return the attributes that are set, as a dict"
+		return dict((k,getattr(self,k)) for k in self._attrs if self.is_set(k))
 
 class AddrIdx(int,InitErrors):
 	max_digits = 7
@@ -61,6 +61,7 @@ common_opts_data = """
 --, --testnet=0|1         Disable or enable testnet
 --, --skip-cfg-file       Skip reading the configuration file
 --, --version             Print version information and exit
+--, --profile-startup     Print the time taken to import each module on exit
 --, --bob                 Switch to user "Bob" in MMGen regtest setup
 --, --alice               Switch to user "Alice" in MMGen regtest setup
 """.format(
@@ -156,6 +157,8 @@ def override_from_cfg_file(cfg_data):
 		name,val = m.groups()
 		if name in g.cfg_file_opts:
 			setattr(g,name,set_for_type(val,getattr(g,name),name,src=g.cfg_file))
+			if name in ('rpc_batch_size','rpc_pool_size') and getattr(g,name) < 1:
+				die(2,"'{}': invalid value for '{}' in '{}' (must be at least 1)".format(val,name,g.cfg_file))
 		else:
 			die(2,"'{}': unrecognized option in '{}'".format(name,g.cfg_file))
 
@@ -409,6 +412,9 @@ def check_opts(usr_opts):       # Returns false if any check fails
 		elif key == 'tx_confs':
 			if not opt_is_int(val,desc): return False
 			if not opt_compares(val,'>=',1,desc): return False
+		elif key == 'jobs':
+			if not opt_is_int(val,desc): return False
+			if not opt_compares(val,'>=',1,desc): return False
 		elif key == 'key_generator':
 			if not opt_compares(val,'<=',len(g.key_generators),desc): return False
 			if not opt_compares(val,'>',0,desc): return False
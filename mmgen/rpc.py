@@ -20,12 +20,144 @@
 rpc.py:  Bitcoin RPC library for the MMGen suite
 """
 
-import httplib,base64,json
+import httplib,base64,json,socket,select,threading,time,re,sys,Queue
 
 from mmgen.common import *
 from decimal import Decimal
 from mmgen.obj import BTCAmt
 
+class MyJSONEncoder(json.JSONEncoder):
+	def default(self, obj):
+		if isinstance(obj, BTCAmt):
+			return (float,str)[g.bitcoind_version>=120000](obj)
+		return json.JSONEncoder.default(self, obj)
+
+class RPCConnectionPool(object):
+	"""
+	HTTP/1.1 keep-alive connections to one bitcoind host:port.  Idle connections
+	are kept for reuse, up to g.rpc_pool_size of them, so concurrent callers can
+	each have their own.  With g.rpc_keepalive off, connections are closed after
+	each request.
+	"""
+	pools = {}
+
+	def __new__(cls,host,port):
+		k = (host,port)
+		if k not in cls.pools:
+			me = object.__new__(cls)
+			me.host,me.port = host,port
+			me.idle = []
+			me.lock = threading.Lock()
+			me.conns_opened = 0
+			me.requests_served = 0
+			cls.pools[k] = me
+		return cls.pools[k]
+
+	def get(self,timeout):
+		with self.lock:
+			hc = self.idle.pop() if self.idle else None
+		if hc and hc.sock and self.is_stale(hc.sock):
+			hc.close() # reconnects on next request
+		if hc:
+			hc.timeout = timeout
+			if hc.sock: hc.sock.settimeout(timeout)
+			return hc
+		return httplib.HTTPConnection(self.host,self.port,False,timeout)
+
+	# An idle connection's socket is readable only if the server has closed it
+	# (or sent unexpected data), so it must not be reused
+	@staticmethod
+	def is_stale(sock):
+		try: return bool(select.select([sock],[],[],0)[0])
+		except: return True
+
+	def put(self,hc):
+		with self.lock:
+			self.requests_served += 1
+			if g.rpc_keepalive and hc.sock and len(self.idle) < g.rpc_pool_size:
+				self.idle.append(hc)
+				return
+		hc.close()
+
+	def send(self,hc,data,hdrs):
+		if not hc.sock: # HTTPConnection connects on first request
+			with self.lock: self.conns_opened += 1
+		hc.request('POST','/',data,hdrs)
+
+	def close(self):
+		with self.lock:
+			for hc in self.idle: hc.close()
+			self.idle = []
+
+class JSONReplyStream(object):
+	"""
+	Incrementally decode a JSON-RPC reply whose result is an array or object,
+	yielding the array elements or the object's (key,value) pairs one at a time.
+	Only as much of the reply as is needed for the current element is held in
+	memory.  If the reply doesn't begin with an array or object result, 'kind'
+	is None and the data read so far is left in 'buf'.
+	"""
+	ws = re.compile(r'[ \t\n\r]*')
+	chunksize = 65536
+
+	def __init__(self,r):
+		self.r,self.buf,self.pos,self.eof = r,'',0,False
+		self.dec = json.JSONDecoder(parse_float=Decimal)
+		self.error = None
+		while len(self.buf) < 32 and self._fill(): pass
+		m = re.match(r'\s*\{\s*"result"\s*:\s*([\[{])',self.buf)
+		self.kind = m.group(1) if m else None
+		if m: self.pos = m.end()
+
+	def _fill(self):
+		if self.pos > self.chunksize:
+			self.buf,self.pos = self.buf[self.pos:],0
+		d = self.r.read(self.chunksize)
+		self.buf += d
+		self.eof = not d
+		return not self.eof
+
+	def _peek(self): # skip whitespace, return next char
+		while True:
+			self.pos = self.ws.match(self.buf,self.pos).end()
+			if self.pos < len(self.buf): return self.buf[self.pos]
+			if not self._fill(): raise ValueError('Unexpected end of JSON reply')
+
+	def _expect(self,c):
+		if self._peek() != c:
+			raise ValueError("Expected '{}' at char {} of JSON reply".format(c,self.pos))
+		self.pos += 1
+		self._peek()
+
+	def _value(self):
+		while True:
+			try:
+				v,end = self.dec.raw_decode(self.buf,self.pos)
+				# a number followed by anything but a delimiter may be incomplete
+				if self.eof or (end < len(self.buf) and self.buf[end] in ' \t\n\r,]}:'):
+					self.pos = end
+					return v
+			except ValueError:
+				if self.eof: raise
+			self._fill()
+
+	def __iter__(self):
+		assert self.kind,'JSON reply has no array or object result'
+		end = (']','}')[self.kind == '{']
+		if self._peek() != end:
+			while True:
+				if self.kind == '{':
+					k = self._value()
+					self._expect(':')
+					yield k,self._value()
+				else:
+					yield self._value()
+				if self._peek() == end: break
+				self._expect(',')
+		self.pos += 1
+		tail = self.buf[self.pos:] + self.r.read()
+		self.error = json.loads('{' + tail.strip()[1:])['error'] if tail.strip() != '}' else None
+
 class BitcoinRPCConnection(object):
 
 	def __init__(self,host=None,port=None,user=None,passwd=None,auth_cookie=None):
@@ -50,21 +182,28 @@ class BitcoinRPCConnection(object):
 
 		self.host = host
 		self.port = port
+		self.pool = RPCConnectionPool(host,port)
+		self.http_hdrs = {
+			'Host': host,
+			'Authorization': 'Basic {}'.format(base64.b64encode(self.auth_str))
+		}
 
 	# Normal mode: call with arg list unrolled, exactly as with 'bitcoin-cli'
-	# Batch mode:  call with list of arg lists as first argument
+	# Batch mode:  call with list of arg lists as first argument.  Batches larger
+	#              than g.rpc_batch_size are split into chunks (see chunked_request())
 	# kwargs are for local use and are not passed to server
 
 	# By default, dies with an error msg on all errors and exceptions
 	# With on_fail='return', returns 'rpcfail',(resp_object,(die_args))
 	def request(self,cmd,*args,**kwargs):
 
-		cf = { 'timeout':g.http_timeout, 'batch':False, 'on_fail':'die' }
+		cf = { 'timeout':g.http_timeout, 'batch':False, 'on_fail':'die', 'stream':False }
 
 		for k in cf:
 			if k in kwargs and kwargs[k]: cf[k] = kwargs[k]
 
-		hc = httplib.HTTPConnection(self.host, self.port, False, cf['timeout'])
+		if cf['batch'] and len(args[0]) > g.rpc_batch_size:
+			return self.chunked_request(cmd,args[0],cf)
 
 		if cf['batch']:
 			p = [{'method':cmd,'params':r,'id':n} for n,r in enumerate(args[0],1)]
@@ -79,50 +218,61 @@ class BitcoinRPCConnection(object):
 
 		dmsg('=== request() debug ===')
 		dmsg('    RPC POST data ==> %s\n' % p)
-		caller = self
-		class MyJSONEncoder(json.JSONEncoder):
-			def default(self, obj):
-				if isinstance(obj, BTCAmt):
-					return (float,str)[g.bitcoind_version>=120000](obj)
-				return json.JSONEncoder.default(self, obj)
 
 		# TODO: UTF-8 labels
 		# if type(p) != list and p['method'] == 'importaddress':
 		# 	dump = json.dumps(p,cls=MyJSONEncoder,ensure_ascii=False)
 		# 	print(dump)
 
-		dmsg('    RPC AUTHORIZATION data ==> [Basic {}]\n'.format(base64.b64encode(self.auth_str)))
-		try:
-			hc.request('POST', '/', json.dumps(p,cls=MyJSONEncoder), {
-				'Host': self.host,
-				'Authorization': 'Basic {}'.format(base64.b64encode(self.auth_str))
-			})
-		except Exception as e:
-			m = '{}\nUnable to connect to bitcoind at {}:{}'
-			return die_maybe(None,2,m.format(e,self.host,self.port))
+		dmsg('    RPC AUTHORIZATION data ==> [{}]\n'.format(self.http_hdrs['Authorization']))
+		data = json.dumps(p,cls=MyJSONEncoder)
+		hc = self.pool.get(cf['timeout'])
+
+		# A pooled connection may have been closed by the server while idle.  If
+		# sending fails on one, reconnect and resend.  Once the request has been
+		# sent, the server may have executed it, so it's never resent.
+		while True:
+			reused = hc.sock is not None
+			try:
+				self.pool.send(hc,data,self.http_hdrs)
+			except Exception as e:
+				hc.close()
+				if reused and not isinstance(e,socket.timeout): continue
+				m = '{}\nUnable to connect to bitcoind at {}:{}'
+				return die_maybe(None,2,m.format(e,self.host,self.port))
+			break
 
 		try:
 			r = hc.getresponse() # returns HTTPResponse instance
-		except Exception:
+		except Exception as e:
+			hc.close()
 			m = 'Unable to connect to bitcoind at {}:{} (but port is bound?)'
 			return die_maybe(None,2,m.format(self.host,self.port))
 
 		dmsg('    RPC GETRESPONSE data ==> %s\n' % r.__dict__)
 
+		s = JSONReplyStream(r) if cf['stream'] and not cf['batch'] and r.status == 200 else None
+		if s and s.kind:
+			return self.stream_result(hc,r,s)
+
+		r2 = (s.buf if s else '') + r.read()
+		if r.will_close: hc.close()
+		self.pool.put(hc)
+
+		dmsg('    RPC connections opened: {}, requests served: {}\n'.format(
+			self.pool.conns_opened,self.pool.requests_served))
+
 		if r.status != 200:
 			if cf['on_fail'] != 'silent':
 				msg_r(yellow('Bitcoind RPC Error: '))
 				msg(red('{} {}'.format(r.status,r.reason)))
-			e1 = r.read()
 			try:
-				e3 = json.loads(e1)['error']
+				e3 = json.loads(r2)['error']
 				e2 = '{} (code {})'.format(e3['message'],e3['code'])
 			except:
-				e2 = str(e1)
+				e2 = str(r2) or '{} {}'.format(r.status,r.reason)
 			return die_maybe(r,1,e2)
 
-		r2 = r.read()
-
 		dmsg('    RPC REPLY data ==> %s\n' % r2)
 
 		if not r2:
@@ -140,8 +290,73 @@ class BitcoinRPCConnection(object):
 			else:
 				ret.append(resp['result'])
 
+		if cf['stream'] and not cf['batch'] and type(ret[0]) in (list,dict):
+			return ret[0].iteritems() if type(ret[0]) == dict else iter(ret[0])
+
 		return ret if cf['batch'] else ret[0]
 
+	# With stream=True, the result is returned as an iterator over its elements.
+	# The connection is returned to the pool once the reply has been consumed.
+	def stream_result(self,hc,r,s):
+		done = False
+		try:
+			for e in s: yield e
+			done = True
+		finally:
+			if not done or r.will_close: hc.close()
+			self.pool.put(hc)
+		if s.error != None:
+			die(1,yellow('Bitcoind returned an error: %s' % s.error))
+
+	batch_retries = 3 # per chunk, on connection failure or HTTP 503 (work queue full)
+	# calls that mustn't be repeated if they may already have been executed
+	no_resend_cmds = ('sendrawtransaction','importaddress','importprivkey')
+
+	# Each chunk is sent as a separate batch request, with up to g.rpc_pool_size
+	# chunks in flight at once, each over its own pooled connection.  Results are
+	# returned in the order of 'arg_list'.  A failed chunk stops any further
+	# chunks from being sent.
+	def chunked_request(self,cmd,arg_list,cf):
+
+		n = g.rpc_batch_size
+		chunks = [arg_list[i:i+n] for i in range(0,len(arg_list),n)]
+
+		# On connection failure, the chunk may have been received and executed
+		def is_transient(ret):
+			if ret[1][0] is None: return cmd not in self.no_resend_cmds
+			return ret[1][0].status == 503
+
+		def do_chunk(i):
+			for retry in range(self.batch_retries+1):
+				if retry:
+					dmsg('    RPC batch chunk {}: {} (retry {})'.format(i,rpc_errmsg(ret),retry))
+					time.sleep(0.5 * retry)
+				ret = self.request(cmd,chunks[i],batch=True,timeout=cf['timeout'],on_fail='silent')
+				if not (rpc_error(ret) and is_transient(ret)): break
+			return ret
+
+		dmsg('    RPC batch: {} requests in {} chunks'.format(len(arg_list),len(chunks)))
+		rets = run_concurrently([lambda i=i: do_chunk(i) for i in range(len(chunks))],stop=rpc_error)
+
+		for ret in rets:
+			if rpc_error(ret):
+				if cf['on_fail'] in ('return','silent'): return ret
+				die(ret[1][1],yellow(ret[1][2]))
+
+		return [e for ret in rets for e in ret]
+
+	# Send independent requests concurrently, returning their results in order.
+	# Each call is a tuple (cmd,arg1,arg2,...), optionally followed by a dict of
+	# kwargs for that call; kwargs passed to gather() apply to all calls.
+	def gather(self,*calls,**kwargs):
+		def mk_job(call):
+			kw = kwargs.copy()
+			if type(call[-1]) == dict:
+				kw.update(call[-1])
+				call = call[:-1]
+			return lambda: self.request(call[0],*call[1:],**kw)
+		return run_concurrently([mk_job(c) for c in calls])
+
 	rpcmethods = (
 		'backupwallet',
 		'createrawtransaction',
@@ -163,6 +378,7 @@ class BitcoinRPCConnection(object):
 		'gettransaction',
 		'importaddress',
 		'listaccounts',
+		'listsinceblock',
 		'listunspent',
 		'sendrawtransaction',
 		'signrawtransaction',
@@ -173,6 +389,45 @@ class BitcoinRPCConnection(object):
 	for name in rpcmethods:
 		exec "def {n}(self,*a,**k):return self.request('{n}',*a,**k)\n".format(n=name)
 
+def run_concurrently(jobs,max_jobs=None,stop=None):
+	"""
+	Run the callables in 'jobs' in up to 'max_jobs' (default: g.rpc_pool_size)
+	threads, returning their results in order.  An exception raised by a job
+	(including SystemExit from die()) is re-raised in the calling thread.  Once a
+	job returns a result for which stop() is true, no new jobs are started.
+	"""
+	q = Queue.Queue()
+	for i in range(len(jobs)): q.put(i)
+	rets,exc = [None] * len(jobs),[]
+
+	def worker():
+		while not exc:
+			try: i = q.get_nowait()
+			except Queue.Empty: return
+			try:
+				rets[i] = jobs[i]()
+			except BaseException:
+				exc.append(sys.exc_info())
+				return
+			if stop and stop(rets[i]):
+				with q.mutex: q.queue.clear()
+				return
+
+	if len(jobs) == 1:
+		worker()
+	else:
+		threads = [threading.Thread(target=worker) for i in range(max(1,min(max_jobs or g.rpc_pool_size,len(jobs))))]
+		for t in threads:
+			t.daemon = True
+			t.start()
+		for t in threads:
+			while t.is_alive(): t.join(1) # a bare join() can't be interrupted
+
+	if exc:
+		raise exc[0][0],exc[0][1],exc[0][2]
+
+	return rets
+
 def rpc_error(ret):
 	return type(ret) is tuple and ret and ret[0] == 'rpcfail'
 
@@ -447,8 +447,9 @@ class Mnemonic (SeedSourceUnenc):
 					(len(mn),', '.join([str(i) for i in self.mn_lens])))
 			return False
 
+		rev = baseconv.get_rev_digits(self.wl_id)
 		for n,w in enumerate(mn,1):
-			if w not in baseconv.digits[self.wl_id]:
+			if w not in rev:
 				msg('Invalid mnemonic: word #%s is not in the wordlist' % n)
 				return False
 
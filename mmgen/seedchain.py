@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+#
+# mmgen = Multi-Mode GENerator, command-line Bitcoin cold storage solution
+# Copyright (C)2013-2017 Philemon <mmgen-py@yandex.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+seedchain.py:  On-disk checkpoints of the sha512 seed chain
+"""
+
+# The secret key for address index N is derived from the Nth round of a sha512
+# hash chain over the (cooked) seed, so generating a key with a high index
+# normally means hashing the seed N times.  With checkpointing enabled, the
+# chain state is recorded every 'seed_chain_checkpoints' rounds, and later
+# walks of the same chain start from the nearest recorded state.
+#
+# A checkpoint file holds the states of one chain, i.e. one seed and address
+# type (or password format), in order from the first checkpoint.  The states
+# are secret data, so the file is encrypted (AES-256-CTR) and authenticated
+# (HMAC-SHA256) with keys derived from the cooked seed.  Only a holder of the
+# seed can read or forge a checkpoint file; a file that fails authentication
+# is ignored.
+
+import os,hmac
+from hashlib import sha256,sha512
+from binascii import hexlify
+from mmgen.common import *
+from mmgen.obj import MMGenObject
+
+class SeedChainCheckpoints(MMGenObject):
+
+	magic = 'MMGenSCC'
+	version = 1
+	mac_len = 32
+
+	def __init__(self,sid,cooked_seed,interval):
+		self.interval = interval
+		self.enc_key = hmac.new(cooked_seed,'seed chain checkpoints: encryption',sha256).digest()
+		self.mac_key = hmac.new(cooked_seed,'seed chain checkpoints: authentication',sha256).digest()
+		chain_id = hmac.new(cooked_seed,'seed chain checkpoints: ID',sha256).hexdigest()[:8].upper()
+		self.fn = os.path.join(g.data_dir,'seedchain-{}-{}.ckpt'.format(sid,chain_id))
+		self.states = self.load() # self.states[n] is the state after round (n+1)*interval
+		self.num_loaded = len(self.states)
+
+	def hdr(self):
+		return self.magic + chr(self.version) + '{:08x}'.format(self.interval)
+
+	def load(self):
+		try:
+			d = open(self.fn,'rb').read()
+		except:
+			return []
+		h,ml = self.hdr(),self.mac_len
+		iv,ct = d[len(h):len(h)+g.aesctr_iv_len],d[len(h)+g.aesctr_iv_len:-ml]
+		if d[:len(h)] != h:
+			err = 'bad header or checkpoint interval'
+		elif len(d) < len(h) + g.aesctr_iv_len + ml or \
+				not hmac.compare_digest(hmac.new(self.mac_key,d[:-ml],sha256).digest(),d[-ml:]):
+			err = 'authentication failed'
+		elif len(ct) % 64:
+			err = 'bad data length'
+		else:
+			err = None
+		if err:
+			vmsg("Ignoring seed chain checkpoint file '{}' ({})".format(self.fn,err))
+			return []
+		from mmgen.crypto import decrypt_data
+		pt = decrypt_data(ct,self.enc_key,int(hexlify(iv),16),'seed chain checkpoints')
+		vmsg('done')
+		return [pt[i:i+64] for i in range(0,len(pt),64)]
+
+	def save(self):
+		if len(self.states) == self.num_loaded: return
+		from mmgen.crypto import encrypt_data
+		iv = os.urandom(g.aesctr_iv_len)
+		ct = encrypt_data(''.join(self.states),self.enc_key,int(hexlify(iv),16),
+				'seed chain checkpoints',verify=False)
+		d = self.hdr() + iv + ct
+		d += hmac.new(self.mac_key,d,sha256).digest()
+		try:
+			tmp_fn = self.fn + '.tmp'
+			f = os.fdopen(os.open(tmp_fn,os.O_WRONLY|os.O_CREAT|os.O_TRUNC,0600),'wb')
+			f.write(d)
+			f.close()
+			os.rename(tmp_fn,self.fn)
+		except Exception as e:
+			vmsg("Unable to write seed chain checkpoint file '{}': {}".format(self.fn,e))
+			return
+		vmsg('Saved {} seed chain checkpoint{}'.format(len(self.states),suf(self.states,'s')))
+		self.num_loaded = len(self.states)
+
+	def walk(self,seed,addrnums):
+		"""
+		Walk the sha512 chain over 'seed', yielding (num,state) for each index in
+		'addrnums', starting from the nearest checkpoint and recording new ones
+		"""
+		k,states = self.interval,self.states
+		num = 0
+		for target in addrnums:
+			n = min((target-1) / k,len(states)) # checkpoints usable for this target
+			if n * k > num:
+				num,seed = n * k,states[n-1]
+			while num != target:
+				seed = sha512(seed).digest()
+				num += 1
+				if num % k == 0 and num / k == len(states) + 1:
+					states.append(seed)
+			yield num,seed
+		self.save()
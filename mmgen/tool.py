@@ -23,11 +23,12 @@ tool.py:  Routines and data for the 'mmgen-tool' utility
 
 import binascii as ba
 
-import mmgen.bitcoin as mmb
 from mmgen.common import *
-from mmgen.crypto import *
-from mmgen.tx import *
-from mmgen.addr import *
+from mmgen.obj import *
+
+# Most commands need only a few modules, so the heavier ones are imported on first use
+mmb = LazyModule('mmgen.bitcoin')
+crypto = LazyModule('mmgen.crypto')
 
 pnm = g.proj_name
 
@@ -183,15 +184,16 @@ Miscellaneous
 
 def usage(command):
 
-	for v in cmd_data.values():
+	def fmt_args(v):
+		v = [i for i in v if i != 'MARGS']
 		if v and v[0][-2:] == '-]':
 			v[0] = v[0][:-2] + ' or STDIN]'
-		if 'MARGS' in v: v.remove('MARGS')
+		return ' '.join(v)
 
 	if not command:
 		Msg('Usage information for mmgen-tool commands:')
 		for k,v in cmd_data.items():
-			Msg('  {:18} {}'.format(k.lower(),' '.join(v)))
+			Msg('  {:18} {}'.format(k.lower(),fmt_args(v)))
 		Msg('\n  '+'\n  '.join(stdin_msg.split('\n')))
 		sys.exit(0)
 
@@ -202,8 +204,7 @@ def usage(command):
 			if re.match(r'\s+{}\s+'.format(command),line):
 				c,h = line.split('-',1)
 				Msg('MMGEN-TOOL {}: {}'.format(c.strip().upper(),h.strip()))
-		cd = cmd_data[Command]
-		msg('USAGE: %s %s %s' % (g.prog_name, command, ' '.join(cd)))
+		msg('USAGE: %s %s %s' % (g.prog_name, command, fmt_args(cmd_data[Command])))
 	else:
 		msg("'%s': no such tool command" % command)
 	sys.exit(1)
@@ -211,18 +212,16 @@ def usage(command):
 Help = usage
 
 def process_args(command,cmd_args):
-	if 'MARGS' in cmd_data[command]:
-		cmd_data[command].remove('MARGS')
-		margs = True
-	else:
-		margs = False
+	# cmd_data is left unchanged, as batch mode calls this repeatedly
+	margs = 'MARGS' in cmd_data[command]
+	cd = [i for i in cmd_data[command] if i != 'MARGS']
 
 	c_args = [[i.split(' [')[0],i.split(' [')[1][:-1]]
-		for i in cmd_data[command] if '=' not in i]
+		for i in cd if '=' not in i]
 	c_kwargs = dict([[
 			i.split(' [')[0],
 			[i.split(' [')[1].split('=')[0], i.split(' [')[1].split('=')[1][:-1]]
-		] for i in cmd_data[command] if '=' in i])
+		] for i in cd if '=' in i])
 
 	if not margs:
 		u_args = [a for a in cmd_args[:len(c_args)]]
@@ -309,7 +308,13 @@ def print_convert_results(indata,enc,dec,dtype):
 	if error:
 		die(3,"Error! Recoded data doesn't match input!")
 
-kg = KeyGenerator()
+_kg = None
+def get_kg():
+	global _kg
+	if not _kg:
+		from mmgen.addr import KeyGenerator
+		_kg = KeyGenerator()
+	return _kg
 
 def Hexdump(infile, cols=8, line_nums=True):
 	Msg(pretty_hexdump(
@@ -324,22 +329,23 @@ def Unhexdump(infile):
 			get_data_from_file(infile,dash=True,silent=True)))
 
 def B58randenc():
-	r = get_random(32)
+	r = crypto.get_random(32)
 	enc = baseconv.b58encode(r,pad=True)
 	dec = baseconv.b58decode(enc,pad=True)
 	print_convert_results(r,enc,dec,'str')
 
 def Randhex(nbytes='32'):
-	Msg(ba.hexlify(get_random(int(nbytes))))
+	Msg(ba.hexlify(crypto.get_random(int(nbytes))))
 
 def Randwif(compressed=False):
-	Msg(PrivKey(get_random(32),compressed).wif)
+	Msg(PrivKey(crypto.get_random(32),compressed).wif)
 
 def Randpair(compressed=False,segwit=False):
 	if segwit: compressed = True
+	from mmgen.addr import AddrGenerator
 	ag = AddrGenerator(('p2pkh','segwit')[bool(segwit)])
-	privhex = PrivKey(get_random(32),compressed)
-	addr = ag.to_addr(kg.to_pubhex(privhex))
+	privhex = PrivKey(crypto.get_random(32),compressed)
+	addr = ag.to_addr(get_kg().to_pubhex(privhex))
 	Vmsg('Key (hex):  %s' % privhex)
 	Vmsg_r('Key (WIF):  '); Msg(privhex.wif)
 	Vmsg_r('Addr:       '); Msg(addr)
@@ -348,16 +354,18 @@ def Wif2addr(wif,segwit=False):
 	privhex = PrivKey(wif=wif)
 	if segwit and not privhex.compressed:
 		die(2,'Segwit addresses must use compressed public keys')
+	from mmgen.addr import AddrGenerator
 	ag = AddrGenerator(('p2pkh','segwit')[bool(segwit)])
-	addr = ag.to_addr(kg.to_pubhex(privhex))
+	addr = ag.to_addr(get_kg().to_pubhex(privhex))
 	Vmsg_r('Addr: '); Msg(addr)
 
 def Wif2segwit_pair(wif):
 	privhex = PrivKey(wif=wif)
 	if not privhex.compressed:
 		die(1,'Segwit address cannot be generated from uncompressed WIF')
+	from mmgen.addr import AddrGenerator
 	ag = AddrGenerator('segwit')
-	pubhex = kg.to_pubhex(privhex)
+	pubhex = get_kg().to_pubhex(privhex)
 	addr = ag.to_addr(pubhex)
 	rs = ag.to_segwit_redeem_script(pubhex)
 	Msg('{}\n{}'.format(rs,addr))
@@ -381,8 +389,9 @@ def Wif2redeem_script(wif): # new
 	privhex = PrivKey(wif=wif)
 	if not privhex.compressed:
 		die(1,'Segwit redeem script cannot be generated from uncompressed WIF')
+	from mmgen.addr import AddrGenerator
 	ag = AddrGenerator('segwit')
-	Msg(ag.to_segwit_redeem_script(kg.to_pubhex(privhex)))
+	Msg(ag.to_segwit_redeem_script(get_kg().to_pubhex(privhex)))
 
 def wif2hex(wif): # wrapper
 	ret = PrivKey(wif=wif)
@@ -392,7 +401,7 @@ wordlists = 'electrum','tirosh'
 dfl_wl_id = 'electrum'
 
 def do_random_mn(nbytes,wordlist):
-	hexrand = ba.hexlify(get_random(nbytes))
+	hexrand = ba.hexlify(crypto.get_random(nbytes))
 	Vmsg('Seed: %s' % hexrand)
 	for wl_id in ([wordlist],wordlists)[wordlist=='all']:
 		if wordlist == 'all':
@@ -414,7 +423,6 @@ def B58tostr(s):          Msg(ba.unhexlify(baseconv.tohex(s,'b58')))
 def B58tohex(s,pad=None): Msg(baseconv.tohex(s,'b58',pad))
 def B32tohex(s,pad=None): Msg(baseconv.tohex(s.upper(),'b32',pad))
 
-from mmgen.seed import Mnemonic
 def Mn_stats(wordlist=dfl_wl_id):
 	wordlist in baseconv.digits or die(1,"'{}': not a valid wordlist".format(wordlist))
 	baseconv.check_wordlist(wordlist)
@@ -439,43 +447,6 @@ def Listaddress(addr,minconf=1,pager=False,showempty=True,showbtcaddr=True):
 # List MMGen addresses and their balances.  TODO: move this code to AddrList
 def Listaddresses(addrs='',minconf=1,showempty=False,pager=False,showbtcaddrs=False):
 
-	c = bitcoin_connection()
-
-	def check_dup_mmid(accts):
-		help_msg = """
-    Your tracking wallet is corrupted or has been altered by a non-{pnm} program.
-
-    You might be able to salvage your wallet by determining which of the offending
-    addresses doesn't belong to {pnm} ID {mid} and then typing:
-
-        bitcoin-cli importaddress <offending address> "" false
-	"""
-		m_prev = None
-
-		for m in sorted(b.mmid for b in [a for a in accts if a]):
-			if m == m_prev:
-				msg('Duplicate MMGen ID ({}) discovered in tracking wallet!\n'.format(m))
-				bad_accts = MMGenList([l for l in accts if l.mmid == m])
-				msg('  Affected Bitcoin RPC accounts:\n    {}\n'.format('\n    '.join(bad_accts)))
-				bad_addrs = [a[0] for a in c.getaddressesbyaccount([[a] for a in bad_accts],batch=True)]
-				if len(set(bad_addrs)) != 1:
-					msg('  Offending addresses:\n    {}'.format('\n    '.join(bad_addrs)))
-					msg(help_msg.format(mid=m,pnm=pnm))
-				die(3,red('Exiting on error'))
-			m_prev = m
-
-	def check_addr_array_lens(acct_pairs):
-		err = False
-		for label,addrs in acct_pairs:
-			if not label: continue
-			if len(addrs) != 1:
-				err = True
-				if len(addrs) == 0:
-					msg("Label '{}': has no associated address!".format(label))
-				else:
-					msg("'{}': more than one {} address in account!".format(addrs,g.coin))
-		if err: rdie(3,'Tracking wallet is corrupted!')
-
 	usr_addr_list = []
 	if addrs:
 		a = addrs.rsplit(':',1)
@@ -484,97 +455,27 @@ def Listaddresses(addrs='',minconf=1,showempty=False,pager=False,showbtcaddrs=Fa
 			die(1,m.format(addrs))
 		usr_addr_list = [MMGenID('{}:{}'.format(a[0],i)) for i in AddrIdxList(a[1])]
 
-	class TwAddrList(dict,MMGenObject): pass
-
-	addrs = TwAddrList() # reusing name!
-	total = BTCAmt('0')
-
-	for d in c.listunspent(0):
-		if not 'account' in d: continue  # skip coinbase outputs with missing account
-		if d['confirmations'] < minconf: continue
-		label = TwLabel(d['account'],on_fail='silent')
-		if label:
-			if usr_addr_list and (label.mmid not in usr_addr_list): continue
-			if label.mmid in addrs:
-				if addrs[label.mmid]['addr'] != d['address']:
-					die(2,'duplicate {} address ({}) for this MMGen address! ({})'.format(
-							g.coin,d['address'],addrs[label.mmid]['addr']))
-			else:
-				addrs[label.mmid] = { 'amt':BTCAmt('0'), 'lbl':label, 'addr':BTCAddr(d['address']) }
-			addrs[label.mmid]['amt'] += d['amount']
-			total += d['amount']
-
-	# We use listaccounts only for empty addresses, as it shows false positive balances
-	if showempty:
-		# for compatibility with old mmids, must use raw RPC rather than native data for matching
-		# args: minconf,watchonly, MUST use keys() so we get list, not dict
-		acct_list = c.listaccounts(0,True).keys() # raw list, no 'L'
-		acct_labels = MMGenList([TwLabel(a,on_fail='silent') for a in acct_list])
-		check_dup_mmid(acct_labels)
-		acct_addrs = c.getaddressesbyaccount([[a] for a in acct_list],batch=True) # use raw list here
-		assert len(acct_list) == len(acct_addrs), 'listaccounts() and getaddressesbyaccount() not equal in length'
-		addr_pairs = zip(acct_labels,acct_addrs)
-		check_addr_array_lens(addr_pairs)
-		for label,addr_arr in addr_pairs:
-			if not label: continue
-			if usr_addr_list and (label.mmid not in usr_addr_list): continue
-			if label.mmid not in addrs:
-				addrs[label.mmid] = { 'amt':BTCAmt('0'), 'lbl':label, 'addr':'' }
-				if showbtcaddrs:
-					addrs[label.mmid]['addr'] = BTCAddr(addr_arr[0])
-
-	if not addrs:
+	from mmgen.tw import TwAddrList
+	al = TwAddrList(usr_addr_list,minconf,showempty,showbtcaddrs)
+
+	if not al:
 		die(0,('No tracked addresses with balances!','No tracked addresses!')[showempty])
 
-	out = ([],[green('Chain: {}'.format(g.chain.upper()))])[g.chain in ('testnet','regtest')]
-
-	fs = ('{mid} {cmt} {amt}','{mid} {addr} {cmt} {amt}')[showbtcaddrs]
-	mmaddrs = [k for k in addrs.keys() if k.type == 'mmgen']
-	max_mmid_len = max(len(k) for k in mmaddrs) + 2 if mmaddrs else 10
-	max_cmt_len =  max(max(len(addrs[k]['lbl'].comment) for k in addrs),7)
-	out += [fs.format(
-			mid=MMGenID.fmtc('MMGenID',width=max_mmid_len),
-			addr=BTCAddr.fmtc('ADDRESS'),
-			cmt=TwComment.fmtc('COMMENT',width=max_cmt_len),
-			amt='BALANCE'
-			)]
-
-	al_id_save = None
-	for mmid in sorted(addrs,key=lambda j: j.sort_key):
-		if mmid.type == 'mmgen':
-			if al_id_save and al_id_save != mmid.obj.al_id:
-				out.append('')
-			al_id_save = mmid.obj.al_id
-			mmid_disp = mmid
-		else:
-			if al_id_save:
-				out.append('')
-				al_id_save = None
-			mmid_disp = mmid.type
-		out.append(fs.format(
-			mid = MMGenID.fmtc(mmid_disp,width=max_mmid_len,color=True),
-			addr=(addrs[mmid]['addr'].fmt(color=True) if showbtcaddrs else None),
-			cmt=addrs[mmid]['lbl'].comment.fmt(width=max_cmt_len,color=True,nullrepl='-'),
-			amt=addrs[mmid]['amt'].fmt('3.0',color=True)))
-
-	out.append('\nTOTAL: {} {}'.format(total.hl(color=True),g.coin))
-	o = '\n'.join(out)
-	return do_pager(o) if pager else Msg(o)
+	if pager:
+		return do_pager('\n'.join(al.format(showbtcaddrs)))
+
+	# stream the listing, in chunks of lines
+	lines = []
+	for line in al.format(showbtcaddrs):
+		lines.append(line)
+		if len(lines) == 1000:
+			Msg('\n'.join(lines))
+			lines = []
+	if lines: Msg('\n'.join(lines))
 
 def Getbalance(minconf=1,quiet=False):
-	accts = {}
-	for d in bitcoin_connection().listunspent(0):
-		ma = split2(d['account'] if 'account' in d else '')[0] # include coinbase outputs if spendable
-		keys = ['TOTAL']
-		if d['spendable']: keys += ['SPENDABLE']
-		if is_mmgen_id(ma): keys += [ma.split(':')[0]]
-		confs = d['confirmations']
-		i = (1,2)[confs >= minconf]
-
-		for key in keys:
-			if key not in accts: accts[key] = [BTCAmt('0')] * 3
-			for j in ([],[0])[confs==0] + [i]:
-				accts[key][j] += d['amount']
+	from mmgen.twbal import TwBalance,from_sats
+	accts = dict((k,[from_sats(n) for n in v]) for k,v in TwBalance.get().get_balances(minconf).items())
 
 	if quiet:
 		Msg('{}'.format(accts['TOTAL'][2]))
@@ -591,6 +492,7 @@ def Getbalance(minconf=1,quiet=False):
 
 def Txview(*infiles,**kwargs):
 	from mmgen.filename import MMGenFileList
+	from mmgen.tx import MMGenTX
 	pager = 'pager' in kwargs and kwargs['pager']
 	terse = 'terse' in kwargs and kwargs['terse']
 	sort_key = kwargs['sort'] if 'sort' in kwargs else 'mtime'
@@ -643,7 +545,7 @@ def Hash256(s, file_input=False, hex_input=False):
 
 def Encrypt(infile,outfile='',hash_preset=''):
 	data = get_data_from_file(infile,'data for encryption',binary=True)
-	enc_d = mmgen_encrypt(data,'user data',hash_preset)
+	enc_d = crypto.mmgen_encrypt(data,'user data',hash_preset)
 	if not outfile:
 		outfile = '%s.%s' % (os.path.basename(infile),g.mmenc_ext)
 
@@ -652,7 +554,7 @@ def Encrypt(infile,outfile='',hash_preset=''):
 def Decrypt(infile,outfile='',hash_preset=''):
 	enc_d = get_data_from_file(infile,'encrypted data',binary=True)
 	while True:
-		dec_d = mmgen_decrypt(enc_d,'user data',hash_preset)
+		dec_d = crypto.mmgen_decrypt(enc_d,'user data',hash_preset)
 		if dec_d: break
 		msg('Trying again...')
 
@@ -702,7 +604,7 @@ def Rand2file(outfile, nbytes, threads=4, silent=False):
 	from Crypto.Cipher import AES
 	from Crypto.Util import Counter
 
-	key = get_random(32)
+	key = crypto.get_random(32)
 
 	def encrypt_worker(wid):
 		while True:
@@ -754,3 +656,122 @@ def Regtest_setup():
 	import subprocess as sp
 	sp.check_output()
 	pass
+
+# Batch mode and server: many commands per process
+
+batch_excluded_cmds = ('Encrypt','Decrypt','Keyaddrfile_chksum') # these may prompt the user
+
+def exec_cmd(command,cmd_args):
+	"Execute a tool command with its output captured.  Return success flag, stdout and stderr output"
+	from StringIO import StringIO
+	if 'mmgen.twbal' in sys.modules: # balances are cached per invocation
+		sys.modules['mmgen.twbal'].TwBalance.invalidate()
+	stdout,stderr = sys.stdout,sys.stderr
+	sys.stdout,sys.stderr = out,err = StringIO(),StringIO()
+	try:
+		Command = command.capitalize()
+		if Command not in cmd_data:
+			die(1,"'{}': no such command".format(command))
+		if Command in batch_excluded_cmds:
+			die(1,"'{}': command not available in batch mode".format(command))
+		if '-' in cmd_args:
+			die(1,'{}: reading from STDIN not available in batch mode'.format(command))
+		args,kwargs = process_args(Command,cmd_args)
+		ok = globals()[Command](*args,**kwargs) in (None,True)
+	except SystemExit as e:
+		ok = e.code in (None,0)
+	except Exception as e:
+		msg('{}: {}: {}'.format(command,type(e).__name__,e))
+		ok = False
+	finally:
+		sys.stdout,sys.stderr = stdout,stderr
+	return ok,out.getvalue(),err.getvalue()
+
+def is_json_request(line): return line.lstrip()[:1] == '{'
+
+def do_batch_request(line):
+	"""
+	Execute a batch request in plain or JSON format.  Return success flag, response and
+	stderr output.  For JSON requests, the response includes any error message.
+	"""
+	if is_json_request(line):
+		import json
+		ret = { 'id': None, 'result': None, 'error': None }
+		try:
+			d = json.loads(line)
+			ret['id'] = d.get('id')
+			args = [unicode(a) for a in d.get('args',[])]
+			args += [u'{}={}'.format(k,v) for k,v in sorted(d.get('kwargs',{}).items())]
+			ok,out,err = exec_cmd(d['cmd'],args)
+		except Exception as e:
+			ok,out,err = False,'','invalid request: {}'.format(e)
+		try:
+			if ok: ret['result'] = out.decode('utf8').rstrip('\n')
+		except UnicodeDecodeError:
+			ok,err = False,'command output is binary data'
+		if not ok:
+			ret['error'] = err.decode('utf8','replace').strip() or 'command failed'
+		return ok,json.dumps(ret) + '\n',(err if ok else '')
+	else:
+		import shlex
+		try:
+			a = [s.decode('utf8') for s in shlex.split(line,comments=True)]
+		except Exception as e:
+			return False,'','{}: {}\n'.format(line.strip(),e)
+		return exec_cmd(a[0],a[1:]) if a else (True,'','')
+
+def run_batch(infile=sys.stdin):
+	"Execute requests from 'infile', one per line.  Return the number of failed requests"
+	opt.usr_randchars = 0 # user entropy would be read from the request stream
+	errors = 0
+	for line in iter(infile.readline,''): # not 'for line in infile': it reads ahead
+		ok,out,err = do_batch_request(line)
+		sys.stdout.write(out) # output is already encoded
+		sys.stdout.flush()
+		sys.stderr.write(err)
+		errors += not ok
+	return errors
+
+def run_server(path):
+	"Execute requests from clients of Unix socket 'path', one request at a time"
+	if g.platform == 'win':
+		die(1,'Unix sockets are not available on this platform')
+	import SocketServer,signal,socket,errno
+	if os.path.exists(path):
+		if not stat.S_ISSOCK(os.stat(path).st_mode):
+			die(1,"'{}': file exists and is not a socket".format(path))
+		s = socket.socket(socket.AF_UNIX,socket.SOCK_STREAM)
+		try:
+			s.connect(path)
+		except socket.error as e:
+			if e.errno != errno.ECONNREFUSED:
+				die(1,"'{}': unable to check socket ({})".format(path,e))
+			os.unlink(path) # stale socket from an earlier run
+		else:
+			die(1,"'{}': socket is in use by another server".format(path))
+		finally:
+			s.close()
+
+	opt.usr_randchars = 0 # the server mustn't block prompting for user entropy
+
+	class BatchRequestHandler(SocketServer.StreamRequestHandler):
+		def handle(self):
+			for line in iter(self.rfile.readline,''):
+				ok,out,err = do_batch_request(line)
+				if is_json_request(line): sys.stderr.write(err)
+				else: out += err
+				self.wfile.write(out)
+				self.wfile.flush()
+
+	umask = os.umask(0177) # only the owner may connect
+	try: server = SocketServer.UnixStreamServer(path,BatchRequestHandler)
+	finally: os.umask(umask)
+	signal.signal(signal.SIGTERM,lambda signum,frame: sys.exit(0))
+	qmsg("Listening on socket '{}'".format(path))
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		pass
+	finally:
+		server.server_close()
+		os.unlink(path)
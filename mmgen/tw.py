@@ -34,6 +34,128 @@ def parse_tw_acct_label(s):
 		a2 = ret[1] if len(ret) == 2 else None
 	return a1,a2
 
+class TwLabelCache(dict):
+	"Parse each tracking wallet account name into a TwLabel only once (None if not an MMGen label)"
+	def __missing__(self,acct):
+		ret = self[acct] = TwLabel(acct,on_fail='silent')
+		return ret
+
+class TwAddrList(MMGenDict):
+	"""
+	Tracking wallet addresses and their balances, keyed by TwMMGenID.  Built in a
+	single pass over the outputs of a TwBalance, plus 'listaccounts' for empty
+	addresses, with amounts summed in satoshis and addresses left unconverted.
+	"""
+	dup_help = """
+    Your tracking wallet is corrupted or has been altered by a non-{pnm} program.
+
+    You might be able to salvage your wallet by determining which of the offending
+    addresses doesn't belong to {pnm} ID {mid} and then typing:
+
+        bitcoin-cli importaddress <offending address> "" false
+	"""
+
+	def __init__(self,usr_addr_list=None,minconf=1,showempty=False,showbtcaddrs=False,bal=None):
+		from mmgen.twbal import TwBalance
+		bal = bal or TwBalance.get()
+		c = bal.c
+		want = set(usr_addr_list) if usr_addr_list else None
+		labels = TwLabelCache()
+		self.total = 0
+
+		for d in bal.unspent:
+			if not 'account' in d: continue  # skip coinbase outputs with missing account
+			if d['confirmations'] < minconf: continue
+			label = labels[d['account']]
+			if label:
+				mmid = label.mmid
+				if want and mmid not in want: continue
+				e = self.get(mmid)
+				if e:
+					if e['addr'] != d['address']:
+						die(2,'duplicate {} address ({}) for this MMGen address! ({})'.format(
+								g.coin,d['address'],e['addr']))
+					e['amt'] += d['sats']
+				else:
+					self[mmid] = { 'amt':d['sats'], 'lbl':label, 'addr':d['address'] }
+				self.total += d['sats']
+
+		# We use listaccounts only for empty addresses, as it shows false positive balances
+		if showempty:
+			# args: minconf,watchonly; take keys only.  Accounts are raw RPC strings, for
+			# compatibility with old mmids
+			accts,seen = [],{}
+			for a,v in c.listaccounts(0,True,stream=True):
+				label = labels[a]
+				if not label: continue
+				if label.mmid in seen:
+					self.dup_mmid_die(c,label.mmid,[seen[label.mmid],a])
+				seen[label.mmid] = a
+				if want and label.mmid not in want: continue
+				if label.mmid not in self: accts.append(a)
+
+			# addresses of accounts with outputs are already known from 'listunspent'
+			acct_addrs = c.getaddressesbyaccount([[a] for a in accts],batch=True) if accts else []
+			assert len(accts) == len(acct_addrs), 'listaccounts() and getaddressesbyaccount() not equal in length'
+			err = False
+			for a,addr_arr in zip(accts,acct_addrs):
+				if len(addr_arr) != 1:
+					err = True
+					if len(addr_arr) == 0:
+						msg("Label '{}': has no associated address!".format(a))
+					else:
+						msg("'{}': more than one {} address in account!".format(addr_arr,g.coin))
+				else:
+					label = labels[a]
+					self[label.mmid] = { 'amt':0, 'lbl':label, 'addr':addr_arr[0] }
+			if err: rdie(3,'Tracking wallet is corrupted!')
+
+	def dup_mmid_die(self,c,mmid,bad_accts):
+		msg('Duplicate MMGen ID ({}) discovered in tracking wallet!\n'.format(mmid))
+		msg('  Affected Bitcoin RPC accounts:\n    {}\n'.format('\n    '.join(bad_accts)))
+		bad_addrs = [a[0] for a in c.getaddressesbyaccount([[a] for a in bad_accts],batch=True)]
+		if len(set(bad_addrs)) != 1:
+			msg('  Offending addresses:\n    {}'.format('\n    '.join(bad_addrs)))
+			msg(self.dup_help.format(mid=mmid,pnm=g.proj_name))
+		die(3,red('Exiting on error'))
+
+	def format(self,showbtcaddrs=False):
+		"Generate the lines of the address listing, in MMGen ID order"
+		from mmgen.twbal import from_sats
+		if g.chain in ('testnet','regtest'):
+			yield green('Chain: {}'.format(g.chain.upper()))
+
+		fs = ('{mid} {cmt} {amt}','{mid} {addr} {cmt} {amt}')[showbtcaddrs]
+		mmaddrs = [k for k in self if k.type == 'mmgen']
+		max_mmid_len = max(len(k) for k in mmaddrs) + 2 if mmaddrs else 10
+		max_cmt_len = max(max(len(e['lbl'].comment) for e in self.values()),7)
+		yield fs.format(
+				mid=MMGenID.fmtc('MMGenID',width=max_mmid_len),
+				addr=BTCAddr.fmtc('ADDRESS'),
+				cmt=TwComment.fmtc('COMMENT',width=max_cmt_len),
+				amt='BALANCE')
+
+		al_id_save = None
+		for mmid in sorted(self,key=lambda j: j.sort_key):
+			e = self[mmid]
+			if mmid.type == 'mmgen':
+				if al_id_save and al_id_save != mmid.obj.al_id:
+					yield ''
+				al_id_save = mmid.obj.al_id
+				mmid_disp = mmid
+			else:
+				if al_id_save:
+					yield ''
+					al_id_save = None
+				mmid_disp = mmid.type
+			yield fs.format(
+				mid = MMGenID.fmtc(mmid_disp,width=max_mmid_len,color=True),
+				addr=(BTCAddr.fmtc(e['addr'],color=True) if showbtcaddrs else None),
+				cmt=e['lbl'].comment.fmt(width=max_cmt_len,color=True,nullrepl='-'),
+				amt=from_sats(e['amt']).fmt('3.0',color=True))
+
+		yield '\nTOTAL: {} {}'.format(from_sats(self.total).hl(color=True),g.coin)
+
 class MMGenTrackingWallet(MMGenObject):
 
 	class MMGenTwOutputList(list,MMGenObject): pass
@@ -41,15 +163,15 @@ class MMGenTrackingWallet(MMGenObject):
 	class MMGenTwUnspentOutput(MMGenListItem):
 	#	attrs = 'txid','vout','amt','label','twmmid','addr','confs','scriptPubKey','days','skip'
 		txid     = MMGenImmutableAttr('txid','BitcoinTxID')
-		vout     = MMGenImmutableAttr('vout',int,typeconv=False),
-		amt      = MMGenImmutableAttr('amt','BTCAmt'),
-		label    = MMGenListItemAttr('label','TwComment',reassign_ok=True),
+		vout     = MMGenImmutableAttr('vout',int,typeconv=False)
+		amt      = MMGenImmutableAttr('amt','BTCAmt')
+		label    = MMGenListItemAttr('label','TwComment',reassign_ok=True)
 		twmmid   = MMGenImmutableAttr('twmmid','TwMMGenID')
-		addr     = MMGenImmutableAttr('addr','BTCAddr'),
-		confs    = MMGenImmutableAttr('confs',int,typeconv=False),
+		addr     = MMGenImmutableAttr('addr','BTCAddr')
+		confs    = MMGenImmutableAttr('confs',int,typeconv=False)
 		scriptPubKey = MMGenImmutableAttr('scriptPubKey','HexStr')
-		days    = MMGenListItemAttr('days',int,typeconv=False),
-		skip    = MMGenListItemAttr('skip',bool,typeconv=False,reassign_ok=True),
+		days    = MMGenListItemAttr('days',int,typeconv=False)
+		skip    = MMGenListItemAttr('skip',str,typeconv=False,reassign_ok=True,delete_ok=True) # 'addr' or 'txid'
 
 	wmsg = {
 	'no_spendable_outputs': """
@@ -67,6 +189,8 @@ watch-only wallet using '{}-addrimport' and then re-run this program.
 		self.group        = False
 		self.show_days    = True
 		self.show_mmid    = True
+		self.page_start   = 0
+		self.search_str   = ''
 		self.minconf      = minconf
 		self.get_unspent_data()
 		self.sort_key     = 'age'
@@ -74,19 +198,24 @@ watch-only wallet using '{}-addrimport' and then re-run this program.
 		self.total        = self.get_total_btc()
 
 	def get_total_btc(self):
-		return sum(i.amt for i in self.unspent)
+		from mmgen.twbal import from_sats
+		return from_sats(self.total_sats)
 
 	def get_unspent_data(self):
 		if g.bogus_wallet_data: # for debugging purposes only
 			us_rpc = eval(get_data_from_file(g.bogus_wallet_data))
 		else:
-			us_rpc = bitcoin_connection().listunspent(self.minconf)
+			from mmgen.twbal import TwBalance
+			us_rpc = [o for o in TwBalance.get().unspent if o['confirmations'] >= self.minconf]
 #		write_data_to_file('bogus_unspent.json', repr(us), 'bogus unspent data')
 #		sys.exit(0)
 
-		if not us_rpc: die(0,self.wmsg['no_spendable_outputs'])
+		from mmgen.twbal import to_sats
 		mm_rpc = self.MMGenTwOutputList()
+		self.total_sats = 0
+		have_outputs = False
 		for o in us_rpc:
+			have_outputs = True
 			if not 'account' in o: continue          # coinbase outputs have no account field
 			l = TwLabel(o['account'],on_fail='silent')
 			if l:
@@ -99,26 +228,58 @@ watch-only wallet using '{}-addrimport' and then re-run this program.
 					'confs':  o['confirmations']
 				})
 				mm_rpc.append(o)
-		self.unspent = self.MMGenTwOutputList([self.MMGenTwUnspentOutput(**dict([(k,v) for k,v in o.items() if k in self.MMGenTwUnspentOutput.__dict__])) for o in mm_rpc])
+				self.total_sats += o['sats'] if 'sats' in o else to_sats(o['amount'])
+		if not have_outputs: die(0,self.wmsg['no_spendable_outputs'])
+		self.unspent = self.MMGenTwOutputList([self.MMGenTwUnspentOutput(**dict([(k,v) for k,v in o.items() if k in self.MMGenTwUnspentOutput._attrs])) for o in mm_rpc])
 		for u in self.unspent:
 			if u.label == None: u.label = ''
 		if not self.unspent:
 			die(1,'No tracked unspent outputs in tracking wallet!')
+		self.make_indexes()
 
+	def make_indexes(self):
+		"Index the outputs by MMGen ID, and discard any sorted views"
+		self.by_mmid = {}
+		for u in self.unspent:
+			self.by_mmid.setdefault(u.twmmid,[]).append(u)
+		self.sorted_views = {}
+		self.search_keys  = {}
+		self.disp_widths  = None
+
+	sort_funcs = {
+		'addr':  lambda i: i.addr,
+		'age':   lambda i: 0 - i.confs,
+		'amt':   lambda i: int(i.amt.scaleb(8)), # integer key: Decimal comparisons are slow
+		'txid':  lambda i: '%s %03s' % (i.txid,i.vout),
+		'mmid':  lambda i: i.twmmid.sort_key
+	}
+
+	# Sorted views are kept for each sort key and direction, so switching between
+	# them doesn't re-sort.  Ties are broken by outpoint, making each view fully
+	# determined by its key and the reverse view simply the forward one reversed.
 	def do_sort(self,key=None,reverse=False):
-		sort_funcs = {
-			'addr':  lambda i: i.addr,
-			'age':   lambda i: 0 - i.confs,
-			'amt':   lambda i: i.amt,
-			'txid':  lambda i: '%s %03s' % (i.txid,i.vout),
-			'mmid':  lambda i: i.twmmid.sort_key
-		}
 		key = key or self.sort_key
-		if key not in sort_funcs:
-			die(1,"'{}': invalid sort key.  Valid options: {}".format(key,' '.join(sort_funcs.keys())))
+		if key not in self.sort_funcs:
+			die(1,"'{}': invalid sort key.  Valid options: {}".format(key,' '.join(self.sort_funcs.keys())))
 		self.sort_key = key
 		assert type(reverse) == bool
-		self.unspent.sort(key=sort_funcs[key],reverse=reverse or self.reverse)
+		rev = reverse or self.reverse
+		views = self.sorted_views
+		if (key,rev) not in views:
+			if (key,not rev) in views:
+				views[(key,rev)] = self.MMGenTwOutputList(views[(key,not rev)][::-1])
+			else:
+				f = self.sort_funcs[key]
+				views[(key,rev)] = self.MMGenTwOutputList(
+					sorted(self.unspent,key=lambda i: (f(i),i.txid,i.vout),reverse=rev))
+		self.unspent = views[(key,rev)]
+
+	def set_label(self,twmmid,label):
+		"Update the label of all outputs with MMGen ID 'twmmid', after add_label()"
+		for u in self.by_mmid.get(twmmid,[]):
+			u.label = TwComment(label)
+		self.search_keys = {}
+		self.disp_widths = None
 
 	def sort_info(self,include_group=True):
 		ret = ([],['Reverse'])[self.reverse]
@@ -136,19 +297,52 @@ watch-only wallet using '{}-addrimport' and then re-run this program.
 			m2 = 'Please resize your screen to at least {} characters and hit ENTER '
 			my_raw_input(m1+'\n'+m2.format(g.min_screen_width))
 
+	# With more outputs than fit on the screen, only one page of the current sorted
+	# view is formatted and displayed.  Field widths are computed once over all
+	# outputs, so they don't change from page to page.
+	page_reserved_rows = 12 # header, column labels, page info, prompt
+
+	def get_page(self):
+		"Return the start and length of the visible page, or (0,None) if all outputs fit"
+		from mmgen.term import get_terminal_size
+		nrows = max(5,get_terminal_size()[1] - self.page_reserved_rows)
+		if len(self.unspent) <= nrows: return 0,None
+		self.page_start = max(0,min(self.page_start,len(self.unspent)-nrows))
+		return self.page_start,nrows
+
 	def display(self):
 		if not opt.no_blank: msg(CUR_HOME+ERASE_ALL)
-		msg(self.format_for_display())
+		self.fmt_display = self.format_for_display(*self.get_page())
+		msg(self.fmt_display)
+
+	def get_display_widths(self):
+		if not self.disp_widths:
+			self.disp_widths = (
+				max(len(('',i.twmmid)[i.twmmid.type=='mmgen']) for i in self.unspent),
+				max(len(i.label) for i in self.unspent))
+		return self.disp_widths
+
+	def set_skip(self,start,end):
+		"Set the grouping flags of outputs 'start' to 'end' of the current view"
+		unsp = self.unspent
+		for n in range(start,end): del unsp[n].skip
+		if self.group and (self.sort_key in ('addr','txid','twmmid')):
+			k = self.sort_key
+			for n in range(start+1,end): # first row of each page shown in full
+				if getattr(unsp[n-1],k) == getattr(unsp[n],k):
+					unsp[n].skip = (k,'addr')[k=='twmmid']
 
-	def format_for_display(self):
+	def format_for_display(self,start=0,nrows=None):
+		"Format outputs 'start' to 'start+nrows' of the current view (all outputs by default)"
 		unsp = self.unspent
-# 		unsp.pdie()
 		self.set_term_columns()
+		end = len(unsp) if nrows is None else min(len(unsp),start+nrows)
 
 		# Field widths
 		min_mmid_w = 12 # DEADBEEF:S:1
-		mmid_w = max(len(('',i.twmmid)[i.twmmid.type=='mmgen']) for i in unsp) or min_mmid_w
-		max_acct_w = max(len(i.label) for i in unsp) + mmid_w + 1
+		mmid_w,max_label_w = self.get_display_widths()
+		mmid_w = mmid_w or min_mmid_w
+		max_acct_w = max_label_w + mmid_w + 1
 		addr_w = min(35+(0,1+max_acct_w)[self.show_mmid],self.cols-45)
 		acct_w = min(max_acct_w, max(24,int(addr_w-10)))
 		btaddr_w = addr_w - acct_w - 1
@@ -157,22 +351,20 @@ watch-only wallet using '{}-addrimport' and then re-run this program.
 		txdots = ('','...')[tx_w < 64]
 		fs = ' %-4s %-{}s %-2s %s %s %s'.format(tx_w)
 
-		for i in unsp: i.skip = None
-		if self.group and (self.sort_key in ('addr','txid','twmmid')):
-			for a,b in [(unsp[i],unsp[i+1]) for i in range(len(unsp)-1)]:
-				for k in ('addr','txid','twmmid'):
-					if self.sort_key == k and getattr(a,k) == getattr(b,k):
-						b.skip = (k,'addr')[k=='twmmid']
+		self.set_skip(start,end)
 
 		hdr_fmt = 'UNSPENT OUTPUTS (sort order: {})  Total {}: {}'
 		out  = [hdr_fmt.format(' '.join(self.sort_info()),g.coin,self.total.hl())]
 		if g.chain in ('testnet','regtest'):
 			out += [green('Chain: {}'.format(g.chain.upper()))]
+		if start > 0 or end < len(unsp):
+			out += ['Outputs {}-{} of {}'.format(start+1,end,len(unsp))]
 		af = BTCAddr.fmtc('Address',width=addr_w+1)
 		cf = ('Conf.','Age(d)')[self.show_days]
 		out += [fs % ('Num','TX id'.ljust(tx_w - 5) + ' Vout','',af,'Amt({}) '.format(g.coin),cf)]
 
-		for n,i in enumerate(unsp):
+		for n in range(start,end):
+			i = unsp[n]
 			addr_dots = '|' + '.'*33
 			mmid_disp = MMGenID.fmtc('.'*mmid_w if i.skip=='addr'
 				else i.twmmid if i.twmmid.type=='mmgen'
@@ -194,9 +386,56 @@ watch-only wallet using '{}-addrimport' and then re-run this program.
 			out.append(fs % (str(n+1)+')',tx,i.vout,addr_out,i.amt.fmt(color=True),
 						i.days if self.show_days else i.confs))
 
-		self.fmt_display = '\n'.join(out) + '\n'
-#		unsp.pdie()
-		return self.fmt_display
+		return '\n'.join(out) + '\n'
+
+	def get_search_keys(self):
+		"Return the lowercased searchable fields of each output in the current view"
+		k = (self.sort_key,self.reverse)
+		if k not in self.search_keys:
+			self.search_keys[k] = [
+				'{} {} {} {}'.format(i.txid,i.addr,i.twmmid,i.label).lower() for i in self.unspent]
+		return self.search_keys[k]
+
+	def find(self,s,start):
+		"Return the index of the first output at or after 'start' matching 's', wrapping around"
+		keys,s = self.get_search_keys(),s.lower()
+		for n in range(start,len(keys)) + range(start):
+			if s in keys[n]: return n
+		return None
+
+	def search(self,prompt):
+		"""
+		Incremental search: with each keystroke, move the first output matching the
+		text typed so far to the top of the page.  ENTER accepts, ESC cancels.  ENTER
+		on an empty search string repeats the last search from the next output.
+		"""
+		from mmgen.term import get_char
+		origin,s,m = self.page_start,'',''
+		while True:
+			ch = get_char('Search: {}{}'.format(s,m),immed_chars='ALL',prehold_protect=False)
+			if ch in '\n\r':
+				if s: self.search_str = s
+				elif self.search_str:
+					n = self.find(self.search_str,self.page_start+1)
+					if n is not None: self.page_start = n
+				return
+			elif ch == '\x1b':
+				self.page_start = origin
+				return
+			elif ch in '\x7f\b': s = s[:-1]
+			elif ch >= ' ': s += ch
+			n = self.find(s,origin) if s else origin
+			m = '' if n is not None else red('  [not found]')
+			if n is not None: self.page_start = n
+			self.display()
+			msg(prompt)
+
+	def jump_to(self):
+		n = AddrIdx(my_raw_input('\nJump to output number: '),on_fail='silent')
+		if n and n <= len(self.unspent):
+			self.page_start = n - 1
+		else:
+			msg('Choice must be a single number between 1 and %s' % len(self.unspent))
 
 	def format_for_printing(self,color=False):
 
@@ -205,6 +444,7 @@ watch-only wallet using '{}-addrimport' and then re-run this program.
 			'Amount({})'.format(g.coin),'Conf.','Age(d)', 'Label')]
 
 		max_lbl_len = max([len(i.label) for i in self.unspent if i.label] or [1])
+		self.set_skip(0,len(self.unspent))
 		for n,i in enumerate(self.unspent):
 			addr = '|'+'.' * 34 if i.skip == 'addr' and self.group else i.addr.fmt(color=color)
 			tx = '|'+'.' * 63 if i.skip == 'txid' and self.group else str(i.txid)
@@ -260,54 +500,64 @@ watch-only wallet using '{}-addrimport' and then re-run this program.
 {}Sort options: [t]xid, [a]mount, a[d]dress, [A]ge, [r]everse, [M]mgen addr
 Display options: show [D]ays, [g]roup, show [m]mgen addr, r[e]draw screen
 	""".format(txos).strip()
+		nav = 'Navigation: [n]ext page, [b]ack, [j]ump to output, [/]search'
+		def get_prompt():
+			return prompt + ('','\n'+nav)[self.get_page()[1] != None]
+
 		self.display()
-		msg(prompt)
+		msg(get_prompt())
 
 		from mmgen.term import get_char
 		p = "'q'=quit view, 'p'=print to file, 'v'=pager view, 'w'=wide view, 'l'=add label:\b"
 		while True:
-			reply = get_char(p, immed_chars='atDdAMrgmeqpvw')
-			if   reply == 'a': self.do_sort('amt')
-			elif reply == 'A': self.do_sort('age')
-			elif reply == 'd': self.do_sort('addr')
+			reply = get_char(p, immed_chars='atDdAMrgmeqpvwnbj/')
+			if   reply == 'a': self.do_sort('amt'); self.page_start = 0
+			elif reply == 'A': self.do_sort('age'); self.page_start = 0
+			elif reply == 'b': self.page_start -= self.get_page()[1] or 0
+			elif reply == 'd': self.do_sort('addr'); self.page_start = 0
 			elif reply == 'D': self.show_days = not self.show_days
-			elif reply == 'e': msg('\n%s\n%s\n%s' % (self.fmt_display,prompt,p))
+			elif reply == 'e': msg('\n%s\n%s\n%s' % (self.fmt_display,get_prompt(),p))
 			elif reply == 'g': self.group = not self.group
+			elif reply == 'j': self.jump_to()
 			elif reply == 'l':
 				idx,lbl = self.get_idx_and_label_from_user()
 				if idx:
 					e = self.unspent[idx-1]
 					if type(self).add_label(e.twmmid,lbl,addr=e.addr):
-						self.get_unspent_data()
-						self.do_sort()
-						msg('%s\n%s\n%s' % (self.fmt_display,prompt,p))
+						self.set_label(e.twmmid,lbl)
+						self.fmt_display = self.format_for_display(*self.get_page())
+						msg('%s\n%s\n%s' % (self.fmt_display,get_prompt(),p))
 					else:
-						msg('Label could not be added\n%s\n%s' % (prompt,p))
-			elif reply == 'M': self.do_sort('mmid'); self.show_mmid = True
+						msg('Label could not be added\n%s\n%s' % (get_prompt(),p))
+			elif reply == 'M': self.do_sort('mmid'); self.show_mmid = True; self.page_start = 0
 			elif reply == 'm': self.show_mmid = not self.show_mmid
+			elif reply == 'n': self.page_start += self.get_page()[1] or 0
 			elif reply == 'p':
 				msg('')
 				of = 'listunspent[%s].out' % ','.join(self.sort_info(include_group=False)).lower()
 				write_data_to_file(of,self.format_for_printing(),'unspent outputs listing')
 				m = yellow("Data written to '%s'" % of)
-				msg('\n%s\n%s\n\n%s' % (self.fmt_display,m,prompt))
+				msg('\n%s\n%s\n\n%s' % (self.fmt_display,m,get_prompt()))
 				continue
 			elif reply == 'q': return self.unspent
-			elif reply == 'r': self.unspent.reverse(); self.reverse = not self.reverse
-			elif reply == 't': self.do_sort('txid')
+			elif reply == 'r': self.reverse = not self.reverse; self.do_sort(); self.page_start = 0
+			elif reply == 't': self.do_sort('txid'); self.page_start = 0
 			elif reply == 'v':
-				do_pager(self.fmt_display)
+				do_pager(self.format_for_display())
 				continue
 			elif reply == 'w':
 				do_pager(self.format_for_printing(color=True))
 				continue
+			elif reply == '/':
+				msg('')
+				self.search(get_prompt())
 			else:
 				msg('\nInvalid input')
 				continue
 
 			msg('\n')
 			self.display()
-			msg(prompt)
+			msg(get_prompt())
 
 	# returns on failure
 	@classmethod
@@ -363,6 +613,11 @@ Display options: show [D]ays, [g]roup, show [m]mgen addr, r[e]draw screen
 		# RPC args: addr,label,rescan[=true],p2sh[=none]
 		ret = c.importaddress(btcaddr,lbl,False,on_fail='return')
 
+		from mmgen.twcache import TwUnspentCache
+		from mmgen.twbal import TwBalance
+		TwUnspentCache.invalidate()
+		TwBalance.invalidate()
+
 		from mmgen.rpc import rpc_error,rpc_errmsg
 		if rpc_error(ret):
 			msg('From bitcoind: ' + rpc_errmsg(ret))
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+#
+# mmgen = Multi-Mode GENerator, command-line Bitcoin cold storage solution
+# Copyright (C)2013-2017 Philemon <mmgen-py@yandex.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+twbal.py:  Tracking wallet balances for the MMGen suite
+"""
+
+# Balances are summed as integer satoshis: Python 2's Decimal is implemented in
+# Python and its arithmetic is slow.  Coin amounts are converted via their string
+# representation, which bitcoind always gives with eight decimal places.
+
+from decimal import Decimal
+from mmgen.common import *
+from mmgen.obj import MMGenObject,BTCAmt,is_mmgen_id
+
+def to_sats(amt):
+	"Convert a coin amount (Decimal or string) to an integer number of satoshis"
+	s = str(amt)
+	if 'E' in s or 'e' in s: # exponential notation, e.g. Decimal('1E-8')
+		s = '{:f}'.format(Decimal(s))
+	a,_,b = s.partition('.')
+	if len(b) > 8:
+		raise ValueError('{}: too many decimal places in coin amount'.format(s))
+	return int(a) * 100000000 + int(b.ljust(8,'0') or 0)
+
+def from_sats(n):
+	return BTCAmt('{}.{:08}'.format(n / 100000000,n % 100000000))
+
+class TwBalance(MMGenObject):
+	"""
+	The tracking wallet's unspent outputs, fetched once per invocation, and their
+	totals by wallet, seed ID and number of confirmations.  The outputs are read
+	from the on-disk cache if 'tw_cache' is set, otherwise with 'listunspent'.
+	"""
+	_cached = None
+
+	@classmethod
+	def get(cls):
+		"Return the balances for this invocation, querying bitcoind only the first time"
+		if cls._cached is None:
+			cls._cached = cls()
+		return cls._cached
+
+	@classmethod
+	def invalidate(cls):
+		cls._cached = None
+
+	def __init__(self,c=None):
+		self.c = c or bitcoin_connection()
+		self.unspent = [] # RPC output dicts, with amount in satoshis added as 'sats'
+		self.totals = {}  # 'TOTAL', 'SPENDABLE' or seed ID -> { confirmations: satoshis }
+		sids = {}         # first word of account name -> seed ID or None
+		if g.tw_cache:
+			from mmgen.twcache import TwUnspentCache
+			us = TwUnspentCache(self.c).get_unspent(0)
+		else:
+			us = self.c.listunspent(0,stream=True)
+		for d in us:
+			d['sats'] = n = to_sats(d['amount'])
+			self.unspent.append(d)
+			keys = ['TOTAL'] # include coinbase outputs if spendable
+			if d['spendable']: keys.append('SPENDABLE')
+			if 'account' in d:
+				ma = split2(d['account'])[0]
+				if ma not in sids:
+					sids[ma] = ma.split(':')[0] if is_mmgen_id(ma) else None
+				if sids[ma]: keys.append(sids[ma])
+			confs = d['confirmations']
+			for k in keys:
+				t = self.totals.setdefault(k,{})
+				t[confs] = t.get(confs,0) + n
+
+	def get_balances(self,minconf=1):
+		"""
+		Return the unconfirmed, below-'minconf' and at-least-'minconf' totals of each
+		key in 'totals', in satoshis.  Unconfirmed amounts are also below 'minconf'.
+		"""
+		ret = {}
+		for k,t in self.totals.items():
+			b = ret[k] = [t.get(0,0),0,0]
+			for confs,n in t.items():
+				b[(1,2)[confs >= minconf]] += n
+		return ret
@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+#
+# mmgen = Multi-Mode GENerator, command-line Bitcoin cold storage solution
+# Copyright (C)2013-2017 Philemon <mmgen-py@yandex.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+twcache.py:  On-disk cache of the tracking wallet's unspent outputs
+"""
+
+# The cache holds the confirmed unspent outputs as of a given block,
+# plus the IDs of the wallet's unconfirmed transactions at that time.  To bring
+# it up to date:
+#
+#   - outputs confirmed after the cached block, and unconfirmed outputs, are
+#     exactly those returned by 'listunspent 0 <blocks since cached block>';
+#   - coinbase outputs are left out by 'listunspent' until mature, so those that
+#     have matured since the cached block are found among the outputs with up
+#     to <blocks since cached block> + coinbase_maturity confirmations;
+#   - cached outputs spent since then are found among the inputs of the wallet
+#     transactions returned by 'listsinceblock <cached block>';
+#   - confirmations of the remaining cached outputs are increased by the number
+#     of new blocks.
+#
+# The cache is rebuilt from a full 'listunspent' if the cached block is no longer
+# in the main chain (reorg), or if a transaction that was unconfirmed at caching
+# time has since been dropped (its inputs may then be unspent again).  Changes
+# to the tracking wallet made by MMGen itself (labels, imports) invalidate the
+# cache.  Changes made by other means (e.g. 'bitcoin-cli importaddress') are
+# not detected, so in that case remove the cache file or set 'tw_cache false'.
+
+import os,json
+from decimal import Decimal
+from mmgen.common import *
+from mmgen.obj import MMGenObject
+
+class TwUnspentCache(MMGenObject):
+
+	version = 2
+	coinbase_maturity = 101 # confirmations needed for a coinbase output to be listed
+	fields = 'txid','vout','address','account','amount','confirmations','scriptPubKey','spendable'
+
+	def __init__(self,c):
+		self.c = c
+		self.fn = self.get_filename()
+
+	@staticmethod
+	def get_filename():
+		return os.path.join(g.data_dir,'tw-unspent-{}.cache'.format(g.coin.lower()))
+
+	@classmethod
+	def invalidate(cls):
+		try: os.unlink(cls.get_filename())
+		except: pass
+
+	def load(self):
+		try:
+			d = json.loads(open(self.fn).read())
+			assert d['version'] == self.version
+			assert d['coin'] == g.coin and d['chain'] == g.chain
+			return d
+		except:
+			return None
+
+	def save(self,height,bestblock,rows,pending):
+		d = {
+			'version':   self.version,
+			'coin':      g.coin,
+			'chain':     g.chain,
+			'height':    height,
+			'bestblock': bestblock,
+			'pending':   pending,
+			'unspent':   rows }
+		try:
+			tmp_fn = self.fn + '.tmp'
+			f = os.fdopen(os.open(tmp_fn,os.O_WRONLY|os.O_CREAT|os.O_TRUNC,0600),'w')
+			f.write(json.dumps(d,separators=(',',':')))
+			f.close()
+			os.rename(tmp_fn,self.fn)
+		except Exception as e:
+			vmsg("Unable to write tracking wallet cache '{}': {}".format(self.fn,e))
+
+	# Rows are lists in the order of 'fields', with amounts as strings.  Outputs
+	# without an account (e.g. coinbase outputs) have an account of None.
+	def to_row(self,o):
+		return [o['txid'],o['vout'],o['address'],o.get('account'),str(o['amount']),
+				o['confirmations'],o['scriptPubKey'],o['spendable']]
+
+	def to_output(self,r):
+		d = dict(zip(self.fields,r[:4]+[Decimal(r[4])]+r[5:]))
+		if d['account'] is None: del d['account']
+		return d
+
+	def get_unspent(self,minconf):
+		"Return outputs with at least 'minconf' confirmations, as 'listunspent' would"
+		for i in range(3): # retry if a block arrives while we're working
+			height,bestblock = self.get_tip()
+			d = self.load()
+			ret = self.refresh(d,height) if d else None
+			rows,pending = ret or self.rebuild(bestblock)
+			if self.get_tip() == (height,bestblock):
+				break
+		else:
+			die(2,'Unable to get a consistent tracking wallet snapshot')
+
+		self.save(height,bestblock,[r for r in rows if r[5] > 0],pending)
+
+		return [self.to_output(r) for r in rows if r[5] >= minconf]
+
+	def get_tip(self):
+		d = self.c.getblockchaininfo()
+		return d['blocks'],d['bestblockhash']
+
+	def get_pending(self,since):
+		"Return the confirmations of each wallet transaction since block 'since'"
+		ret = self.c.listsinceblock(since,1,True,on_fail='silent')
+		from mmgen.rpc import rpc_error
+		if rpc_error(ret): return None
+		return dict((t['txid'],t['confirmations']) for t in ret['transactions'])
+
+	def rebuild(self,bestblock):
+		vmsg('Rebuilding tracking wallet cache')
+		rows = [self.to_row(o) for o in self.c.listunspent(0,stream=True)]
+		txs = self.get_pending(bestblock) or {}
+		return rows,[k for k,v in txs.items() if v == 0]
+
+	def refresh(self,d,height):
+		c = self.c
+		if d['height'] > height or c.getblockhash(d['height'],on_fail='silent') != d['bestblock']:
+			vmsg('Cached block not in main chain')
+			return None
+
+		txs = self.get_pending(d['bestblock'])
+		if txs is None: return None
+		if [t for t in d['pending'] if txs.get(t,-1) < 0]:
+			vmsg('Unconfirmed transaction dropped since caching')
+			return None
+
+		# inputs of any wallet transaction since the cached block may be cached outputs
+		spent = set()
+		live = [t for t in txs if txs[t] >= 0]
+		if live:
+			from mmgen.tx import DeserializedTX
+			for ret in c.gettransaction([[t,True] for t in live],batch=True):
+				for i in DeserializedTX(ret['hex'])['txins']:
+					spent.add((i['txid'],i['vout']))
+
+		delta = height - d['height']
+		rows = []
+		for r in d['unspent']:
+			if (r[0],r[1]) not in spent:
+				r[5] += delta
+				rows.append(r)
+		nspent = len(d['unspent']) - len(rows)
+
+		cached = set((r[0],r[1]) for r in rows)
+		new = [self.to_row(o) for o in c.listunspent(0,delta+self.coinbase_maturity,stream=True)
+					if (o['txid'],o['vout']) not in cached]
+		vmsg('Tracking wallet cache: {} block{} since cache, {} output{} spent, {} new'.format(
+			delta,suf(delta,'s'),nspent,suf(nspent,'s'),len(new)))
+
+		return rows + new,[k for k,v in txs.items() if v == 0]
@@ -20,14 +20,16 @@
 tx.py:  Transaction routines for the MMGen suite
 """
 
-import sys,os
+import sys,os,re,json
 from stat import *
 from binascii import unhexlify
+from hashlib import sha256
 from mmgen.common import *
 from mmgen.obj import *
 
-def segwit_is_active(exit_on_error=False):
-	d = bitcoin_connection().getblockchaininfo()
+# 'd' is the result of getblockchaininfo, if the caller already has it
+def segwit_is_active(exit_on_error=False,d=None):
+	d = d or bitcoin_connection().getblockchaininfo()
 	if d['chain'] == 'regtest':
 		return True
 	if 'segwit' in d['bip9_softforks'] and d['bip9_softforks']['segwit']['status'] == 'active':
@@ -48,71 +50,156 @@ def bytes2int(hex_bytes):
 def bytes2btc(hex_bytes):
 	return bytes2int(hex_bytes) * g.satoshi
 
+def btc2sat(amt):
+	from decimal import Decimal
+	return int(Decimal(amt) / Decimal(g.satoshi))
+
 from collections import OrderedDict
+# The transaction is parsed in place, with a cursor into the raw bytes.  The txid
+# is hashed from slices of the buffer that leave out the witness data.
 class DeserializedTX(OrderedDict,MMGenObject): # need to add MMGen types
 	def __init__(self,txhex):
-		tx = list(unhexlify(txhex))
-		tx_copy = tx[:]
-
-		def hshift(l,n,reverse=False):
-			ret = l[:n]
-			del l[:n]
-			return hexlify(''.join(ret[::-1] if reverse else ret))
+		from struct import unpack_from
+		tx = unhexlify(txhex)
+		pos = [0] # cursor
+		end = [len(tx),'transaction'] # reads may not go past end[0]
+
+		def read(n):
+			p = pos[0]
+			if p + n > end[0]:
+				die(3,'Unexpected end of {} data!'.format(end[1]))
+			pos[0] = p + n
+			return tx[p:p+n]
+
+		def hread(n,reverse=False):
+			ret = read(n)
+			return hexlify(ret[::-1] if reverse else ret)
+
+		uint_fmts = { 4:'<I', 8:'<Q' }
+		def read_int(n): # little-endian
+			ret = unpack_from(uint_fmts[n],read(n))[0]
+			if ret >> (n*8-1):
+				die(3,"{}: Negative values not permitted in transaction!".format(hexlify(tx[pos[0]-n:pos[0]])))
+			return ret
 
 		# https://bitcoin.org/en/developer-reference#compactsize-unsigned-integers
 		# For example, the number 515 is encoded as 0xfd0302.
-		def readVInt(l):
-			s = int(hexlify(l[0]),16)
-			bytes_len = 1 if s < 0xfd else 2 if s == 0xfd else 4 if s == 0xfe else 8
-			if bytes_len != 1: del l[0]
-			ret = int(hexlify(''.join(l[:bytes_len][::-1])),16)
-			del l[:bytes_len]
-			return ret
+		def readVInt():
+			s = ord(read(1))
+			if s < 0xfd: return s
+			return unpack_from(('<H','<I','<Q')[s-0xfd],read((2,4,8)[s-0xfd]))[0]
 
-		d = { 'version': bytes2int(hshift(tx,4)) }
-		has_witness = (False,True)[hexlify(tx[0])=='00']
+		d = { 'version': read_int(4) }
+		has_witness = tx[4:5] == '\x00'
 		if has_witness:
-			u = hshift(tx,2)[2:]
+			u = hread(2)[2:]
 			if u != '01':
 				die(2,"'{}': Illegal value for flag in transaction!".format(u))
-			del tx_copy[-len(tx)-2:-len(tx)]
 
-		d['num_txins'] = readVInt(tx)
+		d['num_txins'] = readVInt()
 		d['txins'] = MMGenList([OrderedDict((
-			('txid',      hshift(tx,32,reverse=True)),
-			('vout',      bytes2int(hshift(tx,4))),
-			('scriptSig', hshift(tx,readVInt(tx))),
-			('nSeq',      hshift(tx,4,reverse=True))
+			('txid',      hread(32,reverse=True)),
+			('vout',      read_int(4)),
+			('scriptSig', hread(readVInt())),
+			('nSeq',      hread(4,reverse=True))
 		)) for i in range(d['num_txins'])])
 
-		d['num_txouts'] = readVInt(tx)
+		d['num_txouts'] = readVInt()
 		d['txouts'] = MMGenList([OrderedDict((
-			('amount',       bytes2btc(hshift(tx,8))),
-			('scriptPubKey', hshift(tx,readVInt(tx)))
+			('amount',       read_int(8) * g.satoshi),
+			('scriptPubKey', hread(readVInt()))
 		)) for i in range(d['num_txouts'])])
 
+		buf = memoryview(tx)
 		d['witness_size'] = 0
 		if has_witness:
 			# https://github.com/bitcoin/bips/blob/master/bip-0141.mediawiki
 			# A non-witness program (defined hereinafter) txin MUST be associated with an empty
 			# witness field, represented by a 0x00.
-			del tx_copy[-len(tx):-4]
-			wd,tx = tx[:-4],tx[-4:]
-			d['witness_size'] = len(wd) + 2 # add marker and flag
-			for i in range(len(d['txins'])):
-				if hexlify(wd[0]) == '00':
-					hshift(wd,1)
+			ws,we = pos[0],len(tx) - 4
+			d['witness_size'] = we - ws + 2 # add marker and flag
+			end[:] = we,'witness'
+			for txin in d['txins']:
+				if pos[0] >= we:
+					die(3,'Unexpected end of witness data!')
+				if tx[pos[0]] == '\x00':
+					pos[0] += 1
 					continue
-				d['txins'][i]['witness'] = [hshift(wd,readVInt(wd)) for item in range(readVInt(wd))]
-			if wd:
+				txin['witness'] = [hread(readVInt()) for item in range(readVInt())]
+			if pos[0] != we:
 				die(3,'More witness data than inputs with witnesses!')
+			end[:] = len(tx),'transaction'
+			txid_data = buf[:4],buf[6:ws],buf[we:]
+		else:
+			txid_data = (buf,)
 
-		d['lock_time'] = bytes2int(hshift(tx,4))
-		d['txid'] = hexlify(sha256(sha256(''.join(tx_copy)).digest()).digest()[::-1])
+		d['lock_time'] = read_int(4)
+		h = sha256()
+		for data in txid_data: h.update(data)
+		d['txid'] = hexlify(sha256(h.digest()).digest()[::-1])
 
 		keys = 'txid','version','lock_time','witness_size','num_txins','txins','num_txouts','txouts'
 		return OrderedDict.__init__(self, ((k,d[k]) for k in keys))
 
+def dsha256(data): return sha256(sha256(data).digest()).digest()
+
+# https://bitcoin.org/en/developer-reference#compactsize-unsigned-integers
+def vint(n):
+	from struct import pack
+	return  pack('<B',n) if n < 0xfd else \
+			'\xfd'+pack('<H',n) if n <= 0xffff else \
+			'\xfe'+pack('<I',n) if n <= 0xffffffff else \
+			'\xff'+pack('<Q',n)
+
+def push_data(data): # canonical pushes only: scripts here are all < 76 bytes
+	assert len(data) < 0x4c
+	return chr(len(data)) + data
+
+# Binary serialization and signature hashes for DeserializedTX data, for offline signing
+class TxSerializer(MMGenObject):
+
+	sighash_all = 1
+
+	def __init__(self,dtx):
+		from struct import pack
+		self.dtx = dtx
+		self.ins = [(unhexlify(i['txid'])[::-1] + pack('<I',i['vout']),unhexlify(i['nSeq'])[::-1])
+						for i in dtx['txins']]
+		self.outs = ''.join([pack('<Q',btc2sat(o['amount'])) + vint(len(o['scriptPubKey'])/2) +
+						unhexlify(o['scriptPubKey']) for o in dtx['txouts']])
+		self.version = pack('<I',dtx['version'])
+		self.lock_time = pack('<I',dtx['lock_time'])
+		# BIP143 hashes are the same for every input, so compute them once
+		self.hash_prevouts = dsha256(''.join([i[0] for i in self.ins]))
+		self.hash_sequence = dsha256(''.join([i[1] for i in self.ins]))
+		self.hash_outputs = dsha256(self.outs)
+
+	def serialize(self,scriptsigs,witnesses=None):
+		ret = self.version
+		if witnesses and any(witnesses):
+			ret += '\x00\x01' # marker, flag
+		ret += vint(len(self.ins)) + ''.join([outpoint + vint(len(ss)) + ss + nseq
+						for (outpoint,nseq),ss in zip(self.ins,scriptsigs)])
+		ret += vint(len(self.dtx['txouts'])) + self.outs
+		if witnesses and any(witnesses):
+			ret += ''.join([vint(len(w)) + ''.join([vint(len(i)) + i for i in w]) for w in witnesses])
+		return ret + self.lock_time
+
+	# https://en.bitcoin.it/wiki/OP_CHECKSIG
+	def sighash_legacy(self,idx,script_code):
+		from struct import pack
+		ss = [''] * len(self.ins)
+		ss[idx] = script_code
+		return dsha256(self.serialize(ss) + pack('<I',self.sighash_all))
+
+	# https://github.com/bitcoin/bips/blob/master/bip-0143.mediawiki
+	def sighash_segwit(self,idx,script_code,amt):
+		from struct import pack
+		outpoint,nseq = self.ins[idx]
+		return dsha256(self.version + self.hash_prevouts + self.hash_sequence + outpoint +
+						vint(len(script_code)) + script_code + pack('<Q',btc2sat(amt)) +
+						nseq + self.hash_outputs + self.lock_time + pack('<I',self.sighash_all))
+
 txio_attrs = {
 	'vout':  MMGenListItemAttr('vout',int,typeconv=False),
 	'amt':   MMGenImmutableAttr('amt','BTCAmt'),
@@ -124,6 +211,44 @@ txio_attrs = {
 	'have_wif': MMGenListItemAttr('have_wif',bool,typeconv=False,delete_ok=True)
 }
 
+# Version 1 transaction files have their inputs and outputs in Python repr() format.
+# Evaluate them without eval(), allowing only literals and BTCAmt('<string>').
+def parse_tx_io_data_v1(s):
+	import ast
+	consts = { 'True':True, 'False':False, 'None':None }
+	def conv(n):
+		if isinstance(n,ast.List): return [conv(e) for e in n.elts]
+		if isinstance(n,ast.Dict): return dict((conv(k),conv(v)) for k,v in zip(n.keys,n.values))
+		if isinstance(n,ast.Str): return n.s
+		if isinstance(n,ast.Num): return n.n
+		if isinstance(n,ast.Name) and n.id in consts: return consts[n.id]
+		if isinstance(n,ast.Call) and isinstance(n.func,ast.Name) and n.func.id == 'BTCAmt' \
+				and len(n.args) == 1 and isinstance(n.args[0],ast.Str) \
+				and not (n.keywords or n.starargs or n.kwargs):
+			return BTCAmt(n.args[0].s,on_fail='raise')
+		raise ValueError('{}: illegal expression in transaction data'.format(type(n).__name__))
+	return conv(ast.parse(s.strip(),mode='eval').body)
+
+def iter_json_array(s):
+	"Decode a JSON array, yielding its elements one at a time"
+	dec,ws = json.JSONDecoder(),re.compile(r'[ \t\n\r]*')
+	pos = ws.match(s).end()
+	if s[pos:pos+1] != '[': raise ValueError('not a JSON array')
+	pos = ws.match(s,pos+1).end()
+	if s[pos:pos+1] == ']':
+		pos = ws.match(s,pos+1).end()
+	else:
+		while True:
+			item,pos = dec.raw_decode(s,pos)
+			yield item
+			pos = ws.match(s,pos).end()
+			if s[pos:pos+1] == ']':
+				pos = ws.match(s,pos+1).end()
+				break
+			if s[pos:pos+1] != ',': raise ValueError('malformed JSON array')
+			pos = ws.match(s,pos+1).end()
+	if pos != len(s): raise ValueError('extra data after JSON array')
+
 class MMGenTX(MMGenObject):
 	ext      = 'rawtx'
 	raw_ext  = 'rawtx'
@@ -131,6 +256,10 @@ class MMGenTX(MMGenObject):
 	txid_ext = 'txid'
 	desc = 'transaction'
 
+	# Version 2 files have a version field at the end of the metadata line, and
+	# their inputs and outputs in compact JSON.  Version 1 files are still read.
+	file_fmt_version = 2
+
 	class MMGenTxInput(MMGenListItem):
 		for k in txio_attrs: locals()[k] = txio_attrs[k] # in lieu of inheritance
 		scriptPubKey = MMGenListItemAttr('scriptPubKey','HexStr')
@@ -156,6 +285,8 @@ class MMGenTX(MMGenObject):
 		self.fmt_data    = ''
 		self.blockcount  = 0
 		self.chain       = None
+		self.relay_kb_fee = None
+		self.fmt_version = self.file_fmt_version
 
 		if filename:
 			self.parse_tx_file(filename)
@@ -178,7 +309,7 @@ class MMGenTX(MMGenObject):
 		return None
 
 	def update_output_amt(self,idx,amt):
-		o = self.outputs[idx].__dict__
+		o = self.outputs[idx].attrs()
 		o['amt'] = amt
 		self.outputs[idx] = self.MMGenTxOutput(**o)
 
@@ -307,10 +438,15 @@ class MMGenTX(MMGenObject):
 
 	def get_relay_fee(self):
 		assert self.estimate_size()
-		kb_fee = BTCAmt(bitcoin_connection().getnetworkinfo()['relayfee'])
+		if not self.relay_kb_fee:
+			self.set_relay_kb_fee(bitcoin_connection().getnetworkinfo())
+		kb_fee = self.relay_kb_fee
 		vmsg('Relay fee: {} {}/kB'.format(kb_fee,g.coin))
 		return kb_fee * self.estimate_size() / 1024
 
+	def set_relay_kb_fee(self,networkinfo):
+		self.relay_kb_fee = BTCAmt(networkinfo['relayfee'])
+
 	def convert_fee_spec(self,tx_fee,tx_size,on_fail='throw'):
 		if BTCAmt(tx_fee,on_fail='silent'):
 			return BTCAmt(tx_fee)
@@ -370,13 +506,13 @@ class MMGenTX(MMGenObject):
 			(self.MMGenTxOutput,self.MMGenTxOutputList),
 			(self.MMGenTxInput,self.MMGenTxInputList)
 		)[desc=='inputs']
-		return il([io(**dict([(k,d[k]) for k in io.__dict__
+		return il([io(**dict([(k,d[k]) for k in io._attrs
 					if k in d and d[k] not in ('',None)])) for d in data])
 
 	def decode_io_oldfmt(self,data):
 		tr = {'amount':'amt', 'address':'addr', 'confirmations':'confs','comment':'label'}
 		tr_rev = dict([(v,k) for k,v in tr.items()])
-		copy_keys = [tr_rev[k] if k in tr_rev else k for k in self.MMGenTxInput.__dict__]
+		copy_keys = [tr_rev[k] if k in tr_rev else k for k in self.MMGenTxInput._attrs]
 		ret = MMGenList(self.MMGenTxInput(**dict([(tr[k] if k in tr else k,d[k])
 					for k in copy_keys if k in d and d[k] != ''])) for d in data)
 		for i in ret: i.sequence = int('0xffffffff',16)
@@ -386,7 +522,7 @@ class MMGenTX(MMGenObject):
 	def copy_inputs_from_tw(self,tw_unspent_data):
 		txi,self.inputs = self.MMGenTxInput,self.MMGenTxInputList()
 		for d in tw_unspent_data:
-			t = txi(**dict([(attr,getattr(d,attr)) for attr in d.__dict__ if attr in txi.__dict__]))
+			t = txi(**dict([(k,v) for k,v in d.attrs().items() if k in txi._attrs]))
 			if d.twmmid.type == 'mmgen': t.mmid = d.twmmid # twmmid -> mmid
 			self.inputs.append(t)
 
@@ -405,18 +541,26 @@ class MMGenTX(MMGenObject):
 	def add_blockcount(self,c):
 		self.blockcount = int(c.getblockcount())
 
+	@staticmethod
+	def format_io(data):
+		def conv(e): # amounts are stored as strings
+			if isinstance(e,BTCAmt): return str(e)
+			raise TypeError('{!r}: value not serializable'.format(e))
+		return json.dumps([e.attrs() for e in data],separators=(',',':'),sort_keys=True,default=conv)
+
 	def format(self):
 		lines = [
-			'{} {} {} {} {}'.format(
+			'{} {} {} {} {} v{}'.format(
 				self.chain.upper() if self.chain else 'Unknown',
 				self.txid,
 				self.send_amt,
 				self.timestamp,
-				self.blockcount
+				self.blockcount,
+				self.file_fmt_version
 			),
 			self.hex,
-			repr([e.__dict__ for e in self.inputs]),
-			repr([e.__dict__ for e in self.outputs])
+			self.format_io(self.inputs),
+			self.format_io(self.outputs)
 		]
 		if self.label:
 			lines.append(baseconv.b58encode(self.label.encode('utf8')))
@@ -432,11 +576,25 @@ class MMGenTX(MMGenObject):
 	# return true or false; don't exit
 	def sign(self,c,tx_num_str,keys):
 
+		self.check_signable()
+
+		if not c:
+			return self.sign_offline(tx_num_str,keys)
+
+		args = self.get_signrawtransaction_args(keys)
+		msg_r('Signing transaction{}...'.format(tx_num_str))
+		return self.process_signrawtransaction_result(c,c.signrawtransaction(*args,on_fail='return'))
+
+	def check_signable(self):
+
 		self.die_if_incorrect_chain()
 
 		if g.coin == 'BCH' and (self.has_segwit_inputs() or self.has_segwit_outputs()):
 			die(2,yellow("Segwit inputs cannot be spent or spent to on the BCH chain!"))
 
+	# the signing is split up so that batch signing can make the RPC calls concurrently
+	def get_signrawtransaction_args(self,keys):
+
 		qmsg('Passing {} key{} to bitcoind'.format(len(keys),suf(keys,'s')))
 
 		if self.has_segwit_inputs():
@@ -454,12 +612,11 @@ class MMGenTX(MMGenObject):
 				e['redeemScript'] = ag.to_segwit_redeem_script(kg.to_pubhex(keydict[d.addr]))
 			sig_data.append(e)
 
-		msg_r('Signing transaction{}...'.format(tx_num_str))
 		ht = ('ALL','ALL|FORKID')[g.coin=='BCH'] # sighashtype defaults to 'ALL'
 		wifs = [d.sec.wif for d in keys]
-#		keys.pmsg()
-#		pmsg(wifs)
-		ret = c.signrawtransaction(self.hex,sig_data,wifs,ht,on_fail='return')
+		return self.hex,sig_data,wifs,ht
+
+	def process_signrawtransaction_result(self,c,ret):
 
 		from mmgen.rpc import rpc_error,rpc_errmsg
 		if rpc_error(ret):
@@ -487,6 +644,75 @@ class MMGenTX(MMGenObject):
 				msg(repr(ret['errors']))
 				return False
 
+	# sign using the secp256k1 extension module, without bitcoind
+	def sign_offline(self,tx_num_str,keys):
+
+		try:
+			from mmgen.secp256k1 import sign,verify_batch
+		except ImportError:
+			msg(yellow('Offline signing requires the secp256k1 extension module'))
+			return False
+
+		if g.coin == 'BCH':
+			msg(yellow('Offline signing is not supported on the BCH chain'))
+			return False
+
+		from mmgen.addr import KeyGenerator
+		from mmgen.bitcoin import hash160
+		kg = KeyGenerator(2)
+		keydict = MMGenDict([(d.addr,d.sec) for d in keys])
+		dtx = DeserializedTX(self.hex)
+		ts = TxSerializer(dtx)
+
+		if [(i['txid'],i['vout']) for i in dtx['txins']] != [(i.txid,i.vout) for i in self.inputs]:
+			die(3,'Transaction inputs do not match raw transaction data!')
+
+		qmsg('Signing with {} key{} (offline)'.format(len(keys),suf(keys,'s')))
+		msg_r('Signing transaction{}...'.format(tx_num_str))
+
+		scriptsigs,witnesses,sig_chk = [],[],[]
+		for n,e in enumerate(self.inputs):
+			if e.addr not in keydict:
+				msg('failed\nNo key for input address {}'.format(e.addr))
+				return False
+			sec = keydict[e.addr]
+			pubkey = unhexlify(kg.to_pubhex(sec))
+			p2pkh = '\x76\xa9\x14' + unhexlify(hash160(hexlify(pubkey))) + '\x88\xac'
+			segwit = e.mmid and e.mmid.mmtype == 'S'
+			if segwit: # P2SH-P2WPKH
+				redeem_script = '\x00\x14' + p2pkh[3:23]
+				spk = '\xa9\x14' + unhexlify(hash160(hexlify(redeem_script))) + '\x87'
+			else:
+				spk = p2pkh
+			if unhexlify(e.scriptPubKey) != spk:
+				msg('failed\nscriptPubKey does not match key for input address {}'.format(e.addr))
+				return False
+			if segwit: # script code is the P2PKH script
+				sighash = ts.sighash_segwit(n,p2pkh,e.amt)
+			else:
+				sighash = ts.sighash_legacy(n,p2pkh)
+			sig = sign(sighash,unhexlify(sec))
+			sig_chk.append((sighash,sig,pubkey))
+			sig += chr(ts.sighash_all)
+			if segwit:
+				scriptsigs.append(push_data(redeem_script))
+				witnesses.append([sig,pubkey])
+			else:
+				scriptsigs.append(push_data(sig) + push_data(pubkey))
+				witnesses.append([])
+
+		if not all(verify_batch(sig_chk)):
+			msg('failed\nSignature verification failed!')
+			return False
+
+		self.hex = hexlify(ts.serialize(scriptsigs,witnesses))
+		vmsg('Signed transaction size: {}'.format(len(self.hex)/2))
+		dt = DeserializedTX(self.hex)
+		self.check_sigs(dt)
+		self.btc_txid = BitcoinTxID(dt['txid'],on_fail='return')
+		msg('OK')
+		return True
+
 	def mark_raw(self):
 		self.desc = 'transaction'
 		self.ext = self.raw_ext
@@ -542,16 +768,26 @@ class MMGenTX(MMGenObject):
 	def is_in_utxos(self,c):
 		return 'txid' in c.getrawtransaction(self.btc_txid,True,on_fail='silent')
 
-	def get_status(self,c,status=False):
-		if self.is_in_mempool(c):
+	def status_calls(self):
+		"RPC calls for get_status(), in the form used by gather()"
+		return (('getmempoolentry',self.btc_txid),
+				('gettransaction',self.btc_txid),
+				('getrawtransaction',self.btc_txid,True))
+
+	# The queries are independent, so they're made concurrently.  'replies' are
+	# the results of status_calls(), if the caller has already made them.
+	def get_status(self,c,status=False,replies=None):
+		mp,wtx,raw = replies or c.gather(*self.status_calls(),on_fail='silent')
+		if 'size' in mp: # is in mempool
 			msg(('Warning: transaction is in mempool!','Transaction is in mempool')[status])
-		elif self.is_in_wallet(c):
-			confs = self.is_in_wallet(c)
+			return
+		elif 'confirmations' in wtx and wtx['confirmations'] > 0: # is in wallet
+			confs = wtx['confirmations']
 			die(0,'Transaction has {} confirmation{}'.format(confs,suf(confs,'s')))
-		elif self.is_in_utxos(c):
+		elif 'txid' in raw: # is in utxos
 			die(2,red('ERROR: transaction is in the blockchain (but not in the tracking wallet)!'))
-		ret = self.is_replaced(c) # 1: replacement in mempool, 2: replacement confirmed
-		if ret:
+		if 'bip125-replaceable' in wtx and 'confirmations' in wtx: # is replaced
+			ret = -wtx['confirmations'] + 1 # 1: replacement in mempool, 2: replacement confirmed
 			die(1,'Transaction has been replaced'+('',', and the replacement TX is confirmed')[ret==2]+'!')
 
 	def send(self,c,prompt_user=True):
@@ -560,14 +796,20 @@ class MMGenTX(MMGenObject):
 
 		bogus_send = os.getenv('MMGEN_BOGUS_SEND')
 
-		if self.has_segwit_outputs() and not segwit_is_active() and not bogus_send:
+		chk_segwit = self.has_segwit_outputs() and not bogus_send
+		calls = self.status_calls()
+		if chk_segwit:
+			calls = (('getblockchaininfo',{'on_fail':'die'}),) + calls
+		rets = c.gather(*calls,on_fail='silent') # queries are independent
+
+		if chk_segwit and not segwit_is_active(d=rets.pop(0)):
 			m = 'Transaction has MMGen Segwit outputs, but this blockchain does not support Segwit'
 			die(2,m+' at the current height')
 
 		if self.get_fee() > g.max_tx_fee:
 			die(2,'Transaction fee ({}) greater than max_tx_fee ({})!'.format(self.get_fee(),g.max_tx_fee))
 
-		self.get_status(c)
+		self.get_status(c,replies=rets)
 
 		if prompt_user:
 			m1 = ("Once this transaction is sent, there's no taking it back!",'')[bool(opt.quiet)]
@@ -782,6 +1024,11 @@ class MMGenTX(MMGenObject):
 			do_err('number of lines')
 
 		metadata = metadata.split()
+		self.fmt_version = 1
+		if len(metadata) == 6:
+			if metadata.pop(-1) != 'v{}'.format(self.file_fmt_version):
+				do_err('file format version')
+			self.fmt_version = self.file_fmt_version
 		if len(metadata) not in (4,5): do_err('metadata')
 		if len(metadata) == 5:
 			t = metadata.pop(0)
@@ -796,13 +1043,15 @@ class MMGenTX(MMGenObject):
 		try: unhexlify(self.hex)
 		except: do_err('hex data')
 
-		try: self.inputs = self.decode_io('inputs',eval(inputs_data))
+		parse_io = (parse_tx_io_data_v1,iter_json_array)[self.fmt_version == 2]
+
+		try: self.inputs = self.decode_io('inputs',parse_io(inputs_data))
 		except: do_err('inputs data')
 
 		if not self.chain and not self.inputs[0].addr.testnet:
 			self.chain = 'mainnet'
 
-		try: self.outputs = self.decode_io('outputs',eval(outputs_data))
+		try: self.outputs = self.decode_io('outputs',parse_io(outputs_data))
 		except: do_err('btc-to-mmgen address map data')
 
 class MMGenBumpTX(MMGenTX):
@@ -126,7 +126,8 @@ def get_fee_from_estimate_or_user(tx,estimate_fail_msg_shown=[]):
 		start_fee = opt.tx_fee
 	else:
 		desc = 'Network-estimated'
-		ret = c.estimatefee(opt.tx_confs)
+		ret,networkinfo = c.gather(('estimatefee',opt.tx_confs),('getnetworkinfo',))
+		tx.set_relay_kb_fee(networkinfo) # for get_relay_fee()
 		if ret == -1:
 			if not estimate_fail_msg_shown:
 				msg('Network fee estimation for {} confirmations failed'.format(opt.tx_confs))
@@ -55,6 +55,15 @@ column below:
 """.format(f='\n  '.join(SeedSource.format_fmt_codes().splitlines()),
 			pnm=pnm,pnl=pnm.lower())
 
+txsign_batch_notes = """
+With the --batch option, all transaction files are read before signing begins.
+The keys needed by all the transactions are then generated in one pass, so
+each seed source is read only once and each key is generated only once, and
+the transactions are signed concurrently.  Signed transactions are written
+after signing is complete.  If any transaction fails to sign, the others are
+still written, and the exit status is 3.
+"""
+
 wmsg = {
 	'mapping_error': """
 {pnm} -> {c} address mappings differ!
@@ -102,26 +111,27 @@ def generate_kals_for_mmgen_addrs(need_keys,infiles,saved_seeds):
 				d.append(KeyAddrList(seed=seed,addr_idxs=addr_idxs,do_chksum=False,mmtype=MMGenAddrType(t)))
 	return d
 
-def add_keys(tx,src,infiles=None,saved_seeds=None,keyaddr_list=None):
+# 'index', if supplied, is an AddrListIndex of previously generated keys covering 'tx'
+def add_keys(tx,src,infiles=None,saved_seeds=None,keyaddr_list=None,index=None):
 	need_keys = [e for e in getattr(tx,src) if e.mmid and not e.have_wif]
 	if not need_keys: return []
 	desc,m1 = ('key-address file','From key-address file:') if keyaddr_list else \
 					('seed(s)','Generated from seed:')
 	qmsg('Checking {} -> {} address mappings for {} (from {})'.format(pnm,g.coin,src,desc))
-	d = MMGenList([keyaddr_list]) if keyaddr_list else \
-		generate_kals_for_mmgen_addrs(need_keys,infiles,saved_seeds)
+	if keyaddr_list:
+		index = keyaddr_list.get_index()
+	elif not index:
+		index = AddrListIndex(*generate_kals_for_mmgen_addrs(need_keys,infiles,saved_seeds))
 	new_keys = []
 	for e in need_keys:
-		for kal in d:
-			for f in kal.data:
-				mmid = '{}:{}'.format(kal.al_id,f.idx)
-				if mmid == e.mmid:
-					if f.addr == e.addr:
-						e.have_wif = True
-						if src == 'inputs':
-							new_keys.append(f)
-					else:
-						die(3,wmsg['mapping_error'].format(m1,mmid,f.addr,'tx file:',e.mmid,e.addr))
+		f = index.by_mmid.get(e.mmid)
+		if f:
+			if f.addr == e.addr:
+				e.have_wif = True
+				if src == 'inputs':
+					new_keys.append(f)
+			else:
+				die(3,wmsg['mapping_error'].format(m1,e.mmid,f.addr,'tx file:',e.mmid,e.addr))
 	if new_keys:
 		vmsg('Added %s wif key%s from %s' % (len(new_keys),suf(new_keys,'s'),desc))
 	return new_keys
@@ -163,17 +173,24 @@ def get_keylist(opt):
 		return kal
 	return None
 
+def get_non_mmgen_keys(tx,kl):
+	non_mm_addrs = tx.get_non_mmaddrs('inputs')
+	if not non_mm_addrs: return []
+	tmp = KeyAddrList(addrlist=non_mm_addrs,do_chksum=False)
+	tmp.add_wifs(kl)
+	m = tmp.list_missing('sec')
+	if m: die(2,wmsg['missing_keys_error'].format(suf(m,'es'),'\n    '.join(m)))
+	return tmp.data
+
+def check_unused_sids(sids):
+	extra_sids = set(saved_seeds) - sids
+	if extra_sids:
+		msg('Unused Seed ID{}: {}'.format(suf(extra_sids,'s'),' '.join(extra_sids)))
+
 def txsign(opt,c,tx,seed_files,kl,kal,tx_num_str=''):
 
 	keys = MMGenList() # list of AddrListEntry objects
-	non_mm_addrs = tx.get_non_mmaddrs('inputs')
-
-	if non_mm_addrs:
-		tmp = KeyAddrList(addrlist=non_mm_addrs,do_chksum=False)
-		tmp.add_wifs(kl)
-		m = tmp.list_missing('sec')
-		if m: die(2,wmsg['missing_keys_error'].format(suf(m,'es'),'\n    '.join(m)))
-		keys += tmp.data
+	keys += get_non_mmgen_keys(tx,kl)
 
 	if opt.mmgen_keys_from_file:
 		keys += add_keys(tx,'inputs',keyaddr_list=kal)
@@ -186,11 +203,56 @@ def txsign(opt,c,tx,seed_files,kl,kal,tx_num_str=''):
 	tx.delete_attrs('inputs','have_wif')
 	tx.delete_attrs('outputs','have_wif')
 
-	extra_sids = set(saved_seeds) - tx.get_input_sids() - tx.get_output_sids()
-	if extra_sids:
-		msg('Unused Seed ID{}: {}'.format(suf(extra_sids,'s'),' '.join(extra_sids)))
+	check_unused_sids(tx.get_input_sids() | tx.get_output_sids())
 
 	if tx.sign(c,tx_num_str,keys):
 		return tx
 	else:
 		die(3,red('Transaction {}could not be signed.'.format(tx_num_str)))
+
+# Sign several transactions at once.  The MMGen keys for all transactions are
+# derived together, so each seed is read and each key generated only once.  When
+# signing with bitcoind, the 'signrawtransaction' calls are made concurrently.
+# Offline signing is done serially, as the secp256k1 module holds the GIL.
+# Returns the list of transactions that were successfully signed.
+def txsign_batch(opt,c,txs,seed_files,kl,kal):
+
+	keys = []
+	for tx in txs:
+		k = MMGenList()
+		k += get_non_mmgen_keys(tx,kl)
+		if opt.mmgen_keys_from_file:
+			k += add_keys(tx,'inputs',keyaddr_list=kal)
+			add_keys(tx,'outputs',keyaddr_list=kal)
+		keys.append(k)
+
+	need_keys = [e for tx in txs for e in tx.inputs + tx.outputs if e.mmid and not e.have_wif]
+	index = AddrListIndex(*generate_kals_for_mmgen_addrs(need_keys,seed_files,saved_seeds)) \
+				if need_keys else None
+
+	for tx,k in zip(txs,keys):
+		k += add_keys(tx,'inputs',index=index)
+		add_keys(tx,'outputs',index=index)
+		tx.delete_attrs('inputs','have_wif')
+		tx.delete_attrs('outputs','have_wif')
+
+	check_unused_sids(set().union(*[tx.get_input_sids() | tx.get_output_sids() for tx in txs]))
+
+	if not c:
+		rets = [tx.sign(c,' #{}'.format(n),k) for n,(tx,k) in enumerate(zip(txs,keys),1)]
+	else:
+		for tx in txs: tx.check_signable()
+		args = [tx.get_signrawtransaction_args(k) for tx,k in zip(txs,keys)]
+		msg('Signing {} transaction{}...'.format(len(txs),suf(txs,'s')))
+		from mmgen.rpc import run_concurrently
+		res = run_concurrently([lambda a=a: c.signrawtransaction(*a,on_fail='return') for a in args])
+		rets = []
+		for n,(tx,ret) in enumerate(zip(txs,res),1):
+			msg_r('Transaction #{}...'.format(n))
+			rets.append(tx.process_signrawtransaction_result(c,ret))
+
+	failed = [str(n) for n,ret in enumerate(rets,1) if not ret]
+	if failed:
+		msg(red('Transaction{} #{} could not be signed.'.format(suf(failed,'s'),', #'.join(failed))))
+
+	return [tx for tx,ret in zip(txs,rets) if ret]
@@ -75,6 +75,25 @@ def pdie(*args):
 	if not args: sys.exit(1)
 	Die(1,(pformat(args if len(args) > 1 else args[0])))
 
+class LazyModule(object):
+	"""
+	Stand-in for a module that is imported on first attribute access.  Used for
+	heavy modules needed by only some commands, to keep startup fast for the rest.
+	Don't access the attributes of an unloaded module from a worker thread while
+	the main script is still being imported: Python 2's import lock would deadlock.
+	"""
+	def __init__(self,name):
+		self._name,self._mod = name,None
+
+	def __getattr__(self,attr):
+		if self._mod is None:
+			__import__(self._name)
+			self._mod = sys.modules[self._name]
+		return getattr(self._mod,attr)
+
+	def __repr__(self):
+		return "<lazy module '{}'{}>".format(self._name,('',' (loaded)')[self._mod is not None])
+
 def set_for_type(val,refval,desc,invert_bool=False,src=None):
 	src_str = (''," in '{}'".format(src))[bool(src)]
 	if type(refval) == bool:
@@ -240,18 +259,36 @@ def is_ascii(s,enc='ascii'):
 
 def is_utf8(s): return is_ascii(s,enc='utf8')
 
+class BaseconvDigits(dict):
+	"""
+	baseconv's digit tables.  The mnemonic wordlists are loaded from their modules
+	on first use, and their checksums are verified then.
+	"""
+	wordlists = { 'electrum': 'mmgen.mn_electrum', 'tirosh': 'mmgen.mn_tirosh' }
+
+	def __missing__(self,wl_id):
+		if wl_id not in self.wordlists:
+			raise KeyError(wl_id)
+		words = __import__(self.wordlists[wl_id],fromlist=['words']).words.split()
+		wl = self[wl_id] = tuple(words[:baseconv.mn_base])
+		if baseconv.wordlist_chksum(wl) != baseconv.wl_chksums[wl_id]:
+			del self[wl_id]
+			die(3,"'{}': wordlist checksum mismatch!".format(wl_id))
+		return wl
+
+	def __contains__(self,k):
+		return dict.__contains__(self,k) or k in self.wordlists
+
 class baseconv(object):
 
 	mn_base = 1626 # tirosh list is 1633 words long!
-	digits = {
-		'electrum': tuple(__import__('mmgen.mn_electrum',fromlist=['words']).words.split()),
-		'tirosh': tuple(__import__('mmgen.mn_tirosh',fromlist=['words']).words.split()[:mn_base]),
+	digits = BaseconvDigits({
 		'b58': tuple('123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'),
 		'b32': tuple('ABCDEFGHIJKLMNOPQRSTUVWXYZ234567'),
 		'b16': tuple('0123456789abcdef'),
 		'b10': tuple('0123456789'),
 		'b8':  tuple('01234567'),
-	}
+	})
 	wl_chksums = {
 		'electrum': '5ca31424',
 		'tirosh':   '48f05e1f', # tirosh truncated to mn_base (1626)
@@ -259,16 +296,23 @@ class baseconv(object):
 	}
 	b58pad_lens =     [(16,22), (24,33), (32,44)]
 	b58pad_lens_rev = [(v,k) for k,v in b58pad_lens]
+	_rev_digits = {}
+	_chunk_params = {}
 
+	# NB: unlike Bitcoin's base58, leading zero bytes are not preserved unless 'pad' is used
 	@classmethod
 	def b58encode(cls,s,pad=None):
 		pad = cls.get_pad(s,pad,'en',cls.b58pad_lens,[bytes])
-		return ''.join(cls.fromhex(hexlify(s),'b58',pad=pad))
+		from mmgen.base58 import encode_num
+		return encode_num(int(hexlify(s),16) if s else 0,pad=pad)
 
 	@classmethod
 	def b58decode(cls,s,pad=None):
 		pad = cls.get_pad(s,pad,'de',cls.b58pad_lens_rev,[bytes,unicode])
-		return unhexlify(cls.tohex(s,'b58',pad=pad*2 if pad else None))
+		from mmgen.base58 import decode_num,int2bytes
+		try: num = decode_num(s.strip())
+		except ValueError: die(2,'{} is not in b58 (base58) format'.format(repr(s)))
+		return int2bytes(num,pad or 0)
 
 	@staticmethod
 	def get_pad(s,pad,op,pad_map,ok_types):
@@ -282,9 +326,13 @@ class baseconv(object):
 		else:
 			return None
 
+	@staticmethod
+	def wordlist_chksum(wl):
+		return sha256(' '.join(wl)).hexdigest()[:8]
+
 	@classmethod
 	def get_wordlist_chksum(cls,wl_id):
-		return sha256(' '.join(cls.digits[wl_id])).hexdigest()[:8]
+		return cls.wordlist_chksum(cls.digits[wl_id])
 
 	@classmethod
 	def check_wordlists(cls):
@@ -304,19 +352,46 @@ class baseconv(object):
 		Msg('List is sorted') if tuple(sorted(wl)) == wl else die(3,'ERROR: List is not sorted!')
 
 
+	@classmethod
+	def get_rev_digits(cls,wl_id):
+		"Return a dict mapping the digits (words) of 'wl_id' to their values, built on first use"
+		if wl_id not in cls._rev_digits:
+			cls._rev_digits[wl_id] = dict((d,n) for n,d in enumerate(cls.digits[wl_id]))
+		return cls._rev_digits[wl_id]
+
+	# Big-number arithmetic is done on chunks of 'k' digits, where base**k fits in
+	# a machine int, leaving the per-digit work to small-int operations.  Returns
+	# 'k' and the powers of the base up to base**k.
+	@classmethod
+	def get_chunk_params(cls,base):
+		if base not in cls._chunk_params:
+			k = 1
+			while base ** (k+1) <= sys.maxint: k += 1
+			cls._chunk_params[base] = k,[base**i for i in range(k+1)]
+		return cls._chunk_params[base]
+
 	@classmethod
 	def tohex(cls,words_arg,wl_id,pad=None):
 
 		words = words_arg if type(words_arg) in (list,tuple) else tuple(words_arg.strip())
 
-		wl = cls.digits[wl_id]
-		base = len(wl)
+		rev = cls.get_rev_digits(wl_id)
+		base = len(rev)
 
-		if not set(words) <= set(wl):
+		try: digits = [rev[w] for w in words]
+		except KeyError:
 			die(2,'{} is not in {} (base{}) format'.format(repr(words_arg),wl_id,base))
 
-		deconv =  [wl.index(words[::-1][i])*(base**i) for i in range(len(words))]
-		ret = ('{:0{w}x}'.format(sum(deconv),w=pad or 0))
+		# Horner's method, a chunk at a time
+		k,pows = cls.get_chunk_params(base)
+		num = 0
+		for i in range(0,len(digits),k):
+			chunk,n = digits[i:i+k],0
+			for d in chunk:
+				n = n * base + d
+			num = num * pows[len(chunk)] + n
+
+		ret = ('{:0{w}x}'.format(num,w=pad or 0))
 		return ('','0')[len(ret) % 2] + ret
 
 	@classmethod
@@ -328,13 +403,17 @@ class baseconv(object):
 
 		wl = cls.digits[wl_id]
 		base = len(wl)
-		num,ret = int(hexnum,16),[]
+		k,pows = cls.get_chunk_params(base)
+		chunk_base,num,ret = pows[k],int(hexnum,16),[]
+		append,rk = ret.append,range(k)
 		while num:
-			ret.append(num % base)
-			num /= base
-		return [wl[n] for n in [0] * ((pad or 0)-len(ret)) + ret[::-1]]
-
-baseconv.check_wordlists()
+			num,chunk = divmod(num,chunk_base)
+			chunk = int(chunk)
+			for i in rk:
+				append(chunk % base)
+				chunk /= base
+		while ret and ret[-1] == 0: ret.pop() # leading zeroes of topmost chunk
+		return [wl[0]] * ((pad or 0)-len(ret)) + [wl[n] for n in reversed(ret)]
 
 def match_ext(addr,ext):
 	return addr.split('.')[-1] == ext
@@ -591,12 +670,36 @@ def write_data_to_file(
 			msg("Overwriting file '%s'" % outfile)
 			hush = True
 
-		f = open_file_or_exit(outfile,('w','wb')[bool(binary)])
-		try:
-			f.write(data)
-		except:
-			die(2,"Failed to write %s to file '%s'" % (desc,outfile))
-		f.close
+		# Regular files are written to a temporary file in the same directory, which
+		# is then renamed, so an interrupted write never leaves a truncated file.  The
+		# temporary file gets the mode of any file it replaces.
+		if os.path.islink(outfile) or (os.path.exists(outfile) and not os.path.isfile(outfile)):
+			f = open_file_or_exit(outfile,('w','wb')[bool(binary)])
+			try:
+				f.write(data)
+				f.close()
+			except:
+				die(2,"Failed to write %s to file '%s'" % (desc,outfile))
+		else:
+			d,fn = os.path.split(outfile)
+			tmp_fn = os.path.join(d,'.{}.{}.tmp'.format(fn,os.getpid()))
+			try:
+				fd = os.open(tmp_fn,os.O_WRONLY|os.O_CREAT|os.O_EXCL,0666)
+			except:
+				die(2,"Unable to open file '%s' for writing" % outfile)
+			try:
+				if os.path.exists(outfile):
+					os.chmod(tmp_fn,stat.S_IMODE(os.stat(outfile).st_mode))
+				f = os.fdopen(fd,('w','wb')[bool(binary)])
+				f.write(data)
+				f.close()
+				if g.platform == 'win' and os.path.exists(outfile):
+					os.unlink(outfile) # rename() doesn't replace an existing file on Windows
+				os.rename(tmp_fn,outfile)
+			except:
+				try: os.unlink(tmp_fn)
+				except: pass
+				die(2,"Failed to write %s to file '%s'" % (desc,outfile))
 
 		if not (hush or silent):
 			msg("%s written to file '%s'" % (capfirst(desc),outfile))
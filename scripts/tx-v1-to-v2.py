@@ -0,0 +1,37 @@
+#!/usr/bin/env python
+
+import sys,os
+repo_root = os.path.split(os.path.abspath(os.path.dirname(sys.argv[0])))[0]
+sys.path = [repo_root] + sys.path
+
+from mmgen.common import *
+from mmgen.tx import *
+
+opts_data = lambda: {
+	'desc':    "Convert MMGen transaction files from version 1 format to version 2 format",
+	'usage':   "[opts] <tx file>...",
+	'options': """
+-h, --help         Print this help message
+-d, --outdir=    d Write converted files to directory 'd'
+-q, --quiet        Overwrite existing files without prompting
+-S, --stdout       Write data to STDOUT instead of file
+""",
+	'notes': """
+
+Version 1 files have their inputs and outputs in Python repr() format, version 2
+files in JSON.  Both are read by {pnm}, but only version 2 files are written.
+Version 1 files are parsed without eval() (only literals and coin amounts are
+allowed), so converting untrusted files is safe.
+""".format(pnm=g.proj_name)
+}
+
+cmd_args = opts.init(opts_data)
+
+if not cmd_args: opts.usage()
+
+for infile in cmd_args:
+	tx = MMGenTX(infile)
+	if tx.fmt_version == tx.file_fmt_version:
+		msg("'{}': already in version {} format, skipping".format(infile,tx.file_fmt_version))
+		continue
+	tx.write_to_file(ask_write=False,ask_tty=False)
@@ -109,10 +109,12 @@ setup(
 		py_modules = [
 			'mmgen.__init__',
 			'mmgen.addr',
+			'mmgen.base58',
 			'mmgen.bitcoin',
 			'mmgen.color',
 			'mmgen.common',
 			'mmgen.crypto',
+			'mmgen.ecc',
 			'mmgen.filename',
 			'mmgen.globalvars',
 			'mmgen.license',
@@ -123,10 +125,13 @@ setup(
 			'mmgen.regtest',
 			'mmgen.rpc',
 			'mmgen.seed',
+			'mmgen.seedchain',
 			'mmgen.term',
 			'mmgen.test',
 			'mmgen.tool',
 			'mmgen.tw',
+			'mmgen.twbal',
+			'mmgen.twcache',
 			'mmgen.tx',
 			'mmgen.util',
 
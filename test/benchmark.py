@@ -0,0 +1,619 @@
+#!/usr/bin/env python
+#
+# mmgen = Multi-Mode GENerator, command-line Bitcoin cold storage solution
+# Copyright (C)2013-2017 Philemon <mmgen-py@yandex.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+test/benchmark.py:  Micro-benchmarks for the MMGen suite
+"""
+
+import sys,os,time
+pn = os.path.dirname(sys.argv[0])
+os.chdir(os.path.join(pn,os.pardir))
+sys.path.__setitem__(0,os.path.abspath(os.curdir))
+
+from binascii import hexlify,unhexlify
+
+# Import these _after_ local path's been added to sys.path
+from mmgen.common import *
+
+opts_data = lambda: {
+	'desc': 'Micro-benchmarks for the {} suite'.format(g.proj_name),
+	'usage':'[options] [benchmark...]',
+	'options': """
+-h, --help          Print this help message
+--, --longhelp      Print help message for long options (common options)
+-l, --list          List the available benchmarks
+-r, --rounds=     n Run each benchmark for 'n' rounds (default: benchmark-specific)
+-q, --quiet         Produce quieter output
+-v, --verbose       Produce more verbose output
+""",
+	'notes': """
+
+If no benchmark is given, all benchmarks are run.  Each benchmark times the
+current code and, where one exists, a reference implementation of the code it
+replaced, and checks that their results are identical.
+"""
+}
+
+sys.argv = [sys.argv[0]] + ['--skip-cfg-file'] + sys.argv[1:]
+
+cmd_args = opts.init(opts_data)
+
+def timeit(func,rounds):
+	start = time.time()
+	ret = func(rounds)
+	return ret,time.time() - start
+
+def compare(desc,unit,rounds,new,old=None,old_rounds=None):
+	"""
+	Run 'new' and (optionally) 'old' for 'rounds' rounds, check results and print rates.
+	Slow reference code may be run for fewer rounds ('old_rounds').
+	"""
+	rounds = int(opt.rounds or rounds)
+	msg_r('{:32} '.format(desc+':'))
+	r_new,t_new = timeit(new,rounds)
+	fs = '{:>10.0f} {}/s'
+	if old:
+		o_rounds = min(rounds,old_rounds or rounds)
+		r_old,t_old = timeit(old,o_rounds)
+		if (r_new if o_rounds == rounds else new(o_rounds)) != r_old:
+			die(3,'\n{}: results differ!'.format(desc))
+		msg((fs+'  (old: '+fs+', {:.1f}x)').format(
+			rounds/t_new,unit,o_rounds/t_old,unit,rounds*t_old/(o_rounds*t_new)))
+	else:
+		msg(fs.format(rounds/t_new,unit))
+
+# Reference implementations of replaced code, for comparison:
+class old(object):
+
+	b58a = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+
+	@classmethod
+	def numtob58(cls,num):
+		ret = []
+		while num:
+			ret.append(cls.b58a[num % 58])
+			num /= 58
+		return ''.join(ret)[::-1]
+
+	@classmethod
+	def b58tonum(cls,b58num):
+		b58num = b58num.strip()
+		for i in b58num:
+			if not i in cls.b58a: return False
+		return sum(cls.b58a.index(n) * (58**i) for i,n in enumerate(list(b58num[::-1])))
+
+	@classmethod
+	def hexaddr2addr(cls,hexaddr):
+		from mmgen.bitcoin import hash256
+		s = '00' + hexaddr
+		lzeroes = (len(s) - len(s.lstrip('0'))) / 2
+		return ('1' * lzeroes) + cls.numtob58(int(s+hash256(s)[:8],16))
+
+	@classmethod
+	def addr2hexaddr(cls,addr):
+		from mmgen.bitcoin import hash256
+		addr_hex = '{:050x}'.format(cls.b58tonum(addr))
+		assert hash256(addr_hex[:42])[:8] == addr_hex[42:]
+		return addr_hex[2:42]
+
+	@staticmethod
+	def listaddresses(c,minconf=1,showempty=False,showbtcaddrs=False):
+		from mmgen.obj import BTCAmt,BTCAddr,MMGenID,MMGenList,TwLabel,TwComment
+		usr_addr_list = []
+		def check_dup_mmid(accts):
+			m_prev = None
+			for m in sorted(b.mmid for b in [a for a in accts if a]):
+				if m == m_prev: die(3,'Duplicate MMGen ID ({})'.format(m))
+				m_prev = m
+
+		def check_addr_array_lens(acct_pairs):
+			for label,addrs in acct_pairs:
+				if label and len(addrs) != 1: die(3,'Tracking wallet is corrupted!')
+
+		addrs = {}
+		total = BTCAmt('0')
+		for d in c.listunspent(0,stream=True):
+			if not 'account' in d: continue
+			if d['confirmations'] < minconf: continue
+			label = TwLabel(d['account'],on_fail='silent')
+			if label:
+				if usr_addr_list and (label.mmid not in usr_addr_list): continue
+				if label.mmid in addrs:
+					if addrs[label.mmid]['addr'] != d['address']: die(2,'duplicate address')
+				else:
+					addrs[label.mmid] = { 'amt':BTCAmt('0'), 'lbl':label, 'addr':BTCAddr(d['address']) }
+				addrs[label.mmid]['amt'] += d['amount']
+				total += d['amount']
+
+		if showempty:
+			acct_list = [k for k,v in c.listaccounts(0,True,stream=True)]
+			acct_labels = MMGenList([TwLabel(a,on_fail='silent') for a in acct_list])
+			check_dup_mmid(acct_labels)
+			acct_addrs = c.getaddressesbyaccount([[a] for a in acct_list],batch=True)
+			addr_pairs = zip(acct_labels,acct_addrs)
+			check_addr_array_lens(addr_pairs)
+			for label,addr_arr in addr_pairs:
+				if not label: continue
+				if usr_addr_list and (label.mmid not in usr_addr_list): continue
+				if label.mmid not in addrs:
+					addrs[label.mmid] = { 'amt':BTCAmt('0'), 'lbl':label, 'addr':'' }
+					if showbtcaddrs:
+						addrs[label.mmid]['addr'] = BTCAddr(addr_arr[0])
+
+		out = ([],[green('Chain: {}'.format(g.chain.upper()))])[g.chain in ('testnet','regtest')]
+		fs = ('{mid} {cmt} {amt}','{mid} {addr} {cmt} {amt}')[showbtcaddrs]
+		mmaddrs = [k for k in addrs.keys() if k.type == 'mmgen']
+		max_mmid_len = max(len(k) for k in mmaddrs) + 2 if mmaddrs else 10
+		max_cmt_len =  max(max(len(addrs[k]['lbl'].comment) for k in addrs),7)
+		out += [fs.format(
+				mid=MMGenID.fmtc('MMGenID',width=max_mmid_len),
+				addr=BTCAddr.fmtc('ADDRESS'),
+				cmt=TwComment.fmtc('COMMENT',width=max_cmt_len),
+				amt='BALANCE'
+				)]
+		al_id_save = None
+		for mmid in sorted(addrs,key=lambda j: j.sort_key):
+			if mmid.type == 'mmgen':
+				if al_id_save and al_id_save != mmid.obj.al_id:
+					out.append('')
+				al_id_save = mmid.obj.al_id
+				mmid_disp = mmid
+			else:
+				if al_id_save:
+					out.append('')
+					al_id_save = None
+				mmid_disp = mmid.type
+			out.append(fs.format(
+				mid = MMGenID.fmtc(mmid_disp,width=max_mmid_len,color=True),
+				addr=(addrs[mmid]['addr'].fmt(color=True) if showbtcaddrs else None),
+				cmt=addrs[mmid]['lbl'].comment.fmt(width=max_cmt_len,color=True,nullrepl='-'),
+				amt=addrs[mmid]['amt'].fmt('3.0',color=True)))
+		out.append('\nTOTAL: {} {}'.format(total.hl(color=True),g.coin))
+		return '\n'.join(out)
+
+	@staticmethod
+	def deserialize_tx(txhex):
+		from collections import OrderedDict
+		from hashlib import sha256
+		from mmgen.obj import MMGenList
+		from mmgen.tx import bytes2int,bytes2btc
+		tx = list(unhexlify(txhex))
+		tx_copy = tx[:]
+
+		def hshift(l,n,reverse=False):
+			ret = l[:n]
+			del l[:n]
+			return hexlify(''.join(ret[::-1] if reverse else ret))
+
+		def readVInt(l):
+			s = int(hexlify(l[0]),16)
+			bytes_len = 1 if s < 0xfd else 2 if s == 0xfd else 4 if s == 0xfe else 8
+			if bytes_len != 1: del l[0]
+			ret = int(hexlify(''.join(l[:bytes_len][::-1])),16)
+			del l[:bytes_len]
+			return ret
+
+		d = { 'version': bytes2int(hshift(tx,4)) }
+		has_witness = (False,True)[hexlify(tx[0])=='00']
+		if has_witness:
+			u = hshift(tx,2)[2:]
+			del tx_copy[-len(tx)-2:-len(tx)]
+
+		d['num_txins'] = readVInt(tx)
+		d['txins'] = MMGenList([OrderedDict((
+			('txid',      hshift(tx,32,reverse=True)),
+			('vout',      bytes2int(hshift(tx,4))),
+			('scriptSig', hshift(tx,readVInt(tx))),
+			('nSeq',      hshift(tx,4,reverse=True))
+		)) for i in range(d['num_txins'])])
+
+		d['num_txouts'] = readVInt(tx)
+		d['txouts'] = MMGenList([OrderedDict((
+			('amount',       bytes2btc(hshift(tx,8))),
+			('scriptPubKey', hshift(tx,readVInt(tx)))
+		)) for i in range(d['num_txouts'])])
+
+		d['witness_size'] = 0
+		if has_witness:
+			del tx_copy[-len(tx):-4]
+			wd,tx = tx[:-4],tx[-4:]
+			d['witness_size'] = len(wd) + 2
+			for i in range(len(d['txins'])):
+				if hexlify(wd[0]) == '00':
+					hshift(wd,1)
+					continue
+				d['txins'][i]['witness'] = [hshift(wd,readVInt(wd)) for item in range(readVInt(wd))]
+
+		d['lock_time'] = bytes2int(hshift(tx,4))
+		d['txid'] = hexlify(sha256(sha256(''.join(tx_copy)).digest()).digest()[::-1])
+
+		keys = 'txid','version','lock_time','witness_size','num_txins','txins','num_txouts','txouts'
+		return OrderedDict((k,d[k]) for k in keys)
+
+	@staticmethod
+	def format_tx(tx): # version 1 transaction file
+		from mmgen.util import make_chksum_6
+		lines = [
+			'{} {} {} {} {}'.format(tx.chain.upper(),tx.txid,tx.send_amt,tx.timestamp,tx.blockcount),
+			tx.hex,
+			repr([e.attrs() for e in tx.inputs]),
+			repr([e.attrs() for e in tx.outputs])
+		]
+		return [make_chksum_6(' '.join(lines))] + lines
+
+	@staticmethod
+	def add_keys(tx,src,keyaddr_list):
+		need_keys = [e for e in getattr(tx,src) if e.mmid and not e.have_wif]
+		new_keys = []
+		for e in need_keys:
+			for kal in [keyaddr_list]:
+				for f in kal.data:
+					mmid = '{}:{}'.format(kal.al_id,f.idx)
+					if mmid == e.mmid:
+						if f.addr == e.addr:
+							e.have_wif = True
+							if src == 'inputs':
+								new_keys.append(f)
+		return new_keys
+
+	@staticmethod
+	def add_wifs(al,key_list):
+		for d in al.data:
+			for e in key_list.data:
+				if e.addr and e.sec and e.addr == d.addr:
+					d.sec = e.sec
+
+	# MMGenListItem and its attribute descriptors, with attributes in an instance dict:
+	class MMGenImmutableAttr(object):
+
+		def __init__(self,name,dtype,typeconv=True):
+			self.typeconv = typeconv
+			self.name = name
+			self.dtype = dtype
+
+		def __get__(self,instance,owner):
+			return instance.__dict__[self.name]
+
+		def set_attr_ok(self,instance):
+			return not hasattr(instance,self.name)
+
+		def __set__(self,instance,value):
+			if not self.set_attr_ok(instance):
+				raise AttributeError("Attribute '{}' cannot be reassigned".format(self.name))
+			if self.typeconv:
+				import mmgen.obj
+				instance.__dict__[self.name] = (vars(mmgen.obj)[self.dtype](value,on_fail='raise')
+					if type(self.dtype) == str else self.dtype(value))
+			else:
+				if type(value) != self.dtype:
+					raise TypeError("Attribute '{}' has wrong type".format(self.name))
+				instance.__dict__[self.name] = value
+
+	class MMGenListItemAttr(MMGenImmutableAttr):
+
+		def __init__(self,name,dtype,typeconv=True,reassign_ok=False):
+			self.reassign_ok = reassign_ok
+			old.MMGenImmutableAttr.__init__(self,name,dtype,typeconv=typeconv)
+
+		def __get__(self,instance,owner):
+			return instance.__dict__[self.name] if self.name in instance.__dict__ else None
+
+		def set_attr_ok(self,instance):
+			return getattr(instance,self.name) == None or self.reassign_ok
+
+	class MMGenListItem(object):
+
+		def __init__(self,*args,**kwargs):
+			for k in kwargs:
+				if kwargs[k] != None:
+					setattr(self,k,kwargs[k])
+
+		def __setattr__(self,name,value):
+			if name not in type(self).__dict__:
+				raise AttributeError("'{}': no such attribute".format(name))
+			return object.__setattr__(self,name,value)
+
+	# a copy of slotted MMGenListItem subclass 'cls' using the classes above
+	@classmethod
+	def list_item_class(cls,new_cls):
+		from mmgen.obj import MMGenListItemAttr
+		def conv(a):
+			if isinstance(a,MMGenListItemAttr):
+				return cls.MMGenListItemAttr(a.name,a.dtype,a.typeconv,a.reassign_ok)
+			return cls.MMGenImmutableAttr(a.name,a.dtype,a.typeconv)
+		return type(new_cls.__name__,(cls.MMGenListItem,),
+					dict((k,conv(a)) for k,a in new_cls._attrs.items()))
+
+	@staticmethod
+	def remove_dup_keys(al,cmplist):
+		pop_list = []
+		for n,d in enumerate(al.data):
+			for e in cmplist.data:
+				if e.sec.wif == d.sec.wif:
+					pop_list.append(n)
+		for n in reversed(pop_list): al.data.pop(n)
+
+def bench_b58(rounds=20000):
+	from mmgen.bitcoin import hexaddr2addr,verify_addr
+	hexaddrs = [hexlify(os.urandom(20)) for i in range(rounds)]
+	addrs = [hexaddr2addr(h,testnet=False) for h in hexaddrs]
+
+	def new_enc(n): return [hexaddr2addr(h,testnet=False) for h in hexaddrs[:n]]
+	def old_enc(n): return [old.hexaddr2addr(h) for h in hexaddrs[:n]]
+	compare('base58check encode (hexaddr2addr)','addrs',rounds,new_enc,old_enc)
+
+	def new_dec(n): return [verify_addr(a,return_dict=True,testnet=False)['hex'] for a in addrs[:n]]
+	def old_dec(n): return [old.addr2hexaddr(a) for a in addrs[:n]]
+	compare('base58check decode (verify_addr)','addrs',rounds,new_dec,old_dec)
+
+def bench_addr(rounds=20000):
+	from mmgen.obj import PrivKey,BTCAddr
+	from mmgen.addr import AddrGenerator,KeyGenerator
+	from mmgen.bitcoin import hexaddr2addr,hash160,pubhex2segwitaddr
+	kg = KeyGenerator(silent=True)
+	pubs = kg.to_pubhex_list([PrivKey(os.urandom(32),True) for i in range(min(rounds,2000))])
+	pubs = (pubs * (rounds/len(pubs)+1))[:rounds]
+
+	# old: hex pipeline, with address verified by BTCAddr()
+	for atype,hex_f in (
+			('p2pkh', lambda p: BTCAddr(hexaddr2addr(hash160(p)))),
+			('segwit',lambda p: BTCAddr(pubhex2segwitaddr(p)))):
+		ag = AddrGenerator(atype)
+		def new_f(n): return [(a,a.hex) for a in map(ag.to_addr,pubs[:n])]
+		def old_f(n): return [(a,a.hex) for a in map(hex_f,pubs[:n])]
+		compare('pubkey -> address ({})'.format(atype),'addrs',rounds,new_f,old_f)
+
+def bench_dtx(rounds=5):
+	from struct import pack
+	from mmgen.tx import DeserializedTX,vint
+	nins = 2000
+	def make_tx(segwit):
+		ins = ''.join([os.urandom(32) + pack('<I',i) + ('\0' if segwit else vint(107) + os.urandom(107))
+						+ '\xff'*4 for i in range(nins)])
+		outs = ''.join([pack('<Q',10**8+i) + vint(25) + os.urandom(25) for i in range(2)])
+		wit = ''.join(['\x02' + vint(72) + os.urandom(72) + vint(33) + os.urandom(33)
+						for i in range(nins)]) if segwit else ''
+		return hexlify(pack('<I',1) + ('','\0\1')[segwit] + vint(nins) + ins + vint(2) + outs
+						+ wit + pack('<I',0))
+
+	qmsg('{} inputs'.format(nins))
+	for desc,segwit in (('non-segwit',False),('segwit',True)):
+		txhex = make_tx(segwit)
+		def new_f(n): return [DeserializedTX(txhex) for i in range(n)]
+		def old_f(n): return [old.deserialize_tx(txhex) for i in range(n)]
+		compare('DeserializedTX ({})'.format(desc),'txs',rounds,new_f,old_f)
+
+def bench_txload(rounds=20):
+	from mmgen.obj import BTCAmt,BTCAddr,MMGenID,MMGenTxID,TwComment
+	from mmgen.tx import MMGenTX,iter_json_array,parse_tx_io_data_v1
+	from mmgen.bitcoin import hexaddr2addr
+	nins = 2000
+	def rand_addr(): return BTCAddr(hexaddr2addr(hexlify(os.urandom(20)),testnet=False))
+	tx = MMGenTX()
+	for i in range(nins):
+		tx.inputs.append(tx.MMGenTxInput(txid=hexlify(os.urandom(32)),vout=i%5,
+			amt=BTCAmt('1.{:08}'.format(i)),label=TwComment('label {}'.format(i)),
+			mmid=MMGenID('DEADBEEF:L:{}'.format(i+1)),addr=rand_addr(),confs=100+i,
+			scriptPubKey=hexlify(os.urandom(25))))
+	for i in range(2):
+		tx.outputs.append(tx.MMGenTxOutput(amt=BTCAmt('2.5'),addr=rand_addr(),is_chg=bool(i),
+			mmid=MMGenID('DEADBEEF:L:{}'.format(i+5000))))
+	tx.hex,tx.txid,tx.chain = '00'*100,MMGenTxID('ABCDEF'),'mainnet'
+	tx.timestamp,tx.blockcount = '20170101_000000',1
+	tx.format()
+	v1,v2 = old.format_tx(tx),tx.fmt_data.splitlines()
+	qmsg('{} inputs'.format(nins))
+
+	def io_data(t): return [e.attrs() for e in t.inputs + t.outputs]
+	def load(lines):
+		t = MMGenTX()
+		t.parse_tx_data(lines[:])
+		return io_data(t)
+	compare('load tx file (v2, old: v1)','txs',rounds,lambda n: [load(v2) for i in range(n)],
+		lambda n: [load(v1) for i in range(n)])
+
+	def new_f(n): return [tx.decode_io('inputs',iter_json_array(v2[3])) for i in range(n)]
+	def old_f(n): return [tx.decode_io('inputs',eval(v1[3],{'BTCAmt':BTCAmt})) for i in range(n)]
+	compare('inputs (v2: JSON, old: v1 eval)','txs',rounds,
+		lambda n: [[e.attrs() for e in l] for l in new_f(n)],
+		lambda n: [[e.attrs() for e in l] for l in old_f(n)])
+
+	compare('v1 inputs (safe parser vs eval)','txs',rounds,
+		lambda n: [parse_tx_io_data_v1(v1[3]) for i in range(n)],
+		lambda n: [eval(v1[3],{'BTCAmt':BTCAmt}) for i in range(n)])
+
+class MockRPC(object):
+	"Stand-in for the tracking wallet RPC calls, serving canned data"
+
+	def __init__(self,unspent,accts):
+		self.unspent,self.accts = unspent,accts
+
+	def listunspent(self,minconf,stream=False):
+		return iter(self.unspent)
+
+	def listaccounts(self,minconf,watchonly,stream=False):
+		return ((a,0) for a in self.accts)
+
+	def getaddressesbyaccount(self,args,batch=False):
+		return [[self.accts[a[0]]] for a in args]
+
+def bench_listaddr(rounds=20000):
+	import random
+	from decimal import Decimal
+	from mmgen.bitcoin import hexaddr2addr
+	from mmgen.tw import TwAddrList
+	from mmgen.twbal import TwBalance
+	random.seed(1)
+	g.chain = 'mainnet' # normally set on connecting to bitcoind
+	g.tw_cache = False # MockRPC serves 'listunspent' only
+	accts,unspent = {},[]
+	for i in range(rounds):
+		sid = ('DEADBEEF','FEEDFACE')[i % 2]
+		acct = '{}:L:{}'.format(sid,i/2+1) + ('',' label {}'.format(i))[i % 3 == 0]
+		if i % 50 == 0: acct = 'btc:' + hexaddr2addr(hexlify(os.urandom(20)),testnet=False)
+		accts[acct] = hexaddr2addr(hexlify(os.urandom(20)),testnet=False)
+		for j in range((0,1,3)[i % 3]): # a third of the addresses are empty
+			unspent.append({
+				'account':acct, 'address':accts[acct], 'confirmations':random.randint(0,100),
+				'spendable':False,
+				'amount':Decimal('{}.{:08}'.format(random.randint(0,10),random.randint(0,10**8-1)))})
+	c = MockRPC(unspent,accts)
+	qmsg('{} addresses, {} unspent outputs'.format(len(accts),len(unspent)))
+
+	for desc,kwargs in (
+			('balances',{}),
+			('all, with addresses',{'showempty':True,'showbtcaddrs':True})):
+		sba = 'showbtcaddrs' in kwargs
+		def new_f(n): return '\n'.join(TwAddrList(bal=TwBalance(c),**kwargs).format(showbtcaddrs=sba))
+		def old_f(n): return old.listaddresses(c,**kwargs)
+		compare('listaddresses ({})'.format(desc),'addrs',rounds,new_f,old_f)
+
+def bench_keyidx(rounds=10000):
+	from mmgen.obj import PrivKey,BTCAddr,MMGenID,AddrIdx,AddrListID,SeedID,MMGenAddrType
+	from mmgen.addr import AddrListEntry,AddrListList,KeyAddrList,KeyList
+	from mmgen.tx import MMGenTX
+	from mmgen.txsign import add_keys
+	from mmgen.bitcoin import hexaddr2addr
+	g.chain = 'mainnet'
+	nkeys = rounds * 10
+	def rand_addr(): return BTCAddr(hexaddr2addr(hexlify(os.urandom(20)),testnet=False))
+	al_id = AddrListID(SeedID(sid='DEADBEEF'),MMGenAddrType('L'))
+	kal = KeyAddrList(al_id=al_id,adata=AddrListList([AddrListEntry(idx=AddrIdx(i),addr=rand_addr(),
+			sec=PrivKey(os.urandom(32),True)) for i in range(1,nkeys+1)]))
+	step = nkeys / rounds
+	tx = MMGenTX()
+	for i in range(rounds):
+		f = kal.data[i*step]
+		tx.inputs.append(tx.MMGenTxInput(mmid=MMGenID('{}:{}'.format(al_id,f.idx)),addr=f.addr))
+	qmsg('{} inputs, {} keys'.format(rounds,nkeys))
+	opt.quiet = True # add_keys() is chatty
+
+	def ak(f,n):
+		t = MMGenTX()
+		t.inputs = tx.inputs[:n]
+		t.delete_attrs('inputs','have_wif')
+		return [e.idx for e in f(t)]
+	compare('add_keys()','inputs',rounds,
+		lambda n: ak(lambda t: add_keys(t,'inputs',keyaddr_list=kal),n),
+		lambda n: ak(lambda t: old.add_keys(t,'inputs',kal),n),old_rounds=20)
+
+	addrs = [kal.data[i*step].addr for i in range(rounds)]
+	def aw(f,n):
+		al = KeyAddrList(addrlist=addrs[:n],do_chksum=False)
+		f(al)
+		return sorted((e.addr,e.sec) for e in al.data)
+	compare('add_wifs()','addrs',rounds,
+		lambda n: aw(lambda al: al.add_wifs(kal),n),
+		lambda n: aw(lambda al: old.add_wifs(al,kal),n),old_rounds=20)
+
+	keys = [(PrivKey(os.urandom(32),True),kal.data[i*step].sec)[i % 2] for i in range(rounds)]
+	def rd(f,n):
+		kl = KeyList(al_id=al_id,adata=AddrListList([AddrListEntry(idx=AddrIdx(i+1),sec=k)
+				for i,k in enumerate(keys[:n])]))
+		f(kl)
+		return [e.sec for e in kl.data]
+	compare('remove_dup_keys()','keys',rounds,
+		lambda n: rd(lambda kl: kl.remove_dup_keys(kal),n),
+		lambda n: rd(lambda kl: old.remove_dup_keys(kl,kal),n),old_rounds=20)
+
+def bench_listitem(rounds=50000):
+	from mmgen.obj import PrivKey,BTCAddr,AddrIdx
+	from mmgen.addr import AddrListEntry
+	from mmgen.tx import MMGenTX
+	from mmgen.bitcoin import hexaddr2addr
+	g.chain = 'mainnet'
+	OldAddrListEntry = old.list_item_class(AddrListEntry)
+	OldTxInput = old.list_item_class(MMGenTX.MMGenTxInput)
+	n = int(opt.rounds or rounds)
+	addrs = [BTCAddr(hexaddr2addr(hexlify(os.urandom(20)),testnet=False)) for i in range(n)]
+	secs = [PrivKey(os.urandom(32),True) for i in range(n)]
+	idxs = [AddrIdx(i+1) for i in range(n)]
+
+	def ale(f,n): return [(e.idx,e.addr,e.sec) for e in [f(idxs[i],addrs[i],secs[i]) for i in range(n)]]
+	compare('AddrListEntry()','entries',rounds,
+		lambda n: ale(lambda i,a,s: AddrListEntry(idx=i,addr=a,sec=s),n),
+		lambda n: ale(lambda i,a,s: OldAddrListEntry(idx=i,addr=a,sec=s),n))
+	compare('AddrListEntry.trusted()','entries',rounds,
+		lambda n: ale(lambda i,a,s: AddrListEntry.trusted(idx=i,addr=a,sec=s),n),
+		lambda n: ale(lambda i,a,s: OldAddrListEntry(idx=i,addr=a,sec=s),n))
+
+	# as read from a transaction file
+	inputs = [{ 'txid': unicode(hexlify(os.urandom(32))), 'vout': i % 4,
+				'amt': u'{}.00000001'.format(i), 'addr': unicode(addrs[i]),
+				'scriptPubKey': unicode('76a914'+hexlify(os.urandom(20))+'88ac'),
+				'confs': i, 'label': u'' } for i in range(n)]
+	def txi(cls,n): return [(e.txid,e.vout,e.amt,e.addr) for e in [cls(**d) for d in inputs[:n]]]
+	compare('MMGenTxInput()','inputs',rounds,
+		lambda n: txi(MMGenTX.MMGenTxInput,n),
+		lambda n: txi(OldTxInput,n))
+
+	def size(e): return sys.getsizeof(e) + (sys.getsizeof(e.__dict__) if hasattr(e,'__dict__') else 0)
+	for desc,new_e,old_e in (
+			('AddrListEntry',AddrListEntry(idx=idxs[0],addr=addrs[0],sec=secs[0]),
+				OldAddrListEntry(idx=idxs[0],addr=addrs[0],sec=secs[0])),
+			('MMGenTxInput',MMGenTX.MMGenTxInput(**inputs[0]),OldTxInput(**inputs[0]))):
+		msg('{:32} {:>10} bytes     (old: {:>6} bytes)'.format(desc+' memory:',size(new_e),size(old_e)))
+
+def bench_startup(rounds=5):
+	import subprocess
+	scripts = sorted(f for f in os.listdir('.') if f[:6] == 'mmgen-')
+	devnull = open(os.devnull,'w')
+	# old: wordlists loaded and checked when mmgen.util is imported
+	old_pre = ';'.join((
+		'import sys',
+		'sys.argv = {!r}',
+		'from mmgen.util import baseconv',
+		'[baseconv.digits[k] for k in baseconv.wl_chksums]',
+		'{}',
+		'execfile({!r})' ))
+	def run(cmd,n):
+		for i in range(n): subprocess.check_call(cmd,stdout=devnull,stderr=devnull)
+	for s in scripts:
+		compare('{} --help'.format(s),'runs',rounds,
+			lambda n: run([sys.executable,s,'--help'],n),
+			lambda n: run([sys.executable,'-c',old_pre.format([s,'--help'],'pass',s)],n))
+	# old: mmgen-tool imports everything any of its commands might need
+	old_imports = 'import mmgen.bitcoin,mmgen.crypto,mmgen.tx,mmgen.addr,mmgen.seed,ecdsa'
+	for c in ('hextob58 ff','hash160 00','wif2hex 5HueCGU8rMjxEXxiPuD5BDku4MkFqeZyd4dZ1jvhTVqvbTLvyTJ'):
+		argv = ['mmgen-tool'] + c.split()
+		compare(' '.join(argv[:2]),'runs',rounds,
+			lambda n: run([sys.executable]+argv,n),
+			lambda n: run([sys.executable,'-c',old_pre.format(argv,old_imports,argv[0])],n))
+
+from collections import OrderedDict
+cmd_data = OrderedDict([
+	('b58', ('Base58Check address encoding/decoding',bench_b58)),
+	('addr', ('pubkey to address conversion',bench_addr)),
+	('listaddr', ('tracking wallet address listing (mocked RPC)',bench_listaddr)),
+	('dtx',      ('transaction deserialization',bench_dtx)),
+	('txload',   ('transaction file loading',bench_txload)),
+	('keyidx',   ('key lookup in transaction signing',bench_keyidx)),
+	('listitem', ('list item construction and memory use',bench_listitem)),
+	('startup',  ('startup time of the mmgen-* scripts',bench_startup)),
+])
+
+if opt.list:
+	for k,v in cmd_data.items(): Msg('{:16} {}'.format(k,v[0]))
+	sys.exit(0)
+
+for k in cmd_args:
+	if k not in cmd_data: die(1,"'{}': unrecognized benchmark".format(k))
+
+for k in cmd_args or cmd_data:
+	qmsg(green(cmd_data[k][0]))
+	cmd_data[k][1](*([int(opt.rounds)] if opt.rounds else []))
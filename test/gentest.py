@@ -49,12 +49,15 @@ opts_data = lambda: {
           where a and b are one of:
              '1' - native Python ecdsa library (very slow)
              '2' - bitcoincore.org's secp256k1 library (default from v0.8.6)
+             '3' - native Python ECC with precomputed tables (fallback for '2')
 
 EXAMPLES:
   {prog} 1:2 100
     (compare output of native Python ECDSA with secp256k1 library, 100 rounds)
   {prog} 2 1000
     (test speed of secp256k1 library address generation, 1000 rounds)
+  {prog} 2:3 1000
+    (compare output of secp256k1 library with native Python ECC, 1000 rounds)
   {prog} 2 my.dump
     (compare addrs generated with secp256k1 library to bitcoind wallet dump)
 """.format(prog='gentest.py',pnm=g.proj_name,snum=rounds)
@@ -126,6 +129,7 @@ if a and b:
 	last_t = time.time()
 	kg_a = KeyGenerator(a)
 	kg_b = KeyGenerator(b)
+	secs,addrs = [],[]
 
 	for i in range(rounds):
 		if time.time() - last_t >= 0.1:
@@ -137,10 +141,18 @@ if a and b:
 		vmsg('\nkey:  %s\naddr: %s\n' % (sec.wif,a_addr))
 		if a_addr != b_addr:
 			match_error(sec,sec.wif,a_addr,b_addr,a,b)
+		secs.append(sec)
+		addrs.append(a_addr)
 		if not opt.segwit:
 			compressed = not compressed
 	qmsg_r('\rRound %s/%s ' % (i+1,rounds))
 
+	qmsg_r('\nComparing batch output ')
+	for n,kg in (a,kg_a),(b,kg_b):
+		for sec,a_addr,b_addr in zip(secs,addrs,map(ag.to_addr,kg.to_pubhex_list(secs))):
+			if a_addr != b_addr:
+				match_error(sec,sec.wif,a_addr,b_addr,a,n)
+
 	qmsg(green(('\n','')[bool(opt.verbose)] + 'OK'))
 elif a and not fh:
 	m = "Testing speed of address generator '{}'"
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+#
+# mmgen = Multi-Mode GENerator, command-line Bitcoin cold storage solution
+# Copyright (C)2013-2017 Philemon <mmgen-py@yandex.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+test/seedchaintest.py:  Test seed chain checkpoints
+"""
+
+import sys,os
+pn = os.path.dirname(sys.argv[0])
+os.chdir(os.path.join(pn,os.pardir))
+sys.path.__setitem__(0,os.path.abspath(os.curdir))
+
+import random,shutil,tempfile
+
+# Import these _after_ local path's been added to sys.path
+from mmgen.common import *
+from mmgen.addr import AddrList
+from mmgen.seedchain import SeedChainCheckpoints
+
+rounds = 20
+opts_data = lambda: {
+	'desc': 'Test seed chain checkpoints against the plain sha512 seed chain',
+	'usage':'[options] [rounds]',
+	'options': """
+-h, --help       Print this help message
+--, --longhelp   Print help message for long options (common options)
+-q, --quiet      Produce quieter output
+-v, --verbose    Produce more verbose output
+""",
+	'notes': """
+Each round walks the chains of a random seed with random checkpoint intervals
+and index lists (default: {} rounds)
+""".format(rounds)
+}
+
+sys.argv = [sys.argv[0]] + ['--skip-cfg-file'] + sys.argv[1:]
+
+cmd_args = opts.init(opts_data)
+
+if len(cmd_args) > 1: opts.usage()
+if cmd_args:
+	try:
+		rounds = int(cmd_args[0])
+		assert rounds > 0
+	except:
+		die(1,"'rounds' must be a positive integer")
+
+sid = 'DEADBEEF'
+
+def check(desc,cond):
+	if not cond:
+		rdie(2,'\n{}: test failed!'.format(desc))
+	vmsg('  {}: OK'.format(desc))
+
+def rand_nums(maxnum):
+	return sorted(random.sample(xrange(1,maxnum+1),random.randint(1,min(maxnum,12))))
+
+def walk(seed,interval,nums):
+	ck = SeedChainCheckpoints(sid,seed,interval)
+	return ck,list(ck.walk(seed,nums))
+
+def ref_walk(seed,nums):
+	return list(AddrList.walk_seed_chain(seed,nums))
+
+def test_walk(seed):
+	"walks with random intervals and index lists, each walk extending the saved checkpoints"
+	interval = random.choice((1,2,3,7,10,64))
+	maxnum = interval * random.randint(1,20)
+	for i in range(4):
+		nums = rand_nums(maxnum)
+		if i == 3 and nums[-1] != maxnum: nums.append(maxnum) # at least one checkpoint
+		ck,ret = walk(seed,interval,nums)
+		check('walk {} ({} checkpoints loaded)'.format(i+1,ck.num_loaded),ret == ref_walk(seed,nums))
+		maxnum += interval * random.randint(0,10)
+	return interval
+
+def test_reload(seed,interval):
+	"saved checkpoints equal the plain chain states and are reloaded unchanged"
+	ck = SeedChainCheckpoints(sid,seed,interval)
+	n = len(ck.states)
+	check('checkpoints loaded',n > 0 and ck.num_loaded == n)
+	nums = [interval * (i+1) for i in range(n)]
+	check('checkpoint states',ck.states == [s for num,s in ref_walk(seed,nums)])
+	list(ck.walk(seed,rand_nums(interval * n)))
+	check('no checkpoints added',SeedChainCheckpoints(sid,seed,interval).states == ck.states)
+
+def test_bad_file(seed,interval):
+	"checkpoint files with a wrong interval, a wrong seed or altered data are ignored"
+	fn = SeedChainCheckpoints(sid,seed,interval).fn
+	data = open(fn,'rb').read()
+
+	check('wrong interval',SeedChainCheckpoints(sid,seed,interval+1).states == [])
+
+	seed2 = os.urandom(len(seed))
+	fn2 = SeedChainCheckpoints(sid,seed2,interval).fn
+	shutil.copyfile(fn,fn2)
+	check('wrong seed',SeedChainCheckpoints(sid,seed2,interval).states == [])
+	os.unlink(fn2)
+
+	for pos in (0,len(data)/2,len(data)-1):
+		open(fn,'wb').write(data[:pos] + chr(ord(data[pos]) ^ 1) + data[pos+1:])
+		check('altered byte at offset {}'.format(pos),SeedChainCheckpoints(sid,seed,interval).states == [])
+	open(fn,'wb').write(data[:-1])
+	check('truncated file',SeedChainCheckpoints(sid,seed,interval).states == [])
+
+	nums = rand_nums(interval * 12)
+	ck,ret = walk(seed,interval,nums)
+	check('walk with bad checkpoint file',ret == ref_walk(seed,nums))
+
+g.data_dir = tempfile.mkdtemp()
+try:
+	for n in range(rounds):
+		seed = os.urandom(random.choice((16,24,32)))
+		qmsg_r('\rRound {}/{} '.format(n+1,rounds))
+		vmsg('')
+		interval = test_walk(seed)
+		test_reload(seed,interval)
+		test_bad_file(seed,interval)
+finally:
+	shutil.rmtree(g.data_dir)
+
+qmsg('\n' + green('All seed chain checkpoint tests passed'))
@@ -436,6 +436,7 @@ cmd_group['main'] = OrderedDict([
 	['addrgen2',  (2,'address generation (2)',    [[['mmdat'],2]])],
 	['txcreate2', (2,'transaction creation (2)',  [[['addrs'],2]])],
 	['txsign2',   (2,'transaction signing, two transactions',[[['mmdat','rawtx'],1],[['mmdat','rawtx'],2]])],
+	['txsign2_batch',(2,'transaction signing, two transactions (batch mode)',[[['mmdat','rawtx'],1],[['mmdat','rawtx'],2]])],
 	['export_mnemonic2', (2,'seed export to mmwords format (2)',[[['mmdat'],2]])],
 
 	['walletgen3',(3,'wallet generation (3)',                  [[['del_dw_run'],15]])],
@@ -474,6 +475,8 @@ cmd_group['ref'] = (
 	# generating new reference ('abc' brainwallet) files:
 	('refwalletgen',   ([],'gen new refwallet')),
 	('refaddrgen',     (['mmdat',pwfile],'new refwallet addr chksum')),
+	('refaddrgen_mp',  (['mmdat',pwfile],'new refwallet addr chksum (multiprocess)')),
+	('refaddrgen_ckpt',(['mmdat',pwfile],'new refwallet addr chksum (seed chain checkpoints)')),
 	('refkeyaddrgen',  (['mmdat',pwfile],'new refwallet key-addr chksum')),
 	('refpasswdgen',   (['mmdat',pwfile],'new refwallet passwd file chksum')),
 	('ref_b32passwdgen',(['mmdat',pwfile],'new refwallet passwd file chksum (base32)')),
@@ -488,6 +491,7 @@ cmd_group['ref_other'] = (
 #	Create the fake inputs:
 #	('txcreate8',          'transaction creation (8)'),
 	('ref_tx_chk',         'saved reference tx file'),
+	('ref_tx_sign_offline','offline signing of saved reference tx file'),
 	('ref_brain_chk_spc3', 'saved brainwallet (non-standard spacing)'),
 	('ref_tool_decrypt',   'decryption of saved MMGen-encrypted file'),
 )
@@ -1161,6 +1165,20 @@ class MMGenTestSuite(object):
 		d = ' (%s-bit seed)' % cfg['seed_len']
 		self.addrgen(name,wf,pf=pf,check_ref=True)
 
+	def refaddrgen_mp(self,name,wf,pf):
+		self.addrgen(name,wf,pf=pf,check_ref=True,extra_args=['--jobs=3'])
+
+	# The first run writes the checkpoint file, the second one starts from it
+	def refaddrgen_ckpt(self,name,wf,pf):
+		cfg_data = open(g.cfg_file).read() if os.path.exists(g.cfg_file) else None
+		open(g.cfg_file,'a').write('\nseed_chain_checkpoints 100\n')
+		try:
+			for i in (1,2):
+				self.addrgen(name,wf,pf=pf,check_ref=True)
+		finally:
+			if cfg_data is None: os.unlink(g.cfg_file)
+			else: open(g.cfg_file,'w').write(cfg_data)
+
 	def addrimport(self,name,addrfile):
 		outfile = os.path.join(cfg['tmpdir'],'addrfile_w_comments')
 		add_comments_to_addr_file(addrfile,outfile)
@@ -1270,11 +1288,11 @@ class MMGenTestSuite(object):
 		add = ' #' + tnum if tnum else ''
 		t.written_to_file('Signed transaction' + add, oo=True)
 
-	def txsign(self,name,txfile,wf,pf='',bumpf='',save=True,has_label=False,txdo_handle=None):
+	def txsign(self,name,txfile,wf,pf='',bumpf='',save=True,has_label=False,txdo_handle=None,add_args=[]):
 		if txdo_handle:
 			t = txdo_handle
 		else:
-			t = MMGenExpect(name,'mmgen-txsign', ['-d',cfg['tmpdir'],txfile]+([],[wf])[bool(wf)])
+			t = MMGenExpect(name,'mmgen-txsign', add_args+['-d',cfg['tmpdir'],txfile]+([],[wf])[bool(wf)])
 			t.license()
 			t.tx_view()
 		t.passphrase('MMGen wallet',cfg['wpasswd'])
@@ -1463,6 +1481,20 @@ class MMGenTestSuite(object):
 			self.txsign_end(t,cnum)
 		t.ok()
 
+	def txsign2_batch(self,name,txf1,wf1,txf2,wf2):
+		t = MMGenExpect(name,'mmgen-txsign', ['-d',cfg['tmpdir'],'--batch',txf1,wf1,txf2,wf2])
+		t.license()
+		for cnum in ('1','2'):
+			t.tx_view()
+		for cnum in ('1','2'):
+			t.passphrase('MMGen wallet',cfgs[cnum]['wpasswd'])
+		t.expect('Signing 2 transactions')
+		for cnum in ('1','2'):
+			t.expect('Add a comment to transaction? (y/N): ','\n')
+			t.expect('Save signed transaction.*?\? \(Y/n\): ','y',regex=True)
+			t.written_to_file('Signed transaction #' + cnum, oo=True)
+		t.ok()
+
 	def export_mnemonic2(self,name,wf):
 		self.export_mnemonic(name,wf)
 
@@ -1722,6 +1754,14 @@ class MMGenTestSuite(object):
 		pf = get_tmpfile_fn(cfg,pwfile)
 		self.txsign(name,tf,wf,pf,save=False,has_label=True)
 
+	def ref_tx_sign_offline(self,name):
+		if not KeyGenerator.test_for_secp256k1():
+			msg('Skipping {}: secp256k1 extension module not available'.format(name))
+			return
+		tf = os.path.join(ref_dir,cfg['ref_tx_file'])
+		wf = os.path.join(ref_dir,cfg['ref_wallet'])
+		self.txsign(name,tf,wf,save=False,has_label=True,add_args=['--offline'])
+
 	def ref_tool_decrypt(self,name):
 		f = os.path.join(ref_dir,ref_enc_fn)
 		aa = []
@@ -1816,6 +1856,7 @@ class MMGenTestSuite(object):
 			'ref_wallet_chk',
 			'refwalletgen',
 			'refaddrgen',
+			'refaddrgen_mp',
 			'ref_seed_chk',
 			'ref_hex_chk',
 			'ref_mn_chk',
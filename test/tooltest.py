@@ -74,6 +74,7 @@ cmd_data = OrderedDict([
 				('Hexaddr2addr',   ('Addr2hexaddr','io2')),
 
 				('Pipetest',       ('Randpair','o3')),
+				('Batchtest',      ('Randpair','o3')),
 			])
 		}
 	),
@@ -90,6 +91,13 @@ cmd_data = OrderedDict([
 			])
 		}
 	),
+	('bench', {
+			'desc': 'benchmarks of tool internals (run in-process)',
+			'cmd_data': OrderedDict([
+				('Baseconv_bench', ()),
+			])
+		}
+	),
 	('rpc', {
 			'desc': 'Bitcoind RPC commands',
 			'cmd_data': OrderedDict([
@@ -104,6 +112,9 @@ cmd_data = OrderedDict([
 	),
 ])
 
+# groups run only when named on the command line
+explicit_only = ('bench',)
+
 cfg = {
 	'name':          'the tool utility',
 	'enc_passwd':    'Ten Satoshis',
@@ -129,8 +140,9 @@ opts_data = lambda: {
 """,
 	'notes': """
 
-If no command is given, the whole suite of tests is run.
-"""
+If no command is given, the whole suite of tests is run, except for the
+following groups, which must be named explicitly: {}
+""".format(', '.join(explicit_only))
 }
 
 sys.argv = [sys.argv[0]] + ['--skip-cfg-file'] + sys.argv[1:]
@@ -156,8 +168,8 @@ if opt.list_cmds:
 	sys.exit(0)
 if opt.list_names:
 	acc = []
-	for v in cmd_data.values():
-		acc += v['cmd_data'].keys()
+	for k,v in cmd_data.items():
+		if k not in explicit_only: acc += v['cmd_data'].keys()
 	tc = sorted(c.lower() for c in acc)
 	msg('{}\n{}'.format(green('Tested commands:'),'\n'.join(tc)))
 	import mmgen.tool
@@ -387,6 +399,30 @@ class MMGenToolTestSuite(object):
 		addr = read_from_tmpfile(cfg,'Wif2addr3.out').strip()
 		cmp_or_die(res,addr)
 
+	def Batchtest(self,name,f1,f2,f3):
+		test_msg('batch mode')
+		import json
+		pairs = [read_from_file(f).split() for f in (f1,f2,f3)]
+		reqs = ['wif2addr {}'.format(pairs[0][0]),
+				'# comment',
+				'wif2addr {} segwit=1'.format(pairs[2][0]),
+				'nosuchcommand',
+				json.dumps({'id':1,'cmd':'wif2addr','args':[pairs[1][0]]}),
+				json.dumps({'id':2,'cmd':'wif2addr','args':['bad_wif']}),
+				'randhex nbytes=16', # must not prompt for user entropy
+				'wif2addr {}'.format(pairs[0][0])]
+		p = subprocess.Popen(spawn_cmd+add_spawn_args+['--batch'],
+				stdin=subprocess.PIPE,stdout=subprocess.PIPE,stderr=subprocess.PIPE)
+		out,err = p.communicate('\n'.join(reqs)+'\n')
+		out = out.splitlines()
+		cmp_or_die([pairs[0][1],pairs[2][1]],out[:2],skip_ok=True)
+		cmp_or_die({'id':1,'result':pairs[1][1],'error':None},json.loads(out[2]),skip_ok=True)
+		r = json.loads(out[3])
+		cmp_or_die((2,None),(r['id'],r['result']),skip_ok=True)
+		cmp_or_die((True,pairs[0][1]),(is_hex_str(out[4]) and len(out[4]) == 32,out[5]),skip_ok=True)
+		cmp_or_die(1,p.wait(),skip_ok=True) # failed requests give exit status 1
+		ok()
+
 
 	# Mnemonic
 	def Hex2mn(self,name):
@@ -404,6 +440,59 @@ class MMGenToolTestSuite(object):
 		self.run_cmd(name,[])
 		ok()
 
+	# Benchmarks
+	def Baseconv_bench(self,name):
+
+		from mmgen.util import baseconv
+
+		# reference implementations of the old code
+		def tohex_ref(words,wl_id,pad=None):
+			wl = baseconv.digits[wl_id]
+			base = len(wl)
+			if not set(words) <= set(wl):
+				die(2,'{} is not in {} (base{}) format'.format(repr(words),wl_id,base))
+			deconv = [wl.index(words[::-1][i])*(base**i) for i in range(len(words))]
+			ret = ('{:0{w}x}'.format(sum(deconv),w=pad or 0))
+			return ('','0')[len(ret) % 2] + ret
+
+		def fromhex_ref(hexnum,wl_id,pad=None):
+			hexnum = hexnum.strip()
+			if not is_hex_str(hexnum):
+				die(2,"'%s': not a hexadecimal number" % hexnum)
+			wl = baseconv.digits[wl_id]
+			base = len(wl)
+			num,ret = int(hexnum,16),[]
+			while num:
+				ret.append(num % base)
+				num /= base
+			return [wl[n] for n in [0] * ((pad or 0)-len(ret)) + ret[::-1]]
+
+		def timeit(f,args):
+			t = time.time()
+			return [f(*a) for a in args],time.time() - t
+
+		msg('Benchmarking baseconv (current vs. reference code):')
+		for desc,wl_id,nbytes,rounds in (
+				('256-bit mnemonic (electrum)','electrum',32,2000),
+				('256-bit mnemonic (tirosh)',  'tirosh',  32,2000),
+				('256-bit b58',                'b58',     32,2000),
+				('256-bit b32',                'b32',     32,2000),
+				('2048-byte b58',              'b58',   2048,4)):
+			hexnums = [getrandhex(nbytes) for i in range(rounds)]
+			pad = len(baseconv.fromhex('ff'*nbytes,wl_id))
+			fh_args = [(h,wl_id,pad) for h in hexnums]
+			digits,t_fh = timeit(baseconv.fromhex,fh_args)
+			digits_ref,t_fh_ref = timeit(fromhex_ref,fh_args)
+			th_args = [(d,wl_id,nbytes*2) for d in digits]
+			hexnums_out,t_th = timeit(baseconv.tohex,th_args)
+			hexnums_ref,t_th_ref = timeit(tohex_ref,th_args)
+			if digits != digits_ref or hexnums_out != hexnums_ref or hexnums_out != hexnums:
+				die(3,red('Error: baseconv results differ from reference for {}'.format(desc)))
+			for op,t,t_ref in (('fromhex',t_fh,t_fh_ref),('tohex',t_th,t_th_ref)):
+				msg('  {:8} {:28} {:>8.0f}/s  (ref: {:>8.0f}/s, {:5.1f}x)'.format(
+					op,desc,rounds/t,rounds/t_ref,t_ref/t))
+		ok()
+
 	# RPC
 	def Addrfile_chksum(self,name):
 		fn = os.path.join(cfg['refdir'],cfg['addrfile'])
@@ -438,10 +527,11 @@ if cmd_args:
 		die(1,"'%s': unrecognized command" % cmd)
 else:
 	cleandir(cfg['tmpdir'])
-	for cmd in cmd_data:
+	cmds = [k for k in cmd_data if k not in explicit_only]
+	for cmd in cmds:
 		msg('Running tests for %s:' % cmd_data[cmd]['desc'])
 		ts.do_cmds(cmd)
-		if cmd is not cmd_data.keys()[-1]: msg('')
+		if cmd is not cmds[-1]: msg('')
 
 t = int(time.time()) - start_time
 msg(green(